@@ -23,21 +23,47 @@ bl_info = {"name": "CPACS Import",
 ###                                           This is the Blender addon part.                                        ###
 ########################################################################################################################
 
-# ImportHelper is a helper class, defines filename and
-# invoke() function which calls the file selector.
-from bpy_extras.io_utils import ImportHelper
-from bpy.props import StringProperty, BoolProperty, EnumProperty
-from bpy.types import Operator
-
+import argparse
+import copy
+import hashlib
+import json
 import logging
 import math
+import multiprocessing
 import os
+import pickle
 import sys
+import time
+import weakref
 import xml.etree.cElementTree as ETree
 import xml.etree.ElementTree as XMLTree
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    # ImportHelper is a helper class, defines filename and
+    # invoke() function which calls the file selector.
+    from bpy_extras.io_utils import ImportHelper
+    from bpy.props import StringProperty, BoolProperty, EnumProperty, IntProperty, CollectionProperty
+    from bpy.types import Operator, OperatorFileListElement
+
+    import bpy
+    import bmesh
+    from mathutils import Matrix
 
-import bpy
-import bmesh
+except ImportError:
+    # The deck planning runs in worker processes without Blender, see plan_decks()
+    bpy = None
+    bmesh = None
+    Matrix = None
+    Operator = type('Operator', (), {})
+    ImportHelper = type('ImportHelper', (), {})
+    OperatorFileListElement = None
+    StringProperty = BoolProperty = EnumProperty = IntProperty = CollectionProperty = lambda **kwargs: None
+
+# Maximum number of cabin lights of an import, see apply_light_budget()
+LIGHT_BUDGET_DEFAULT: int = 32
 
 
 class ImportCPACSActionMenu(Operator, ImportHelper):
@@ -54,7 +80,17 @@ class ImportCPACSActionMenu(Operator, ImportHelper):
         maxlen=255,
     )
 
-    """
+    # Several selected files are imported side by side
+    files: CollectionProperty(
+        type=OperatorFileListElement,
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
+
+    directory: StringProperty(
+        subtype='DIR_PATH',
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
+
     option_select_business_seat: EnumProperty(
         name="BC Seat Type",
         description="Choose between the business class type models",
@@ -67,12 +103,120 @@ class ImportCPACSActionMenu(Operator, ImportHelper):
         default='OPT_C',
     )
 
-    """
+    option_light_budget: IntProperty(
+        name="Light Budget",
+        description="Maximum number of cabin lights. Light strips are merged to stay within the budget",
+        default=LIGHT_BUDGET_DEFAULT,
+        min=0,
+    )
+
+    option_validation: EnumProperty(
+        name="Layout Check",
+        description="Handling of overlapping elements, seats in aisles and elements outside of the cabin contour",
+        items=(
+            ('off', "Off", "Do not check the cabin layout"),
+            ('warn', "Warn", "Log all layout issues"),
+            ('mark', "Mark", "Log all layout issues and mark the affected objects red"),
+            ('abort', "Abort", "Cancel the import if there are layout issues"),
+        ),
+        default='warn',
+    )
 
-    option_select_business_seat = "OPT_A"
+    option_texture_quality: EnumProperty(
+        name="Texture Quality",
+        description="Resolution of the image textures. Lower resolutions are cached on disk and save memory",
+        items=(
+            ('draft', "Draft", "Textures of at most 512 pixels for quick previews"),
+            ('preview', "Preview", "Textures of at most 1024 pixels for viewport and EEVEE renders"),
+            ('final', "Final", "Full resolution textures of the material library"),
+        ),
+        default='final',
+    )
+
+    option_link_assets: BoolProperty(
+        name="Link Assets",
+        description="Link materials and templates from the asset libraries instead of embedding copies. Saved files "
+                    "stay small but need the libraries",
+        default=False,
+    )
+
+    option_symmetric: BoolProperty(
+        name="Symmetric Shell",
+        description="Create one half of the symmetric floor, ceiling, linings and bins and mirror it at the center "
+                    "plane. Seats and monuments are created as placed",
+        default=False,
+    )
+
+    option_render_profile: EnumProperty(
+        name="Render Profile",
+        description="Cycles sampling, light bounce, denoising and simplification settings of the cabin",
+        items=(
+            ('draft', "Draft", "Few samples at half resolution to check views and lighting"),
+            ('review', "Review", "Denoised images for design reviews"),
+            ('publication', "Publication", "Converged full quality images"),
+        ),
+        default='review',
+    )
 
     def execute(self, context):
-        return run_main_parser(self.filepath, self.option_select_business_seat)
+        # init logger
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s: %(message)s')
+        logging.info("Running CPACS import script to Blender.")
+
+        # The import runs in steps on a timer, so the interface is drawn and Esc cancels the import
+        paths: [str] = [os.path.join(self.directory, file.name) for file in self.files if file.name]
+        self._steps = import_steps(paths if len(paths) > 1 else self.filepath, self.option_select_business_seat,
+                                   light_budget=self.option_light_budget, validation=self.option_validation,
+                                   texture_quality=self.option_texture_quality,
+                                   link_assets=self.option_link_assets, render_profile=self.option_render_profile,
+                                   symmetric=self.option_symmetric)
+        self._timer = context.window_manager.event_timer_add(IMPORT_TIMER_INTERVAL, window=context.window)
+        context.window_manager.modal_handler_add(self)
+        context.window_manager.progress_begin(0, 100)
+
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC' and event.value == 'PRESS':
+            self.finish(context)
+            self.report({'WARNING'}, "CPACS import cancelled.")
+            return {'CANCELLED'}
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        # Run import steps until the time of this frame is used up
+        deadline: float = time.perf_counter() + IMPORT_FRAME_BUDGET
+        try:
+            progress: ImportProgress = next(self._steps)
+            while time.perf_counter() < deadline:
+                progress = next(self._steps)
+
+        except StopIteration:
+            self.finish(context)
+            return {'FINISHED'}
+
+        except CabinLayoutError as e:
+            self.finish(context)
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+
+        except Exception:
+            self.finish(context)
+            raise
+
+        context.window_manager.progress_update(int(progress.fraction() * 100))
+        context.workspace.status_text_set("Importing CPACS: " + str(progress) + ". Press Esc to cancel.")
+
+        return {'RUNNING_MODAL'}
+
+    def finish(self, context) -> None:
+        """ End the import, an unfinished import is cancelled and its partial results are removed """
+
+        self._steps.close()
+        context.window_manager.event_timer_remove(self._timer)
+        context.window_manager.progress_end()
+        context.workspace.status_text_set(None)
 
 
 # Only needed if you want to add into a dynamic menu
@@ -110,6 +254,7 @@ class CPACS:
     fuselage_element_scaling_y: str = 'elements/element/transformation/scaling/y'
     fuselage_element_scaling_z: str = 'elements/element/transformation/scaling/z'
     fuselage_element_translation_z: str = 'elements/element/transformation/translation/z'
+    fuselage_element_profile_uid: str = 'elements/element/profileUID'
 
     fuselage_positioning_length: str = 'length'
 
@@ -208,6 +353,288 @@ class CPACS:
 ###                                        This is the core part of the script                                       ###
 ########################################################################################################################
 
+# ------------------------------------------------------------------------------
+# Configuration
+
+# Directory of the .obj cabin models and path of the material library, both can be set by environment variables
+# 'S:\\Visualisation\\Concepts\\AVACON\\CAD_Models\\'
+# 'S:/Visualisation/Concepts/AVACON/Textures/Cabin Textures/Texture Samples.blend'
+MODEL_DIRECTORY: str = os.environ.get('CPACS_IMPORTER_MODELS',
+                                      'C:\\Users\\marc.engelmann\\Desktop\\Blender_files\\CAD_Models\\')
+MATERIAL_LIBRARY: str = os.environ.get(
+    'CPACS_IMPORTER_MATERIALS',
+    'C:/Users/marc.engelmann/Desktop/Blender_files/Textures/Cabin Textures/Texture Samples.blend')
+
+# Directory of all caches of the importer
+CACHE_DIRECTORY: str = os.environ.get('CPACS_IMPORTER_CACHE',
+                                      os.path.join(os.path.expanduser('~'), '.cache', 'cpacs_importer'))
+
+# Library of all template objects, written by the first import that links its assets instead of embedding them.
+# Point it to a shared directory, so all linked cabin files use the same library.
+TEMPLATE_LIBRARY: str = os.environ.get('CPACS_IMPORTER_TEMPLATE_LIBRARY',
+                                       os.path.join(CACHE_DIRECTORY, 'templates.blend'))
+
+# JSON file that adds templates and element rules to the DEFAULT_ASSETS, see AssetRegistry
+ASSET_REGISTRY: str = os.environ.get('CPACS_IMPORTER_ASSETS', None)
+
+IMPORTER_VERSION: str = '.'.join(str(number) for number in bl_info['version'])
+
+
+def model_file_path(relative_path: str) -> str:
+    """ Path of an .obj model, relative paths use backslashes as in the asset registry """
+
+    return os.path.join(MODEL_DIRECTORY, *relative_path.split('\\')) + '.obj'
+
+
+_importer_source_hash: str = None
+
+
+def importer_source_hash() -> str:
+    """ Hash of this script, cached results of older importer versions are not reused """
+
+    global _importer_source_hash
+
+    if _importer_source_hash is None:
+        with open(os.path.abspath(__file__), 'rb') as source:
+            _importer_source_hash = hashlib.sha256(source.read()).hexdigest()
+
+    return _importer_source_hash
+
+
+# ------------------------------------------------------------------------------
+# Asset Registry
+
+# Template models of the cabin elements, relative to the CAD model directory, and the rules that select a template
+# for a floor element or seat group. A template is either a model or a model with variants by style, the default
+# model is used for all other styles. The first rule whose attributes all match the element selects its template.
+DEFAULT_ASSETS: dict = dict([
+    ('templates', dict([
+        ('lining_1', 'Linings\\side_wall_1'),
+        ('lining_2', 'Linings\\side_wall_2'),
+        ('lining_3', 'Linings\\side_wall_3'),
+        ('bin', 'Overhead_Bins\\bin'),
+        ('arch', 'Overhead_Bins\\aisle_arch'),
+        ('bin_extension', 'Overhead_Bins\\bin_extension_3'),
+        ('galley', 'Galley\\galley_1'),
+        ('curtain', 'Divider\\curtain_1'),
+        ('bar', 'Bar\\bar_1'),
+        ('stairs', 'Stairs\\stairs_1'),
+        ('table', 'Tables\\table_1'),
+        ('divider', 'Divider\\divider_3'),
+        ('seat_business', dict([('model', 'Seats\\bc_1'),
+                                ('styles', dict([('OPT_A', 'Seats\\ec_1'), ('OPT_B', 'Seats\\pec_1')]))])),
+        ('seat_premium_economy', 'Seats\\pec_1'),
+        ('seat_economy_1', 'Seats\\ec_1'),
+        ('seat_economy_2', 'Seats\\ec_2'),
+        ('seat_economy_3', 'Seats\\ec_3'),
+        ('seat_economy_4', 'Seats\\ec_4'),
+        ('seat_economy_5', 'Seats\\ec_5')
+    ])),
+    ('elements', [
+        dict([('element', 'floor'), ('type', CPACS.floor_element_type_kitchen), ('template', 'galley')]),
+        dict([('element', 'floor'), ('type', CPACS.custom_floor_element_type_curtain), ('template', 'curtain')]),
+        dict([('element', 'floor'), ('type', CPACS.custom_floor_element_type_bar), ('template', 'bar')]),
+        dict([('element', 'floor'), ('type', CPACS.custom_floor_element_type_staircase), ('template', 'stairs')]),
+        dict([('element', 'floor'), ('type', CPACS.custom_floor_element_type_table), ('template', 'table')]),
+        dict([('element', 'floor'), ('template', 'divider')]),
+        *[dict([('element', 'seat'), ('type', CPACS.seat_element_type_economy), ('seats', number_of_seats),
+                ('template', 'seat_economy_' + str(number_of_seats))]) for number_of_seats in range(2, 6)],
+        dict([('element', 'seat'), ('type', CPACS.seat_element_type_economy), ('template', 'seat_economy_1')]),
+        dict([('element', 'seat'), ('type', CPACS.seat_element_type_business), ('template', 'seat_business')]),
+        dict([('element', 'seat'), ('template', 'seat_premium_economy')])
+    ])
+])
+
+
+class AssetRegistry:
+    """
+    Templates and element rules of the DEFAULT_ASSETS, extended by a registry file. Templates of the file replace
+    built-in templates of the same name, its rules are matched before the built-in rules. Example:
+    {"templates": {"lavatory": "Lavatory\\\\lavatory_1"},
+     "elements": [{"element": "floor", "type": "toilet", "template": "lavatory"}]}
+    """
+
+    def __init__(self, path: str = None) -> None:
+        """
+        :param path: registry file, None for the built-in assets only
+        """
+
+        self.path = path
+        self.templates: dict = dict(DEFAULT_ASSETS['templates'])
+        self.rules: [dict] = list(DEFAULT_ASSETS['elements'])
+
+        if path is not None:
+            with open(path, 'r') as registry_file:
+                registry: dict = json.load(registry_file)
+
+            self.templates.update(registry.get('templates', dict()))
+            self.rules = list(registry.get('elements', [])) + self.rules
+
+        for rule in self.rules:
+            if rule.get('template') not in self.templates:
+                raise ValueError("Asset registry rule " + str(rule) + " refers to an unknown template.")
+
+    def select(self, element: str, **attributes) -> str:
+        """
+        Template of a cabin element
+        :param element: 'floor' or 'seat'
+        :param attributes: attributes of the element, 'type' and for seat groups 'seats'
+        :return: template name
+        """
+
+        for rule in self.rules:
+            if rule['element'] == element and all(attributes.get(key) == value for key, value in rule.items()
+                                                  if key not in ('element', 'template')):
+                return rule['template']
+
+        raise KeyError("No template registered for " + element + " " + str(attributes))
+
+    def style(self, template_name: str, style: str = None) -> str:
+        """ Style of a template, None if the template has no variant of the style """
+
+        template = self.templates[template_name]
+        return style if isinstance(template, dict) and style in template.get('styles', dict()) else None
+
+    def model(self, template_name: str, style: str = None) -> str:
+        """ Relative path of the model of a template and style """
+
+        template = self.templates[template_name]
+        if not isinstance(template, dict):
+            return template
+
+        return template.get('styles', dict()).get(style, template['model'])
+
+    def variants(self) -> [tuple]:
+        """ Names and styles of all template models, None is the default model """
+
+        return [(template_name, style) for template_name, template in self.templates.items()
+                for style in [None] + (sorted(template.get('styles', dict())) if isinstance(template, dict) else [])]
+
+
+_asset_registry: AssetRegistry = None
+
+
+def asset_registry() -> AssetRegistry:
+    """ Asset registry of the ASSET_REGISTRY file, read on first use """
+
+    global _asset_registry
+
+    if _asset_registry is None:
+        _asset_registry = AssetRegistry(ASSET_REGISTRY)
+
+    return _asset_registry
+
+
+# ------------------------------------------------------------------------------
+# Build Cache
+
+# Name of the scene property that stores the build key in a saved cabin
+BUILD_KEY_PROPERTY: str = 'cpacs_build_key'
+
+# Saved cabin of a scripted build
+OUTPUT_PATH_DEFAULT: str = os.path.join(os.path.expanduser('~'), 'Desktop', 'cabin.blend')
+
+# Hashes of files by path, with the modification time and size they were computed for
+_file_hashes: dict = None
+
+
+def file_hash(path: str) -> str:
+    """
+    Hash of a file's content. Hashes are kept in the cache directory and only recomputed if the file is modified, so
+    large models and textures are not read again by every run.
+    :param path:
+    :return:
+    """
+
+    global _file_hashes
+
+    hashes_path: str = os.path.join(CACHE_DIRECTORY, 'file_hashes.json')
+
+    if _file_hashes is None:
+        try:
+            with open(hashes_path, 'r') as hashes_file:
+                _file_hashes = json.load(hashes_file)
+        except (OSError, ValueError):
+            _file_hashes = dict()
+
+    path = os.path.abspath(path)
+    state: list = [os.path.getmtime(path), os.path.getsize(path)]
+
+    if _file_hashes.get(path, [None, None, None])[:2] != state:
+        with open(path, 'rb') as hashed_file:
+            _file_hashes[path] = state + [hashlib.sha256(hashed_file.read()).hexdigest()]
+
+        try:
+            os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+            with open(hashes_path + '.' + str(os.getpid()), 'w') as hashes_file:
+                json.dump(_file_hashes, hashes_file)
+            os.replace(hashes_path + '.' + str(os.getpid()), hashes_path)
+        except OSError as e:
+            logging.warning("Could not store file hashes (" + str(e) + ").")
+
+    return _file_hashes[path][2]
+
+
+def build_key(cpacs_paths: [str], options: dict) -> str:
+    """
+    Key of a build output. It changes with the CPACS files, the import options, the importer and the models and
+    material library it uses.
+    :param cpacs_paths:
+    :param options: all import and output options that change the output, values must have a stable repr
+    :return:
+    """
+
+    key = hashlib.sha256()
+    key.update(IMPORTER_VERSION.encode())
+    key.update(importer_source_hash().encode())
+    key.update(repr(sorted(options.items())).encode())
+
+    for cpacs_path in cpacs_paths:
+        key.update(file_hash(cpacs_path).encode())
+
+    # Missing assets are part of the key as well, the output changes once they are available
+    registry: AssetRegistry = asset_registry()
+    asset_paths: [str] = sorted(set(model_file_path(registry.model(template_name, style))
+                                    for template_name, style in registry.variants()))
+    for asset_path in asset_paths + [MATERIAL_LIBRARY] + ([ASSET_REGISTRY] if ASSET_REGISTRY is not None else []):
+        key.update((file_hash(asset_path) if os.path.isfile(asset_path) else 'missing ' + asset_path).encode())
+
+    return key.hexdigest()
+
+
+def build_options(camera_kinds: [str] = None, validation: str = 'warn', texture_quality: str = 'final',
+                  link_assets: bool = False, compress: bool = False, render_directory: str = None,
+                  render_profile: str = 'review', cull_margin: float = None, symmetric: bool = False) -> dict:
+    """ Options of a scripted build that are part of its build key, see run_as_script() """
+
+    return dict([('camera_kinds', sorted(camera_kinds) if camera_kinds is not None else None),
+                 ('validation', validation), ('texture_quality', texture_quality), ('link_assets', link_assets),
+                 ('compress', compress),
+                 ('render_directory', os.path.abspath(render_directory) if render_directory is not None else None),
+                 ('render_profile', render_profile), ('cull_margin', cull_margin), ('symmetric', symmetric)])
+
+
+def build_key_path(output_path: str) -> str:
+    """ File next to a build output that records its build key, readable without Blender """
+
+    return output_path + '.buildkey'
+
+
+def is_build_current(output_path: str, key: str) -> bool:
+    """ True if the output exists and was built with the key """
+
+    try:
+        with open(build_key_path(output_path), 'r') as key_file:
+            return os.path.isfile(output_path) and key_file.read().strip() == key
+    except OSError:
+        return False
+
+
+def write_build_key(output_path: str, key: str) -> None:
+    with open(build_key_path(output_path), 'w') as key_file:
+        key_file.write(key + '\n')
+
+
 # ------------------------------------------------------------------------------
 # Utility Functions
 
@@ -225,63 +652,2677 @@ class Vector:
 def set_smooth(obj) -> None:
     """ Enable smooth shading on an mesh object """
 
-    for face in obj.data.polygons:
-        face.use_smooth = True
+    for face in obj.data.polygons:
+        face.use_smooth = True
+
+
+def recalculate_normals(mesh) -> None:
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+
+    bmesh.ops.recalc_face_normals(bm, faces=bm.faces)
+
+    bm.to_mesh(mesh)
+    bm.free()
+
+
+def vector_x_distance_to(vec: Vector, x_pos: float):
+    return abs(vec.x - x_pos)
+
+
+def spawn_pool(workers: int, tasks: int) -> ProcessPoolExecutor:
+    """
+    Worker processes for independent tasks. The workers are fresh interpreters, forking a running Blender is not
+    safe.
+    :param workers: number of worker processes, None for one per task and core, 1 for none
+    :param tasks: number of tasks
+    :return: the pool, None if the tasks should run serially because there is no more than one worker or task, or
+    the workers could not be started
+    """
+
+    if workers is None:
+        workers = min(tasks, os.cpu_count() or 1)
+
+    if workers <= 1 or tasks <= 1:
+        return None
+
+    try:
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+    except Exception as e:
+        logging.warning("Could not start worker processes (" + str(e) + ").")
+        return None
+
+
+# ------------------------------------------------------------------------------
+# Data Block Accounting
+
+# Custom property that marks all data blocks created by this importer
+IMPORTER_TAG: str = 'cpacs_importer'
+
+# Data block types created by an import, in the order they are purged
+DATA_BLOCK_TYPES: [str] = ['objects', 'collections', 'meshes', 'lights', 'cameras', 'materials', 'node_groups',
+                           'textures', 'images']
+
+
+def snapshot_data_blocks() -> dict:
+    """ Pointers of all existing data blocks by type """
+
+    return dict([(block_type, set(block.as_pointer() for block in getattr(bpy.data, block_type)))
+                 for block_type in DATA_BLOCK_TYPES])
+
+
+def tag_new_data_blocks(snapshot: dict) -> int:
+    """
+    Mark all data blocks created since the snapshot as owned by the importer
+    :param snapshot: see snapshot_data_blocks()
+    :return: number of tagged data blocks
+    """
+
+    tagged: int = 0
+
+    for block_type in DATA_BLOCK_TYPES:
+        for block in getattr(bpy.data, block_type):
+            if block.as_pointer() not in snapshot[block_type] and block.library is None:
+                block[IMPORTER_TAG] = True
+                tagged += 1
+
+    return tagged
+
+
+def purge_orphans() -> int:
+    """
+    Remove all data blocks of the importer that are not used anymore. Removing an object can orphan its mesh, so this
+    repeats until nothing is left to remove.
+    :return: number of removed data blocks
+    """
+
+    removed: int = 0
+    removed_in_pass: int = -1
+
+    while removed_in_pass != 0:
+        removed_in_pass = 0
+
+        for block_type in DATA_BLOCK_TYPES:
+            data_blocks = getattr(bpy.data, block_type)
+
+            for block in [block for block in data_blocks if block.users == 0 and block.get(IMPORTER_TAG)]:
+                data_blocks.remove(block)
+                removed_in_pass += 1
+
+        removed += removed_in_pass
+
+    return removed
+
+
+def remove_new_data_blocks(snapshot: dict) -> int:
+    """
+    Remove all data blocks created since the snapshot, e.g. the partial results of a cancelled import
+    :param snapshot: see snapshot_data_blocks()
+    :return: number of removed data blocks
+    """
+
+    removed: int = 0
+
+    for block_type in DATA_BLOCK_TYPES:
+        data_blocks = getattr(bpy.data, block_type)
+
+        for block in [block for block in data_blocks
+                      if block.as_pointer() not in snapshot[block_type] and block.library is None]:
+            data_blocks.remove(block)
+            removed += 1
+
+    return removed
+
+
+def estimate_data_block_memory(block) -> int:
+    """ Rough memory estimate of a data block in bytes, based on its geometry or pixel count """
+
+    if isinstance(block, bpy.types.Mesh):
+        return len(block.vertices) * 32 + len(block.edges) * 16 + len(block.loops) * 24 + len(block.polygons) * 24
+
+    if isinstance(block, bpy.types.Image) and block.has_data:
+        bytes_per_channel: int = 4 if block.is_float else 1
+        return block.size[0] * block.size[1] * block.channels * bytes_per_channel
+
+    return 0
+
+
+def report_data_blocks() -> dict:
+    """
+    Log the number and the approximate memory of all data blocks by type
+    :return: (count, bytes, importer owned count) by data block type
+    """
+
+    report: dict = dict()
+
+    for block_type in DATA_BLOCK_TYPES:
+        data_blocks = list(getattr(bpy.data, block_type))
+        memory: int = sum(estimate_data_block_memory(block) for block in data_blocks)
+        owned: int = len([block for block in data_blocks if block.get(IMPORTER_TAG)])
+        report[block_type] = (len(data_blocks), memory, owned)
+
+        logging.info("\t" + block_type + ": " + str(len(data_blocks)) + " (" + str(owned) + " from import), ~" +
+                     str(round(memory / 1024.0 / 1024.0, 1)) + " MB")
+
+    return report
+
+
+# ------------------------------------------------------------------------------
+# Cabin Decoding and Query
+
+# Seat groups and floor elements as in the CPACS file: x is the front edge, y the center of the element
+SEAT_GROUP_DTYPE: np.dtype = np.dtype([('type', 'U32'), ('n_seats', 'i4'), ('x', 'f8'), ('y', 'f8'), ('length', 'f8'),
+                                       ('width', 'f8'), ('height', 'f8'), ('rotation', 'f8')])
+FLOOR_ELEMENT_DTYPE: np.dtype = np.dtype([('type', 'U32'), ('x', 'f8'), ('y', 'f8'), ('length', 'f8'),
+                                          ('width', 'f8'), ('height', 'f8'), ('rotation', 'f8')])
+
+# Single seats in aircraft coordinates: x, y and z are the center of the seat at floor level
+SEAT_DTYPE: np.dtype = np.dtype([('group', 'i4'), ('seat', 'i4'), ('type', 'U32'), ('x', 'f8'), ('y', 'f8'),
+                                 ('z', 'f8'), ('length', 'f8'), ('width', 'f8'), ('height', 'f8'),
+                                 ('rotation', 'f8')])
+
+
+def element_path(parent_path: str, literal: str, parsed_element: XMLTree.Element, index: int) -> str:
+    """
+    Path of a CPACS element for messages, identified by its uID or else by its position
+    :param parent_path:
+    :param literal: path of the element relative to its parent
+    :param parsed_element:
+    :param index: position of the element among its siblings
+    :return:
+    """
+
+    uid: str = parsed_element.get('uID')
+    return parent_path + '/' + literal + ("[@uID='" + uid + "']" if uid is not None else "[" + str(index + 1) + "]")
+
+
+def get_rotation(parsed_element: XMLTree.Element) -> float:
+    """ Custom rotation of a floor or seat element in radians """
+
+    return math.radians(float(
+        CPACS.getCustomOrElse(parsed_element, CPACS.custom_object_rotation, CPACS.custom_object_rotation_default)))
+
+
+class CabinContour:
+    """
+    Cabin cross-section of a deck along its length from cabGeometry. The half width is known at the stations x for
+    the heights z and linearly interpolated in between, queries accept single values or arrays of query points.
+    """
+
+    def __init__(self, deck: XMLTree.Element) -> None:
+        self.x: np.ndarray = np.array([float(x) for x in CPACS.getStringArray(deck, CPACS.cabin_geometry_x)])
+        self.z: np.ndarray = np.array([float(z) for z in CPACS.getStringArray(deck, CPACS.cabin_geometry_z)])
+
+        # Half widths at all stations, one row per height
+        self.half_widths: np.ndarray = np.array(
+            [[float(y) for y in CPACS.getStringArray(deck, CPACS.cabin_geometry_yZ + str(i))]
+             for i in range(1, len(self.z) + 1)])
+
+        # Slope of each contour segment between two stations, one row per height
+        self.slopes: np.ndarray = np.diff(self.half_widths, axis=1) / np.diff(self.x)
+
+    @property
+    def length(self) -> float:
+        return float(self.x.max())
+
+    @property
+    def height(self) -> float:
+        return float(self.z.max())
+
+    def __between_heights(self, values: np.ndarray, z) -> np.ndarray:
+        """ Interpolate values given for every height (first axis) at the heights z """
+
+        if len(self.z) == 1:
+            return values[0]
+
+        level: np.ndarray = np.clip(np.searchsorted(self.z, z, side='right') - 1, 0, len(self.z) - 2)
+        weight: np.ndarray = np.clip((z - self.z[level]) / (self.z[level + 1] - self.z[level]), 0.0, 1.0)
+        points: np.ndarray = np.arange(values.shape[1])
+
+        return values[level, points] * (1.0 - weight) + values[level + 1, points] * weight
+
+    def half_width(self, x, z=None):
+        """
+        Half width of the cabin at stations x and heights z, constant beyond the first and last station
+        :param x: station or array of stations, relative to the deck origin
+        :param z: height or array of heights above the floor, None for floor level
+        :return: float or array like x
+        """
+
+        x_values: np.ndarray = np.atleast_1d(np.asarray(x, dtype=float))
+        z_values: np.ndarray = np.broadcast_to(self.z[0] if z is None else np.asarray(z, dtype=float),
+                                               x_values.shape)
+        widths: np.ndarray = self.__between_heights(
+            np.array([np.interp(x_values, self.x, row) for row in self.half_widths]), z_values)
+
+        return float(widths[0]) if np.ndim(x) == 0 else widths
+
+    def slope(self, x, z=None):
+        """
+        Change of the half width per station length at stations x and heights z, zero beyond the contour
+        :param x: station or array of stations, relative to the deck origin
+        :param z: height or array of heights above the floor, None for floor level
+        :return: float or array like x
+        """
+
+        x_values: np.ndarray = np.atleast_1d(np.asarray(x, dtype=float))
+        z_values: np.ndarray = np.broadcast_to(self.z[0] if z is None else np.asarray(z, dtype=float),
+                                               x_values.shape)
+        segment: np.ndarray = np.clip(np.searchsorted(self.x, x_values, side='right') - 1, 0, len(self.x) - 2)
+        inside: np.ndarray = (x_values >= self.x[0]) & (x_values <= self.x[-1])
+        slopes: np.ndarray = self.__between_heights(self.slopes[:, segment] * inside, z_values)
+
+        return float(slopes[0]) if np.ndim(x) == 0 else slopes
+
+    def half_width_range(self, x_start: float, x_end: float, z: float = None) -> (float, float):
+        """ Narrowest and widest half width between two stations, at the ends or a station in between """
+
+        stations: np.ndarray = np.concatenate([[x_start, x_end], self.x[(self.x > x_start) & (self.x < x_end)]])
+        widths: np.ndarray = self.half_width(stations, z)
+
+        return float(widths.min()), float(widths.max())
+
+
+class DeckData:
+    """
+    Decoded elements of a cabin deck as columnar arrays
+    """
+
+    def __init__(self, deck: XMLTree.Element, deck_index: int = 0) -> None:
+        """
+        Decode a CPACS deck node
+        :param deck:
+        :param deck_index: position of the deck in the document
+        """
+
+        self.name: str = deck.find(CPACS.object_name).text
+        self.path: str = element_path('', CPACS.deck_path, deck, deck_index)
+        self.origin: Vector = Vector(float(deck.find(CPACS.cabin_x0).text), 0.0, float(deck.find(CPACS.cabin_z0).text))
+        self.contour: CabinContour = CabinContour(deck)
+
+        seat_groups: [XMLTree.Element] = deck.findall(CPACS.seat_element_sub_path)
+        self.seat_group_paths: [str] = [element_path(self.path, CPACS.seat_element_sub_path, seat_group, index)
+                                        for index, seat_group in enumerate(seat_groups)]
+        self.seat_groups: np.ndarray = np.array(
+            [(seat_group.find(CPACS.seat_element_type).text, int(seat_group.find(CPACS.seats_per_group).text),
+              float(seat_group.find(CPACS.object_x).text), float(seat_group.find(CPACS.object_y).text),
+              float(seat_group.find(CPACS.object_length).text), float(seat_group.find(CPACS.object_width).text),
+              float(seat_group.find(CPACS.object_height).text), get_rotation(seat_group))
+             for seat_group in seat_groups], dtype=SEAT_GROUP_DTYPE)
+
+        floor_elements: [XMLTree.Element] = deck.findall(CPACS.floor_element_sub_path)
+        self.floor_element_paths: [str] = [
+            element_path(self.path, CPACS.floor_element_sub_path, floor_element, index)
+            for index, floor_element in enumerate(floor_elements)]
+        self.floor_elements: np.ndarray = np.array(
+            [(floor_element.find(CPACS.floor_element_type).text, float(floor_element.find(CPACS.object_x).text),
+              float(floor_element.find(CPACS.object_y).text), float(floor_element.find(CPACS.object_length).text),
+              float(floor_element.find(CPACS.object_width).text), float(floor_element.find(CPACS.object_height).text),
+              get_rotation(floor_element))
+             for floor_element in floor_elements], dtype=FLOOR_ELEMENT_DTYPE)
+
+        # Aisle center lines as (n, 2) arrays of x and y
+        aisles: [XMLTree.Element] = deck.findall(CPACS.aisle_sub_path)
+        self.aisle_paths: [str] = [element_path(self.path, CPACS.aisle_sub_path, aisle, index)
+                                   for index, aisle in enumerate(aisles)]
+        self.aisles: [np.ndarray] = [
+            np.column_stack([[float(x) for x in CPACS.getStringArray(aisle, CPACS.object_x)],
+                             [float(y) for y in CPACS.getStringArray(aisle, CPACS.object_y)]]) for aisle in aisles]
+
+    def seats(self) -> np.ndarray:
+        """ Single seats of all seat groups in aircraft coordinates, see SEAT_DTYPE """
+
+        groups: np.ndarray = self.seat_groups
+        n_seats: np.ndarray = np.maximum(groups['n_seats'], 1)
+        group_index: np.ndarray = np.repeat(np.arange(len(groups)), n_seats)
+        seat_index: np.ndarray = np.arange(len(group_index)) - np.repeat(np.cumsum(n_seats) - n_seats, n_seats)
+        width_per_seat: np.ndarray = groups['width'][group_index] / n_seats[group_index]
+
+        seats: np.ndarray = np.zeros(len(group_index), dtype=SEAT_DTYPE)
+        seats['group'] = group_index
+        seats['seat'] = seat_index
+        seats['type'] = groups['type'][group_index]
+        seats['x'] = self.origin.x + groups['x'][group_index] + groups['length'][group_index] / 2.0
+        seats['y'] = groups['y'][group_index] - groups['width'][group_index] / 2.0 + (seat_index + 0.5) * width_per_seat
+        seats['z'] = self.origin.z
+        seats['length'] = groups['length'][group_index]
+        seats['width'] = width_per_seat
+        seats['height'] = groups['height'][group_index]
+        seats['rotation'] = groups['rotation'][group_index]
+
+        return seats
+
+
+def query_cabin(path: str) -> [DeckData]:
+    """
+    Decode all decks of a CPACS file for analysis without building any geometry
+    :param path:
+    :return:
+    """
+
+    cpacs: XMLTree.Element = ETree.parse(path).getroot()
+    return [DeckData(deck, deck_index) for deck_index, deck in enumerate(cpacs.findall(CPACS.deck_path))]
+
+
+def count_by_type(elements: np.ndarray) -> dict:
+    """ Number of seats, seat groups or floor elements by their type """
+
+    types, counts = np.unique(elements['type'], return_counts=True)
+    return dict(zip(types.tolist(), counts.tolist()))
+
+
+def seats_per_row(seats: np.ndarray, decimals: int = 3) -> dict:
+    """ Number of seats by longitudinal row position """
+
+    rows, counts = np.unique(np.round(seats['x'], decimals), return_counts=True)
+    return dict(zip(rows.tolist(), counts.tolist()))
+
+
+def seat_pitches(seats: np.ndarray, decimals: int = 3) -> dict:
+    """
+    Distances between consecutive rows of each seat class, separately for port and starboard seats
+    :param seats: see DeckData.seats()
+    :param decimals: rounding of the row positions
+    :return: array of pitches by seat class
+    """
+
+    pitches: dict = dict()
+
+    for seat_type in np.unique(seats['type']).tolist():
+        of_type: np.ndarray = seats[seats['type'] == seat_type]
+        pitches[seat_type] = np.concatenate(
+            [np.diff(np.unique(np.round(of_type['x'][side], decimals)))
+             for side in (of_type['y'] < 0, of_type['y'] >= 0)])
+
+    return pitches
+
+
+def floor_area_by_type(floor_elements: np.ndarray) -> dict:
+    """ Floor area covered by the floor elements of each type, e.g. the galley or lavatory area """
+
+    types, inverse = np.unique(floor_elements['type'], return_inverse=True)
+    areas: np.ndarray = np.bincount(inverse, weights=floor_elements['length'] * floor_elements['width'],
+                                    minlength=len(types))
+    return dict(zip(types.tolist(), areas.tolist()))
+
+
+def aisle_widths(deck_data: DeckData) -> [np.ndarray]:
+    """
+    Clear aisle width at every seat row along each aisle, between the closest seat groups on both sides
+    :param deck_data:
+    :return: (n, 2) array of row position and clear width for each aisle
+    """
+
+    groups: np.ndarray = deck_data.seat_groups
+    group_min_x: np.ndarray = groups['x']
+    group_max_x: np.ndarray = groups['x'] + groups['length']
+    group_min_y: np.ndarray = groups['y'] - groups['width'] / 2.0
+    group_max_y: np.ndarray = groups['y'] + groups['width'] / 2.0
+
+    widths: [np.ndarray] = []
+
+    for aisle in deck_data.aisles:
+        rows: np.ndarray = np.unique(group_min_x + groups['length'] / 2.0)
+        aisle_y: np.ndarray = np.interp(rows, aisle[:, 0], aisle[:, 1])
+
+        # Groups at each row (rows x groups)
+        at_row: np.ndarray = (group_min_x[None, :] <= rows[:, None]) & (rows[:, None] <= group_max_x[None, :])
+        left: np.ndarray = np.where(at_row & (group_max_y[None, :] <= aisle_y[:, None]), group_max_y[None, :], -np.inf)
+        right: np.ndarray = np.where(at_row & (group_min_y[None, :] >= aisle_y[:, None]), group_min_y[None, :], np.inf)
+
+        width: np.ndarray = right.min(axis=1) - left.max(axis=1)
+        bounded: np.ndarray = np.isfinite(width)
+        widths.append(np.column_stack([rows[bounded] + deck_data.origin.x, width[bounded]]))
+
+    return widths
+
+
+# ------------------------------------------------------------------------------
+# Fuselage Planning
+
+# Decoded and resampled fuselage profiles by point count for each profile element, shared by all sections of a
+# document. The entries are dropped with the parsed document.
+_fuselage_profiles: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def decode_fuselage_profile(profile: XMLTree.Element) -> np.ndarray:
+    """
+    Points of a fuselage profile as (n, 3) array. The last point closes the profile and is dropped.
+    :param profile:
+    :return:
+    """
+
+    return np.column_stack([[float(value) for value in CPACS.getStringArray(profile, literal)] for literal in (
+        CPACS.fuselage_profile_pointlist_x, CPACS.fuselage_profile_pointlist_y,
+        CPACS.fuselage_profile_pointlist_z)])[:-1]
+
+
+def resample_fuselage_profile(points: np.ndarray, n_points: int) -> np.ndarray:
+    """
+    Resample a closed profile to a number of points, equally spaced along its circumference
+    :param points: (n, 3) array
+    :param n_points:
+    :return: (n_points, 3) array starting at the first point of the profile
+    """
+
+    closed: np.ndarray = np.vstack([points, points[:1]])
+    distance: np.ndarray = np.concatenate([[0.0], np.cumsum(np.linalg.norm(np.diff(closed, axis=0), axis=1))])
+    samples: np.ndarray = np.linspace(0.0, distance[-1], n_points, endpoint=False)
+
+    return np.column_stack([np.interp(samples, distance, closed[:, axis]) for axis in range(3)])
+
+
+def fuselage_profile(profile: XMLTree.Element, n_points: int = None) -> np.ndarray:
+    """
+    Decoded fuselage profile, resampled to a number of points. Profiles are decoded and resampled only once, see
+    _fuselage_profiles.
+    :param profile:
+    :param n_points: None keeps the points of the profile
+    :return: (n_points, 3) array
+    """
+
+    profiles: dict = _fuselage_profiles.setdefault(profile, dict())
+
+    if n_points not in profiles:
+        points: np.ndarray = decode_fuselage_profile(profile) if None not in profiles else profiles[None]
+        profiles[n_points] = points if n_points is None else resample_fuselage_profile(points, n_points)
+
+    return profiles[n_points]
+
+
+def plan_fuselage(cpacs: XMLTree.Element) -> ([[Vector]], float, float):
+    """
+    Cross-sections of the outer fuselage loft. Each section uses the profile its element references by profileUID.
+    Profiles of different point counts are all resampled to the point count of the most detailed one, so the points
+    of all sections are spaced alike.
+    :param cpacs:
+    :return: shapes of all sections, fuselage length and height; no shapes if the model has no positionings
+    """
+
+    positionings: [XMLTree.Element] = cpacs.findall(CPACS.fuselage_positioning_path)
+    sections: [XMLTree.Element] = cpacs.findall(CPACS.fuselage_section_path)
+
+    if len(positionings) == 0:
+        return [], 0.0, 0.0
+
+    profiles_by_uid: dict = dict([(profile.get('uID'), profile)
+                                  for profile in cpacs.findall(CPACS.fuselage_profile_path)])
+    default_profile: XMLTree.Element = cpacs.find(CPACS.fuselage_profile_path)
+
+    section_profiles: [XMLTree.Element] = []
+    for section in sections:
+        profile_uid: str = section.findtext(CPACS.fuselage_element_profile_uid)
+        if profile_uid not in profiles_by_uid:
+            logging.warning("Fuselage profile " + str(profile_uid) + " of section " + str(section.get('uID')) +
+                            " not found. Using the first profile instead.")
+        section_profiles.append(profiles_by_uid.get(profile_uid, default_profile))
+
+    point_counts: set = set(len(CPACS.getStringArray(profile, CPACS.fuselage_profile_pointlist_x)) - 1
+                            for profile in section_profiles)
+    n_points: int = max(point_counts) if len(point_counts) > 1 else None
+
+    shapes: [[Vector]] = []
+    total_length: float = 0.0
+    height: float = 0.0
+
+    for section, profile, positioning in zip(sections, section_profiles, positionings):
+        scale: np.ndarray = np.array([1.0, float(section.find(CPACS.fuselage_element_scaling_y).text),
+                                      float(section.find(CPACS.fuselage_element_scaling_z).text)])
+        offset: np.ndarray = np.array([total_length, 0.0,
+                                       float(section.find(CPACS.fuselage_element_translation_z).text)])
+        points: np.ndarray = fuselage_profile(profile, n_points) * scale + offset
+
+        shapes.append([Vector(x, y, z) for x, y, z in points.tolist()])
+        height = max(height, float(points[:, 2].max()))
+        total_length += float(positioning.find(CPACS.fuselage_positioning_length).text)
+
+    return shapes, total_length, height
+
+
+# ------------------------------------------------------------------------------
+# OBJ Models
+
+# Rotation about x that turns the y-up axes of the .obj models z-up. The meshes keep the axes of the file, like the
+# .obj importer, which rotates the imported objects instead.
+OBJ_ROTATION_X: float = 90 * math.pi / 180.0
+
+
+class ObjModel:
+    """
+    Geometry of an .obj file in the y-up axes of the file, see OBJ_ROTATION_X. Faces are stored as a flat loop
+    array, all faces of an object, group or material of the file form a part with its own material slot.
+    """
+
+    def __init__(self, name: str, vertices: np.ndarray, loops: np.ndarray, loop_totals: np.ndarray,
+                 face_parts: np.ndarray, parts: [str], uvs: np.ndarray = None) -> None:
+        """
+        :param name: name of the first part
+        :param vertices: (n, 3) single precision coordinates
+        :param loops: vertex index of every face corner
+        :param loop_totals: number of corners of every face
+        :param face_parts: part index of every face
+        :param parts: part names in the order of their first face
+        :param uvs: (len(loops), 2) texture coordinates of every face corner, None if the file has none
+        """
+
+        self.name = name
+        self.vertices = vertices
+        self.loops = loops
+        self.loop_totals = loop_totals
+        self.face_parts = face_parts
+        self.parts = parts
+        self.uvs = uvs
+
+    def loop_starts(self) -> np.ndarray:
+        return np.cumsum(self.loop_totals) - self.loop_totals
+
+
+def obj_table(lines: [str], width: int) -> np.ndarray:
+    """
+    Values of .obj lines with the same keyword as an (n, width) array, further values such as vertex colors are
+    ignored
+    :param lines:
+    :param width:
+    :return:
+    """
+
+    tokens: [str] = ' '.join(lines).split()
+
+    # Fast path if every line has exactly the keyword and width values, a longer line shifts a value into the
+    # keyword column of the next row
+    if len(tokens) == len(lines) * (width + 1):
+        table: np.ndarray = np.array(tokens).reshape(-1, width + 1)
+        if (table[:, 0] == table[:1, 0]).all():
+            return table[:, 1:].astype(np.float64)
+
+    # Missing values such as the optional v of 'vt u' are zero
+    return np.array([(line.split()[1:] + ['0'] * width)[:width] for line in lines],
+                    dtype=np.float64).reshape(-1, width)
+
+
+def obj_indices(indices: np.ndarray, count: int, counts: np.ndarray) -> np.ndarray:
+    """
+    Zero based indices of .obj face corners, negative indices count back from the elements read before the face
+    :param indices: one based or negative indices
+    :param count: number of all elements of the file
+    :param counts: number of elements read before the face of every corner
+    :return:
+    """
+
+    indices = np.where(indices < 0, counts + indices, indices - 1)
+
+    if len(indices) > 0 and (indices.min() < 0 or indices.max() >= count):
+        raise ValueError("Face index out of range")
+
+    return indices
+
+
+def obj_corners(corners: [str]) -> np.ndarray:
+    """
+    Vertex and texture coordinate indices of .obj face corners 'v', 'v/vt', 'v//vn' or 'v/vt/vn'
+    :param corners:
+    :return: (n, 2) indices, 0 if a corner has no texture coordinate
+    """
+
+    fields: int = corners[0].count('/') + 1 if len(corners) > 0 else 1
+    values: [str] = ' '.join(corners).replace('//', '/0/').replace('/', ' ').split()
+
+    # Fast path if all corners have the same form
+    if len(values) == len(corners) * fields and (np.char.count(np.array(corners, dtype=str), '/') == fields - 1).all():
+        table: np.ndarray = np.array(values, dtype=np.int64).reshape(-1, fields)
+        return np.column_stack([table[:, 0], table[:, 1] if fields > 1 else np.zeros(len(table), dtype=np.int64)])
+
+    return np.array([[int(value or 0) for value in (corner.split('/') + ['0'])[:2]] for corner in corners],
+                    dtype=np.int64).reshape(-1, 2)
+
+
+def read_obj_file(path: str) -> ObjModel:
+    """
+    Read the vertices, texture coordinates and faces of an .obj file. Parts are started by 'o', 'g' and 'usemtl'
+    lines, a part is named after its object or group and after its material if the file has neither.
+    This does not require Blender, so it can run in a worker process.
+    :param path:
+    :return:
+    """
+
+    vertex_lines: [str] = []
+    uv_lines: [str] = []
+    face_lines: [str] = []
+    face_vertex_counts: [int] = []
+    face_uv_counts: [int] = []
+    face_parts: [int] = []
+    parts: [str] = []
+    part_index: dict = dict()
+    group: str = None
+    material: str = None
+
+    with open(path, 'r') as obj_file:
+        for line in obj_file:
+            if line.startswith('v '):
+                vertex_lines.append(line)
+            elif line.startswith('vt '):
+                uv_lines.append(line)
+            elif line.startswith('f '):
+                part: str = group if group is not None else material if material is not None else \
+                    os.path.splitext(os.path.basename(path))[0]
+                if part not in part_index:
+                    part_index[part] = len(parts)
+                    parts.append(part)
+
+                face_lines.append(line[2:])
+                face_vertex_counts.append(len(vertex_lines))
+                face_uv_counts.append(len(uv_lines))
+                face_parts.append(part_index[part])
+            elif line.startswith('o ') or line.startswith('g '):
+                group = line[2:].strip() or None
+            elif line.startswith('usemtl '):
+                material = line[7:].strip() or None
+
+    vertices: np.ndarray = obj_table(vertex_lines, 3)
+
+    loop_totals: np.ndarray = np.array([len(face.split()) for face in face_lines], dtype=np.int32)
+    corners: np.ndarray = obj_corners(' '.join(face_lines).split())
+    loops: np.ndarray = obj_indices(corners[:, 0], len(vertices),
+                                    np.repeat(np.array(face_vertex_counts, dtype=np.int64), loop_totals))
+
+    uvs: np.ndarray = None
+    if len(uv_lines) > 0 and len(corners) > 0 and corners[:, 1].all():
+        uv_table: np.ndarray = obj_table(uv_lines, 2)
+        uvs = uv_table[obj_indices(corners[:, 1], len(uv_table),
+                                   np.repeat(np.array(face_uv_counts, dtype=np.int64), loop_totals))]
+
+    return ObjModel(parts[0] if parts else os.path.splitext(os.path.basename(path))[0],
+                    vertices.astype(np.float32),
+                    loops.astype(np.int32), loop_totals, np.array(face_parts, dtype=np.int32), parts,
+                    uvs.astype(np.float32) if uvs is not None else None)
+
+
+def read_obj_files(paths: [str], workers: int = None) -> [ObjModel]:
+    """
+    Read several .obj files at once in worker processes
+    :param paths:
+    :param workers: number of worker processes, None for one per file and core, 1 to read serially
+    :return: models in the order of the paths, None for files that could not be read
+    """
+
+    models: [ObjModel] = [None] * len(paths)
+    pool: ProcessPoolExecutor = spawn_pool(workers, len(paths))
+
+    if pool is not None:
+        try:
+            with pool:
+                futures: list = [pool.submit(read_obj_file, path) for path in paths]
+
+                for index, future in enumerate(futures):
+                    try:
+                        models[index] = future.result()
+                    except (OSError, ValueError) as e:
+                        logging.warning("Could not read " + paths[index] + " (" + str(e) + ").")
+
+            return models
+
+        except Exception as e:
+            logging.warning("Parallel reading of .obj files failed (" + str(e) + "). Reading them serially.")
+
+    for index, path in enumerate(paths):
+        if models[index] is None:
+            try:
+                models[index] = read_obj_file(path)
+            except (OSError, ValueError) as e:
+                logging.warning("Could not read " + path + " (" + str(e) + ").")
+
+    return models
+
+
+# ------------------------------------------------------------------------------
+# Deck Planning
+
+# Name prefix of the template objects in the TEMPLATE_LIBRARY
+TEMPLATE_OBJECT_PREFIX: str = 'cpacs_template_'
+
+# Templates whose dimensions are required to plan a deck, they are loaded at the start of every import. All other
+# templates are loaded on their first use.
+PLANNING_TEMPLATES: [str] = ['bin', 'arch']
+
+# Dimensions of the planning templates if their .obj models are not available outside of Blender
+PLANNING_TEMPLATE_DIMENSIONS_DEFAULT: dict = dict([('bin', (1.0, 0.4, 0.5)), ('arch', (1.0, 0.3, 1.0))])
+
+# Cabin lighting, see also LIGHT_BUDGET_DEFAULT
+LIGHT_STRIP_MAX_LENGTH: float = 8.0
+LIGHT_STRIP_WIDTH: float = 0.1
+LIGHT_STRIP_POWER_CEILING: float = 60.0
+LIGHT_STRIP_POWER_BIN: float = 30.0
+LIGHT_POWER_MONUMENT: float = 150.0
+LIGHT_COLOR: Vector = Vector(1.0, 0.95, 0.85)
+
+# Lining panels: the nominal panel length, the shortest segment at a change of the lining template and the largest
+# deviation of a panel from the contour, in meters. A segment has a constant width if the contour changes its half
+# widths by at most the slope tolerance per meter. The straight lining is used if the half widths at floor and bin
+# level differ less than the threshold.
+LINING_PANEL_LENGTH: float = 1.0
+LINING_MIN_SEGMENT: float = 0.1
+LINING_TOLERANCE: float = 0.01
+LINING_SLOPE_TOLERANCE: float = 0.001
+LINING_STRAIGHT_THRESHOLD: float = 0.10
+
+# Collections of the cabin shell, the only placements that are mirrored by a symmetric build, see symmetric_half()
+SYMMETRIC_COLLECTIONS: [str] = ['lining', 'ceiling']
+
+# Floor elements that are lit by a point lamp if they are not below an aisle light strip
+LIT_MONUMENTS: [str] = ['galley', 'bar', 'stairs', 'table']
+
+# Cameras, a seat row camera keeps the clearance from the deck front and from floor elements in front of the row
+CAMERA_KINDS: [str] = ['aisle', 'cross_section', 'seat_row', 'exterior']
+CAMERA_EYE_HEIGHT: float = 1.6
+CAMERA_SEAT_ROW_DISTANCE: float = 1.2
+CAMERA_CLEARANCE: float = 0.1
+CAMERA_LENS_AISLE: float = 18.0
+CAMERA_LENS_SEAT_ROW: float = 24.0
+CAMERA_LENS_EXTERIOR: float = 35.0
+
+
+class Placement:
+    """
+    Copy of a template object with its final transformation, computed without Blender
+    """
+
+    __slots__ = ('template', 'collection', 'position', 'size_x', 'size_y', 'size_z', 'rotation_z', 'mirror_y',
+                 'rotate_first', 'source', 'mirror_half', 'repeat_x')
+
+    def __init__(self, template: str, collection: str, position: Vector, size_x: float = None,
+                 size_y: float = None, size_z: float = None, rotation_z: float = None, mirror_y: bool = False,
+                 rotate_first: bool = False, source: str = None, repeat_x: int = 1) -> None:
+        self.template = template
+        self.collection = collection
+        self.position = position
+        self.size_x = size_x
+        self.size_y = size_y
+        self.size_z = size_z
+        self.rotation_z = rotation_z
+        self.mirror_y = mirror_y
+        self.rotate_first = rotate_first
+
+        # Path of the CPACS element this placement was created from
+        self.source = source
+
+        # The object is mirrored at the center plane of the aircraft, see symmetric_half()
+        self.mirror_half = False
+
+        # Number of copies along the local x axis, the position and size are those of the first copy
+        self.repeat_x = repeat_x
+
+
+class ShapePlacement:
+    """
+    Mesh connecting multiple vector shapes, see connect_shapes()
+    """
+
+    __slots__ = ('name', 'collection', 'shapes', 'material', 'mirror_y', 'mirror_half')
+
+    def __init__(self, name: str, collection: str, shapes: [[Vector]], material: str = None,
+                 mirror_y: bool = False) -> None:
+        self.name = name
+        self.collection = collection
+        self.shapes = shapes
+        self.material = material
+        self.mirror_y = mirror_y
+        self.mirror_half = False
+
+
+class LightPlacement:
+    """
+    Area light strip or point lamp. Strips of the same row can be merged into a single light.
+    """
+
+    __slots__ = ('name', 'light_type', 'position', 'size', 'strength', 'row')
+
+    def __init__(self, name: str, light_type: str, position: Vector, strength: float, size: Vector = None,
+                 row: tuple = None) -> None:
+        self.name = name
+        self.light_type = light_type
+        self.position = position
+        self.strength = strength
+        self.size = size
+        self.row = row
+
+    def start_x(self) -> float:
+        return self.position.x - self.size.x / 2.0 if self.size is not None else self.position.x
+
+    def end_x(self) -> float:
+        return self.position.x + self.size.x / 2.0 if self.size is not None else self.position.x
+
+
+class CameraPlacement:
+    """
+    Camera looking from a position at a target, orthographic if an orthographic scale is given. Interior cameras
+    know the box of their deck, nothing outside of it is visible through the cabin walls.
+    """
+
+    __slots__ = ('name', 'kind', 'position', 'target', 'lens', 'ortho_scale', 'cabin')
+
+    def __init__(self, name: str, kind: str, position: Vector, target: Vector, lens: float = 50.0,
+                 ortho_scale: float = None, cabin: (Vector, Vector) = None) -> None:
+        self.name = name
+        self.kind = kind
+        self.position = position
+        self.target = target
+        self.lens = lens
+        self.ortho_scale = ortho_scale
+        self.cabin = cabin
+
+    def rotation(self) -> Vector:
+        """ Euler rotation in radians of a Blender camera, which looks along its local -z axis """
+
+        delta: Vector = Vector(self.target.x - self.position.x, self.target.y - self.position.y,
+                               self.target.z - self.position.z)
+        heading: float = math.atan2(delta.y, delta.x)
+        elevation: float = math.atan2(delta.z, math.hypot(delta.x, delta.y))
+
+        return Vector(math.radians(90) + elevation, 0.0, heading - math.radians(90))
+
+
+class DeckPlan:
+    """
+    All objects of one cabin deck in the order they are created in Blender
+    """
+
+    def __init__(self, name: str, path: str = None) -> None:
+        self.name = name
+        self.path = path
+        self.shapes: [ShapePlacement] = []
+        self.placements: [Placement] = []
+        self.lights: [LightPlacement] = []
+        self.cameras: [CameraPlacement] = []
+
+        # Cabin origin and size
+        self.origin: Vector = Vector()
+        self.size: Vector = Vector()
+
+
+def plan_deck(deck_xml: bytes, template_dimensions: dict, deck_index: int = 0) -> DeckPlan:
+    """
+    Compute all floor, ceiling, lining, floor element, overhead bin and seat placements of a deck.
+    This does not require Blender, so it can run in a worker process.
+    :param deck_xml: serialized CPACS deck node
+    :param template_dimensions: dimensions of the PLANNING_TEMPLATES
+    :param deck_index: position of the deck in the document
+    :return:
+    """
+
+    deck: XMLTree.Element = ETree.fromstring(deck_xml)
+    deck_data: DeckData = DeckData(deck, deck_index)
+    deck_plan: DeckPlan = DeckPlan(deck_data.name, deck_data.path)
+
+    # --------------------
+    # Hard coded values
+    floor_thickness: float = 0.05
+    ceiling_thickness: float = 0.01
+
+    overhead_bin_height: float = float(
+        CPACS.getCustomOrElse(deck, CPACS.custom_overhead_bin_height, CPACS.custom_overhead_bin_height_default))
+    luggage_bins_aisle_indent: float = float(
+        CPACS.getCustomOrElse(deck, CPACS.custom_overhead_bin_indent, CPACS.custom_overhead_bin_indent_default))
+
+    # Deck floor
+    contour: CabinContour = deck_data.contour
+    geo_x: [float] = contour.x.tolist()
+    floor_y: [float] = contour.half_widths[0].tolist()
+    ceiling_y: [float] = contour.half_widths[-1].tolist()
+
+    # Height of the overhead bins, the contour level below the ceiling
+    bin_z: float = float(contour.z[-2]) if len(contour.z) > 1 else contour.height
+
+    # z0 of cabin
+    z_0: float = deck_data.origin.z
+    x_0: float = deck_data.origin.x
+
+    floor_shape: [Vector] = [Vector(x_0 + x, y, z_0) for x, y in zip(geo_x, floor_y)]
+    floor_shape_2: [Vector] = [Vector(x_0 + x, y, z_0 - floor_thickness) for x, y in zip(geo_x, floor_y)]
+    ceiling_shape_2: [Vector] = [Vector(x_0 + x, y, z_0 + contour.height + ceiling_thickness)
+                                 for x, y in zip(geo_x, ceiling_y)]
+    ceiling_shape: [Vector] = [Vector(x_0 + x, y, z_0 + contour.height) for x, y in zip(geo_x, ceiling_y)]
+
+    deck_size: Vector = Vector(contour.length, max(floor_y) * 2.0, contour.height)
+    deck_plan.origin = Vector(x_0, 0, z_0)
+    deck_plan.size = deck_size
+    floor_shape.insert(0, Vector(x_0, 0, z_0))
+    floor_shape_2.insert(0, Vector(x_0, 0, z_0 - floor_thickness))
+
+    ceiling_shape_2.insert(0, Vector(x_0, 0, z_0 + contour.height + ceiling_thickness))
+    ceiling_shape.insert(0, Vector(x_0, 0, z_0 + contour.height))
+
+    floor_shape.append(Vector(x_0 + deck_size.x, 0, z_0))
+    floor_shape_2.append(Vector(x_0 + deck_size.x, 0, z_0 - floor_thickness))
+    ceiling_shape_2.append(Vector(x_0 + deck_size.x, 0, z_0 + contour.height + ceiling_thickness))
+    ceiling_shape.append(Vector(x_0 + deck_size.x, 0, z_0 + contour.height))
+
+    # Deck floor and ceiling
+    deck_plan.shapes.append(ShapePlacement('Deck Floor R', 'floor', [floor_shape, floor_shape_2], 'Fabric_black'))
+    deck_plan.shapes.append(ShapePlacement('Deck Floor L', 'floor', [floor_shape, floor_shape_2], 'Fabric_black',
+                                           mirror_y=True))
+    deck_plan.shapes.append(ShapePlacement('Deck Ceiling R', 'floor', [ceiling_shape_2, ceiling_shape]))
+    deck_plan.shapes.append(ShapePlacement('Deck Ceiling L', 'floor', [ceiling_shape_2, ceiling_shape],
+                                           mirror_y=True))
+
+    # Linings follow the contour in segments, constant runs are one panel repeated along x
+    panels: [tuple] = []
+    for segment_start, segment_end, n_panels, constant in plan_lining_segments(contour, bin_z, deck_size.x):
+        if constant:
+            panels.append((segment_start, segment_end, n_panels))
+        else:
+            panel_length: float = (segment_end - segment_start) / n_panels
+            panels += [(segment_start + i * panel_length, segment_start + (i + 1) * panel_length, 1)
+                       for i in range(n_panels)]
+
+    # Contour at both ends of every lining, at floor and bin level
+    lining_ends: np.ndarray = np.array([[start, end] for start, end, _ in panels], dtype=float).ravel()
+    lining_y_floor: [float] = contour.half_width(lining_ends).tolist()
+    lining_y_top: [float] = contour.half_width(lining_ends, bin_z).tolist()
+
+    for index, (closest_right, closest_left, repeat_x) in enumerate(panels):
+        closest_y_left: float = lining_y_floor[2 * index + 1]
+        closest_y_right: float = lining_y_floor[2 * index]
+
+        corresponding_y_left_top: float = lining_y_top[2 * index + 1]
+        corresponding_y_right_top: float = lining_y_top[2 * index]
+
+        y_middle: float = (closest_y_left + closest_y_right) / 2.0
+        deck_width_ceiling: float = (corresponding_y_left_top + corresponding_y_right_top) / 2.0
+
+        # A repeated panel starts at the start of its segment
+        panel_length: float = (closest_left - closest_right) / repeat_x
+        panel_x: float = x_0 + closest_right + panel_length / 2.0
+        selected_lining: str = str(lining_kind(y_middle, deck_width_ceiling))
+
+        if selected_lining == 'lining_3':
+            lining_pos_port: Vector = Vector(panel_x, -min(deck_width_ceiling, y_middle), z_0)
+            lining_pos_star: Vector = Vector(panel_x, min(deck_width_ceiling, y_middle), z_0)
+            lining_width: float = (y_middle - deck_width_ceiling)
+
+        elif selected_lining == 'lining_2':
+            lining_pos_port: Vector = Vector(panel_x, -y_middle, z_0)
+            lining_pos_star: Vector = Vector(panel_x, y_middle, z_0)
+            lining_width: float = y_middle - deck_width_ceiling
+
+        else:
+            lining_pos_port: Vector = Vector(panel_x, -deck_width_ceiling, z_0)
+            lining_pos_star: Vector = Vector(panel_x, deck_width_ceiling, z_0)
+            lining_width: float = y_middle - deck_width_ceiling
+
+        lining_port: Placement = Placement(selected_lining, 'lining', lining_pos_port, size_x=panel_length,
+                                           size_y=deck_size.z - overhead_bin_height, size_z=lining_width,
+                                           repeat_x=repeat_x)
+        lining_star: Placement = Placement(selected_lining, 'lining', lining_pos_star, size_x=panel_length,
+                                           size_y=deck_size.z - overhead_bin_height, size_z=lining_width,
+                                           mirror_y=True, repeat_x=repeat_x)
+
+        if closest_y_left != closest_y_right:
+            angle: float = math.atan((closest_y_right - closest_y_left) / (closest_right - closest_left))
+
+            # Determine size of rotated lining
+            new_x_dimension: float = math.hypot(closest_left - closest_right, closest_y_left - closest_y_right) / repeat_x
+            delta_x_position: float = (y_middle - deck_width_ceiling) / math.tan(math.radians(90) - angle)
+
+            # Set properties of port element
+            lining_port.rotation_z = - angle
+            lining_port.position.x = delta_x_position + lining_port.position.x
+            lining_port.size_x = new_x_dimension
+
+            # Set properties of starboard element
+            lining_star.rotation_z = angle
+            lining_star.position.x = delta_x_position + lining_star.position.x
+            lining_star.size_x = new_x_dimension
+
+        deck_plan.placements.append(lining_port)
+        deck_plan.placements.append(lining_star)
+
+    monuments: [Vector] = []
+    registry: AssetRegistry = asset_registry()
+
+    # Create floor elements
+    for floor_element, floor_path in zip(deck_data.floor_elements.tolist(), deck_data.floor_element_paths):
+        floor_type, floor_x, floor_y, x_dim, y_dim, z_dim, floor_rotation = floor_element
+
+        floor_obj: str = registry.select('floor', type=floor_type)
+
+        floor_location: Vector = Vector(x_0 + floor_x + x_dim / 2.0, floor_y, z_0)
+
+        if floor_obj in LIT_MONUMENTS:
+            monuments.append(floor_location)
+
+        deck_plan.placements.append(Placement(floor_obj, 'floor', floor_location, size_x=x_dim, size_y=z_dim,
+                                              size_z=y_dim, rotation_z=floor_rotation, source=floor_path))
+
+    # Create cabin front and end
+    floor_location: Vector = Vector(x_0 - 0.05, 0, z_0)
+    deck_plan.placements.append(Placement('divider', 'floor', floor_location, size_x=0.1,
+                                          size_z=contour.half_width(geo_x[0]) * 2.0, size_y=deck_size.z))
+
+    floor_location: Vector = Vector(x_0 + deck_size.x + 0.05, 0, z_0)
+    deck_plan.placements.append(Placement('divider', 'floor', floor_location, size_x=0.1,
+                                          size_z=contour.half_width(geo_x[-1]) * 2.0, size_y=deck_size.z))
+
+    bin_width: float = template_dimensions['bin'][2]
+    arch_height: float = template_dimensions['arch'][1]
+
+    aisles = deck.findall(CPACS.aisle_sub_path)
+    aisle_segments: [tuple] = []
+
+    for aisle_index, aisle in enumerate(aisles):
+        aisle_x: [float] = [float(x) for x in CPACS.getStringArray(aisle, CPACS.object_x)]
+        aisle_y: [float] = [float(y) for y in CPACS.getStringArray(aisle, CPACS.object_y)]
+
+        for i in range(len(aisle_x) - 1):
+            aisle_y_pos_start: float = aisle_y[i]
+            aisle_y_pos_end: float = aisle_y[i + 1]
+
+            # Lights within aisle step
+            aisle_x_pos_start: float = aisle_x[i]
+            aisle_x_pos_end: float = aisle_x[i + 1]
+
+            general_x_pos: float = aisle_x_pos_start + (aisle_x_pos_end - aisle_x_pos_start) / 2.0
+            general_y_pos: float = aisle_y_pos_start + (aisle_y_pos_end - aisle_y_pos_start) / 2.0
+
+            aisle_segments.append((aisle_index, x_0 + aisle_x_pos_start, x_0 + aisle_x_pos_end, general_y_pos))
+
+            # Generate bins
+            luggage_bin_position: Vector = Vector(x_0 + general_x_pos,
+                                                  general_y_pos - luggage_bins_aisle_indent - bin_width / 2.0,
+                                                  z_0 + deck_size.z - overhead_bin_height / 2.0)
+
+            deck_plan.placements.append(Placement('bin', 'ceiling', luggage_bin_position,
+                                                  size_x=aisle_x_pos_end - aisle_x_pos_start,
+                                                  size_y=overhead_bin_height))
+
+            # Determine gap to closest lining, at the widest contour along the bins
+            bin_half_width: float = contour.half_width_range(aisle_x_pos_start, aisle_x_pos_end, bin_z)[1]
+            gap_y_starboard: float = bin_half_width - general_y_pos - luggage_bins_aisle_indent - bin_width
+            gap_y_port: float = bin_half_width + general_y_pos - luggage_bins_aisle_indent - bin_width
+
+            if gap_y_starboard > 0 and gap_y_starboard < bin_width:
+                luggage_filler_position: Vector = Vector(x_0 + general_x_pos,
+                                                         general_y_pos + luggage_bins_aisle_indent + bin_width + gap_y_starboard / 2.0,
+                                                         z_0 + deck_size.z - overhead_bin_height / 2.0)
+
+                deck_plan.placements.append(Placement('bin_extension', 'ceiling', luggage_filler_position,
+                                                      size_x=aisle_x_pos_end - aisle_x_pos_start,
+                                                      size_y=overhead_bin_height,
+                                                      size_z=gap_y_starboard))
+
+            # Generate bins
+            luggage_bin_position_right: Vector = Vector(x_0 + general_x_pos,
+                                                        general_y_pos + luggage_bins_aisle_indent + bin_width / 2.0,
+                                                        z_0 + deck_size.z - overhead_bin_height / 2.0)
+
+            deck_plan.placements.append(Placement('bin', 'ceiling', luggage_bin_position_right,
+                                                  size_x=aisle_x_pos_end - aisle_x_pos_start,
+                                                  size_y=overhead_bin_height, mirror_y=True))
+
+            if 0 < gap_y_port < bin_width:
+                luggage_filler_position: Vector = Vector(x_0 + general_x_pos,
+                                                         general_y_pos - luggage_bins_aisle_indent - bin_width - gap_y_port / 2.0,
+                                                         z_0 + deck_size.z - overhead_bin_height / 2.0)
+
+                deck_plan.placements.append(Placement('bin_extension', 'ceiling', luggage_filler_position,
+                                                      size_x=aisle_x_pos_end - aisle_x_pos_start,
+                                                      size_y=overhead_bin_height, size_z=gap_y_port, mirror_y=True))
+
+            # Generate bin arch
+            ceiling_arch_pos: Vector = Vector(x_0 + general_x_pos, general_y_pos,
+                                              z_0 + deck_size.z - arch_height * 0.1)
+
+            deck_plan.placements.append(Placement('arch', 'ceiling', ceiling_arch_pos,
+                                                  size_x=aisle_x_pos_end - aisle_x_pos_start,
+                                                  size_z=2 * luggage_bins_aisle_indent + bin_width))
+
+    plan_cameras(deck_plan, aisle_segments, deck_data.seat_groups, x_0, z_0, deck_size, deck_data.floor_elements)
+
+    plan_lights(deck_plan, aisle_segments, monuments, ceiling_z=z_0 + deck_size.z - arch_height * 0.1 - 0.05,
+                bin_z=z_0 + deck_size.z - overhead_bin_height, bin_y_offset=luggage_bins_aisle_indent)
+
+    # loop through seat groups
+    for seat_group, seat_path in zip(deck_data.seat_groups.tolist(), deck_data.seat_group_paths):
+        seat_type, number_of_seats, x, seat_y, x_dim, y_dim_total, z_dim, seat_rotation = seat_group
+
+        y_total: float = seat_y - y_dim_total / 2.0
+
+        # economy seats are created in groups
+        if seat_type == CPACS.seat_element_type_economy:
+            eco_seat: str = registry.select('seat', type=seat_type, seats=number_of_seats)
+
+            seat_position: Vector = Vector(x_0 + x + x_dim / 2.0, y_total + y_dim_total / 2.0, z_0)
+            deck_plan.placements.append(Placement(eco_seat, 'seats', seat_position, size_x=x_dim, size_y=z_dim,
+                                                  size_z=y_dim_total, rotation_z=seat_rotation,
+                                                  mirror_y=y_total < 0 and number_of_seats == 2, source=seat_path))
+
+        else:
+            # loop through all other seats
+            for seatID in range(number_of_seats):
+                y_dim_per_seat: float = y_dim_total / number_of_seats
+                y_pos_per_seat: float = y_total + seatID * y_dim_per_seat
+
+                seat_position_busi: Vector = Vector(x_0 + x + x_dim / 2.0, y_pos_per_seat + y_dim_per_seat / 2.0,
+                                                    z_0)
+                single_seat_obj: str = registry.select('seat', type=seat_type, seats=number_of_seats)
+
+                deck_plan.placements.append(Placement(single_seat_obj, 'seats', seat_position_busi, size_x=x_dim,
+                                                      size_y=z_dim, size_z=y_dim_per_seat,
+                                                      rotation_z=seat_rotation,
+                                                      mirror_y=seatID % 2 == 1, rotate_first=True,
+                                                      source=seat_path))
+
+    return deck_plan
+
+
+def lining_kind(floor_y, top_y):
+    """
+    Lining template for the half widths of the contour at floor and bin level
+    :param floor_y: half width or array of half widths at floor level
+    :param top_y: half widths at bin level
+    :return: template name or array of template names
+    """
+
+    return np.where(np.abs(np.asarray(top_y) - floor_y) < LINING_STRAIGHT_THRESHOLD, 'lining_3',
+                    np.where(np.asarray(top_y) > floor_y, 'lining_2', 'lining_1'))
+
+
+def plan_lining_segments(contour: CabinContour, bin_z: float, length: float) -> [tuple]:
+    """
+    Split the deck into segments along which the contour at floor and bin level is a straight line within the
+    LINING_TOLERANCE and the lining template does not change. Segments end at the contour stations where the slope
+    changes, a segment is constant if the contour does not change its width along it. The segments cover the whole
+    deck length.
+    :param contour:
+    :param bin_z: height of the bins above the floor
+    :param length: deck length
+    :return: (start x, end x, number of panels, constant width) of each segment, relative to the deck origin
+    """
+
+    # The contour is linear between its stations, so the half widths only bend at the stations and their difference,
+    # which selects the lining template, crosses the LINING_STRAIGHT_THRESHOLD at most once per threshold in between
+    stations: np.ndarray = np.unique(np.concatenate([[0.0, length],
+                                                     contour.x[(contour.x > 0.0) & (contour.x < length)]]))
+    differences: np.ndarray = contour.half_width(stations, bin_z) - contour.half_width(stations)
+
+    ends: [float] = [float(stations[0])]
+    for index in range(len(stations) - 1):
+        start, end = float(stations[index]), float(stations[index + 1])
+        difference_start, difference_end = float(differences[index]), float(differences[index + 1])
+
+        # Template changes closer than LINING_MIN_SEGMENT to another segment end would only leave slivers
+        for level in sorted((-LINING_STRAIGHT_THRESHOLD, LINING_STRAIGHT_THRESHOLD),
+                            reverse=difference_end < difference_start):
+            if (difference_start - level) * (difference_end - level) < 0.0:
+                x: float = start + (end - start) * (level - difference_start) / (difference_end - difference_start)
+                if x - ends[-1] >= LINING_MIN_SEGMENT and end - x >= LINING_MIN_SEGMENT:
+                    ends.append(x)
+        ends.append(end)
+
+    x_ends: np.ndarray = np.array(ends)
+    floor_y: np.ndarray = contour.half_width(x_ends)
+    top_y: np.ndarray = contour.half_width(x_ends, bin_z)
+    middles: np.ndarray = (x_ends[:-1] + x_ends[1:]) / 2.0
+    kinds: np.ndarray = lining_kind(contour.half_width(middles), contour.half_width(middles, bin_z))
+    flat: np.ndarray = np.all([np.abs(np.diff(values)) / np.diff(x_ends) <= LINING_SLOPE_TOLERANCE
+                               for values in (floor_y, top_y)], axis=0)
+
+    def extends(start: int, end: int) -> bool:
+        """ True if the pieces from the end at index start to the end at index end form one segment """
+        if np.any(kinds[start:end] != kinds[start]) or np.any(flat[start:end] != flat[start]):
+            return False
+        weight: np.ndarray = (x_ends[start:end + 1] - x_ends[start]) / (x_ends[end] - x_ends[start])
+        return all(np.abs(values[start:end + 1] - values[start] - weight * (values[end] - values[start])).max() <=
+                   LINING_TOLERANCE and (not flat[start] or abs(values[end] - values[start]) <= LINING_TOLERANCE)
+                   for values in (floor_y, top_y))
+
+    segments: [tuple] = []
+    start: int = 0
+    while start < len(x_ends) - 1:
+        end: int = start + 1
+        while end + 1 < len(x_ends) and extends(start, end + 1):
+            end += 1
+
+        segment_length: float = float(x_ends[end] - x_ends[start])
+        segments.append((float(x_ends[start]), float(x_ends[end]),
+                         max(int(round(segment_length / LINING_PANEL_LENGTH)), 1), bool(flat[start])))
+        start = end
+
+    return segments
+
+
+def plan_cameras(deck_plan: DeckPlan, aisle_segments: [tuple], seat_groups: np.ndarray, x_0: float,
+                 z_0: float, deck_size: Vector, floor_elements: np.ndarray = None) -> None:
+    """
+    Place a walk-through camera at the front of each aisle, an orthographic cross-section camera in the middle of the
+    deck and a close-up camera in front of the first seat row of each seat class. A seat row camera stays behind the
+    deck front and behind the floor elements in front of the row.
+    :param deck_plan:
+    :param aisle_segments: (aisle index, start x, end x, y) of each aisle segment
+    :param seat_groups: see SEAT_GROUP_DTYPE
+    :param x_0:
+    :param z_0:
+    :param deck_size:
+    :param floor_elements: see FLOOR_ELEMENT_DTYPE
+    :return:
+    """
+
+    eye_z: float = z_0 + CAMERA_EYE_HEIGHT
+    cabin: (Vector, Vector) = (Vector(x_0, -deck_size.y / 2.0, z_0), Vector(x_0 + deck_size.x, deck_size.y / 2.0,
+                                                                          z_0 + deck_size.z))
+
+    first_segments: dict = dict()
+    for aisle_index, start_x, end_x, y in aisle_segments:
+        first_segments.setdefault(aisle_index, (start_x, end_x, y))
+
+    for aisle_index, (start_x, end_x, y) in sorted(first_segments.items()):
+        deck_plan.cameras.append(
+            CameraPlacement(deck_plan.name + ' Aisle ' + str(aisle_index + 1), 'aisle', Vector(start_x, y, eye_z),
+                            Vector(start_x + deck_size.x, y, z_0 + deck_size.z / 2.0), lens=CAMERA_LENS_AISLE,
+                            cabin=cabin))
+
+    # Everything behind the camera is clipped, so the view shows the cabin cross section
+    middle_x: float = x_0 + deck_size.x / 2.0
+    deck_plan.cameras.append(
+        CameraPlacement(deck_plan.name + ' Cross Section', 'cross_section',
+                        Vector(middle_x, 0, z_0 + deck_size.z / 2.0),
+                        Vector(middle_x + 1.0, 0, z_0 + deck_size.z / 2.0),
+                        ortho_scale=max(deck_size.y, deck_size.z) * 1.1, cabin=cabin))
+
+    # Seats face forward, so the seat row cameras are placed in front of the rows
+    first_rows: dict = dict()
+    for seat_type, _, seat_x, seat_y, seat_length, _, _, _ in seat_groups.tolist():
+        if seat_type not in first_rows or x_0 + seat_x < first_rows[seat_type][0]:
+            first_rows[seat_type] = (x_0 + seat_x, seat_y, seat_length)
+
+    for seat_type, (seat_x, seat_y, seat_length) in sorted(first_rows.items()):
+        aisle_y: float = min([segment[3] for segment in aisle_segments], key=lambda y: abs(y - seat_y)) \
+            if len(aisle_segments) > 0 else 0.0
+
+        # Rear end of the deck front or of the closest floor element in front of the row that blocks the aisle
+        front_x: float = max([x_0 + x + length for _, x, y, length, width, _, _ in
+                              (floor_elements.tolist() if floor_elements is not None else [])
+                              if x_0 + x + length <= seat_x and abs(y - aisle_y) <= width / 2.0], default=x_0)
+        camera_x: float = min(max(seat_x - CAMERA_SEAT_ROW_DISTANCE, front_x + CAMERA_CLEARANCE), seat_x)
+
+        deck_plan.cameras.append(
+            CameraPlacement(deck_plan.name + ' Seats ' + seat_type,
+                            'seat_row', Vector(camera_x, aisle_y, z_0 + 1.3),
+                            Vector(seat_x + seat_length / 2.0, seat_y, z_0 + 0.6), lens=CAMERA_LENS_SEAT_ROW,
+                            cabin=cabin))
+
+
+def plan_exterior_camera(fuselage_length: float, fuselage_height: float) -> CameraPlacement:
+    """
+    Camera in front of the port side of the fuselage, looking at its center
+    :param fuselage_length:
+    :param fuselage_height:
+    :return:
+    """
+
+    center: Vector = Vector(fuselage_length / 2.0, 0.0, 0.0)
+
+    return CameraPlacement('Exterior', 'exterior',
+                           Vector(center.x - fuselage_length * 0.3, -fuselage_length * 1.1,
+                                  fuselage_height + fuselage_length * 0.15),
+                           center, lens=CAMERA_LENS_EXTERIOR)
+
+
+def plan_lights(deck_plan: DeckPlan, aisle_segments: [tuple], monuments: [Vector], ceiling_z: float, bin_z: float,
+                bin_y_offset: float) -> None:
+    """
+    Place continuous light strips along the aisles, below the aisle arch and the aisle side of the overhead bins.
+    Aisle segments of equal lateral position are combined to runs, each run gets one strip per row that is only split
+    into parts of at most LIGHT_STRIP_MAX_LENGTH. Monuments that are not below a strip get a point lamp.
+    :param deck_plan:
+    :param aisle_segments: (aisle index, start x, end x, y) of each aisle segment
+    :param monuments: floor positions of the LIT_MONUMENTS
+    :param ceiling_z: height of the ceiling strips
+    :param bin_z: height of the lower edge of the overhead bins
+    :param bin_y_offset: lateral distance of the bins to the aisle center
+    :return:
+    """
+
+    # Combine continuous aisle segments to runs
+    runs: [list] = []
+    for aisle_index, start_x, end_x, y in aisle_segments:
+        if len(runs) > 0 and runs[-1][0] == aisle_index and abs(runs[-1][2] - start_x) < 0.01 and \
+                abs(runs[-1][3] - y) < 0.01:
+            runs[-1][2] = end_x
+        else:
+            runs.append([aisle_index, start_x, end_x, y])
+
+    for run_index, (aisle_index, start_x, end_x, y) in enumerate(runs):
+        run_length: float = end_x - start_x
+        if run_length <= 0:
+            continue
+
+        parts: int = int(math.ceil(run_length / LIGHT_STRIP_MAX_LENGTH))
+        part_length: float = run_length / parts
+
+        for part in range(parts):
+            center_x: float = start_x + (part + 0.5) * part_length
+
+            for row, name, position, power in [
+                ('ceiling', 'Ceiling Light', Vector(center_x, y, ceiling_z), LIGHT_STRIP_POWER_CEILING),
+                ('bin_port', 'Bin Light L', Vector(center_x, y - bin_y_offset, bin_z), LIGHT_STRIP_POWER_BIN),
+                ('bin_star', 'Bin Light R', Vector(center_x, y + bin_y_offset, bin_z), LIGHT_STRIP_POWER_BIN)]:
+                deck_plan.lights.append(
+                    LightPlacement(name, 'AREA', position, power * part_length, Vector(part_length, LIGHT_STRIP_WIDTH),
+                                   row=(run_index, row)))
+
+    for monument in monuments:
+        if not any(start_x <= monument.x <= end_x for _, start_x, end_x, _ in runs):
+            deck_plan.lights.append(LightPlacement('Monument Light', 'POINT', Vector(monument.x, monument.y, bin_z),
+                                                   LIGHT_POWER_MONUMENT))
+
+
+def apply_light_budget(deck_plans: [DeckPlan], light_budget: int = None) -> None:
+    """
+    Reduce the number of lights of all decks to the light budget while keeping the emitted power. In this order,
+    neighbouring strips of a row are merged (shortest first), bin strips are folded into the ceiling strip of their
+    run, point lamps are dropped and finally only the strongest lights are kept.
+    :param deck_plans:
+    :param light_budget: maximum number of lights, None for no limit
+    :return:
+    """
+
+    def light_count() -> int:
+        return sum(len(deck_plan.lights) for deck_plan in deck_plans)
+
+    if light_budget is None or light_count() <= light_budget:
+        return
+
+    if light_budget == 0:
+        for deck_plan in deck_plans:
+            deck_plan.lights = []
+        return
+
+    # Merge neighbouring strips of the same row
+    while light_count() > light_budget:
+        best: tuple = None
+
+        for deck_plan in deck_plans:
+            strips: [LightPlacement] = sorted([light for light in deck_plan.lights if light.row is not None],
+                                              key=lambda light: (light.row, light.position.x))
+
+            for first, second in zip(strips, strips[1:]):
+                if first.row == second.row and (best is None or second.end_x() - first.start_x() < best[0]):
+                    best = (second.end_x() - first.start_x(), deck_plan, first, second)
+
+        if best is None:
+            break
+
+        length, deck_plan, first, second = best
+        first.position.x = first.start_x() + length / 2.0
+        first.size.x = length
+        first.strength += second.strength
+        deck_plan.lights.remove(second)
+
+    # Fold the bin strips into the ceiling strips
+    if light_count() > light_budget:
+        for deck_plan in deck_plans:
+            ceiling_strips: dict = dict([(light.row[0], light) for light in deck_plan.lights
+                                         if light.row is not None and light.row[1] == 'ceiling'])
+
+            for light in [light for light in deck_plan.lights if light.row is not None and light.row[1] != 'ceiling']:
+                if light.row[0] in ceiling_strips:
+                    ceiling_strips[light.row[0]].strength += light.strength
+                    deck_plan.lights.remove(light)
+
+    # Drop the point lamps
+    if light_count() > light_budget:
+        for deck_plan in deck_plans:
+            deck_plan.lights = [light for light in deck_plan.lights if light.light_type != 'POINT']
+
+    if light_count() > light_budget:
+        logging.warning("Light budget of " + str(light_budget) + " is too small for " + str(light_count()) +
+                        " aisle runs. Keeping the strongest lights only.")
+
+        kept: [LightPlacement] = sorted([light for deck_plan in deck_plans for light in deck_plan.lights],
+                                        key=lambda light: -light.strength)[:light_budget]
+        for deck_plan in deck_plans:
+            deck_plan.lights = [light for light in deck_plan.lights if light in kept]
+
+
+def mirror_key(placement: Placement, sign: float) -> tuple:
+    """
+    Transformation of a placement of the SYMMETRIC_COLLECTIONS, None for all other placements. The port key of a
+    placement equals the starboard key of its mirror image.
+    """
+
+    def rounded(value: float):
+        return round(value, 6) if value is not None else None
+
+    if placement.collection not in SYMMETRIC_COLLECTIONS:
+        return None
+
+    return (placement.template, placement.collection, rounded(placement.position.x),
+            rounded(sign * placement.position.y), rounded(placement.position.z), rounded(placement.size_x),
+            rounded(placement.size_y), rounded(placement.size_z),
+            rounded(sign * placement.rotation_z) if placement.rotation_z is not None else None, placement.rotate_first,
+            placement.repeat_x)
+
+
+def shape_mirror_key(shape: ShapePlacement, sign: float) -> tuple:
+    """
+    Outline of a shape in global coordinates, see mirror_key(). Shapes with mirror_y are planned on the port side
+    and mirrored at the center plane when they are created.
+    """
+
+    if shape.mirror_y:
+        sign = -sign
+
+    return shape.collection, shape.material, tuple(
+        tuple((round(vec.x, 6), round(sign * vec.y, 6), round(vec.z, 6)) for vec in section)
+        for section in shape.shapes)
+
+
+def symmetric_elements(elements: list, key) -> list:
+    """
+    Elements without the mirror images of other elements, the remaining halves of all pairs are copied and marked
+    as mirrored
+    :param elements: shapes or placements
+    :param key: transformation of an element on the port (1.0) or starboard (-1.0) side, see mirror_key()
+    :return:
+    """
+
+    starboard: dict = dict()
+    for index, element in enumerate(elements):
+        if element.mirror_y and key(element, -1.0) is not None:
+            starboard.setdefault(key(element, -1.0), []).append(index)
+
+    pairs: dict = dict()
+    for index, element in enumerate(elements):
+        if not element.mirror_y and key(element, 1.0) in starboard and len(starboard[key(element, 1.0)]) > 0:
+            pairs[index] = starboard[key(element, 1.0)].pop(0)
+
+    dropped: set = set(pairs.values())
+    half: list = []
+    for index, element in enumerate(elements):
+        if index in pairs:
+            element = copy.copy(element)
+            element.mirror_half = True
+        if index not in dropped:
+            half.append(element)
+
+    return half
+
+
+def symmetric_half(deck_plan: DeckPlan) -> DeckPlan:
+    """
+    Copy of a deck plan without the mirrored halves of its shapes and of the placements of the SYMMETRIC_COLLECTIONS.
+    The remaining halves are mirrored at the center plane of the aircraft, so each pair is created only once. Seats,
+    monuments, lights and cameras are kept as planned.
+    :param deck_plan:
+    :return:
+    """
+
+    half_plan: DeckPlan = copy.copy(deck_plan)
+    half_plan.shapes = symmetric_elements(deck_plan.shapes, shape_mirror_key)
+    half_plan.placements = symmetric_elements(deck_plan.placements, mirror_key)
+
+    return half_plan
+
+
+def model_dimensions(vertices: np.ndarray) -> tuple:
+    """
+    Dimensions of a template along its local axes, as Blender reports them for an unscaled object. The planning
+    and the Blender import both take the template dimensions from here, so they plan the same cabin.
+    :param vertices: (n, 3) local coordinates
+    :return:
+    """
+
+    if len(vertices) == 0:
+        return 0.0, 0.0, 0.0
+
+    extent: np.ndarray = np.ptp(np.asarray(vertices, dtype=np.float32).reshape(-1, 3), axis=0)
+    return float(extent[0]), float(extent[1]), float(extent[2])
+
+
+def mesh_dimensions(mesh: 'bpy.types.Mesh') -> tuple:
+    """ Dimensions of the mesh of a template, see model_dimensions() """
+
+    coordinates: np.ndarray = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', coordinates)
+    return model_dimensions(coordinates)
+
+
+def read_obj_dimensions(path: str) -> tuple:
+    """
+    Dimensions of an .obj model as a template of it reports them, see model_dimensions()
+    :param path:
+    :return:
+    """
+
+    return model_dimensions(read_obj_file(path).vertices)
+
+
+def planning_template_dimensions() -> dict:
+    """ Dimensions of the planning templates from their .obj models, or the defaults if a model is missing """
+
+    dimensions: dict = dict()
+
+    for template_name in PLANNING_TEMPLATES:
+        try:
+            dimensions[template_name] = read_obj_dimensions(model_file_path(asset_registry().model(template_name)))
+
+        except (OSError, ValueError):
+            logging.warning("Model of " + template_name + " not found. Using default dimensions instead.")
+            dimensions[template_name] = PLANNING_TEMPLATE_DIMENSIONS_DEFAULT[template_name]
+
+    return dimensions
+
+
+def plan_cache_path(deck_xml: bytes, template_dimensions: dict) -> str:
+    """ Cache file of a deck plan, keyed on the deck, the template dimensions and the importer version """
+
+    key = hashlib.sha256(deck_xml)
+    key.update(repr(sorted((name, tuple(round(value, 6) for value in dimensions))
+                           for name, dimensions in template_dimensions.items())).encode())
+    key.update(IMPORTER_VERSION.encode())
+    key.update(importer_source_hash().encode())
+    if ASSET_REGISTRY is not None:
+        key.update(file_hash(ASSET_REGISTRY).encode())
+
+    return os.path.join(CACHE_DIRECTORY, 'plans', key.hexdigest() + '.pickle')
+
+
+class PlanPickler(pickle.Pickler):
+    """
+    Stores the classes of this script by name only. The script is imported as 'addon' by the command line, as
+    '__main__' by a background Blender and under its add-on name otherwise, all of them share the plan cache.
+    """
+
+    def persistent_id(self, obj):
+        if isinstance(obj, type) and obj.__module__ == __name__:
+            return obj.__qualname__
+        return None
+
+
+class PlanUnpickler(pickle.Unpickler):
+    """ Resolves the classes stored by PlanPickler in this script """
+
+    def persistent_load(self, pid):
+        return globals()[pid]
+
+
+def load_cached_plan(deck_xml: bytes, template_dimensions: dict) -> DeckPlan:
+    """ Cached deck plan, None if the deck was not planned before """
+
+    try:
+        with open(plan_cache_path(deck_xml, template_dimensions), 'rb') as cache_file:
+            return PlanUnpickler(cache_file).load()
+
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError, ImportError):
+        return None
+
+
+def store_cached_plan(deck_xml: bytes, template_dimensions: dict, deck_plan: DeckPlan) -> None:
+    """ Write a deck plan to the cache, an incomplete file is never visible under the final name """
+
+    cache_path: str = plan_cache_path(deck_xml, template_dimensions)
+
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path + '.' + str(os.getpid()), 'wb') as cache_file:
+            PlanPickler(cache_file, protocol=pickle.HIGHEST_PROTOCOL).dump(deck_plan)
+        os.replace(cache_path + '.' + str(os.getpid()), cache_path)
+
+    except (OSError, pickle.PicklingError) as e:
+        logging.warning("Could not cache plan of deck " + deck_plan.name + " (" + str(e) + ").")
+
+
+def plan_deck_arrays(deck_xml: bytes, template_dimensions: dict, deck_index: int = 0) -> (dict, [str], [dict]):
+    """ Plan a deck in a worker process, the plan is returned as arrays, see plan_deck() and encode_plans() """
+
+    return encode_plans([plan_deck(deck_xml, template_dimensions, deck_index)])
+
+
+class DeckPlanner:
+    """
+    Plans decks in worker processes in the background while Blender keeps working in the main process. The workers
+    return their plans as structured arrays, which are rebuilt into deck plans in the main process. The deck plans
+    are returned in document order, so the result is identical to a serial run.
+    """
+
+    def __init__(self, deck_xml: [bytes], template_dimensions: dict, workers: int = None,
+                 use_cache: bool = False) -> None:
+        """
+        Start planning all decks
+        :param deck_xml: serialized CPACS deck nodes
+        :param template_dimensions: dimensions of the PLANNING_TEMPLATES
+        :param workers: number of worker processes, None for one per deck and core, 1 to plan serially
+        :param use_cache: reuse and store deck plans in the plan cache
+        """
+
+        self.deck_xml = deck_xml
+        self.template_dimensions = template_dimensions
+        self.use_cache = use_cache
+        self.__pool: ProcessPoolExecutor = None
+        self.__futures: dict = dict()
+
+        self.__plans: [DeckPlan] = [load_cached_plan(deck, template_dimensions) if use_cache else None
+                                    for deck in deck_xml]
+        missing: [int] = [deck_index for deck_index, deck_plan in enumerate(self.__plans) if deck_plan is None]
+
+        self.__pool = spawn_pool(workers, len(missing))
+
+        if self.__pool is not None:
+            try:
+                self.__futures = dict([(deck_index, self.__pool.submit(plan_deck_arrays, deck_xml[deck_index],
+                                                                       template_dimensions, deck_index))
+                                       for deck_index in missing])
+
+            except Exception as e:
+                logging.warning("Could not start deck planning workers (" + str(e) + ").")
+                self.__shutdown()
+
+    def __shutdown(self) -> None:
+        if self.__pool is not None:
+            for future in self.__futures.values():
+                future.cancel()
+
+            self.__pool.shutdown()
+            self.__pool = None
+
+    def done(self) -> bool:
+        """ True if result() returns without waiting for the worker processes """
+
+        return all(future.done() for future in self.__futures.values()) if self.__pool is not None else True
+
+    def cancel(self) -> None:
+        """ Stop planning, decks that are not planned yet are discarded """
+
+        self.__shutdown()
+
+    def result(self) -> [DeckPlan]:
+        """
+        Wait for all deck plans. Decks are planned serially if the worker processes failed.
+        :return:
+        """
+
+        if self.__pool is not None:
+            try:
+                for deck_index, future in self.__futures.items():
+                    self.__plans[deck_index] = decode_plans(*future.result())[0]
+
+                    if self.use_cache:
+                        store_cached_plan(self.deck_xml[deck_index], self.template_dimensions,
+                                          self.__plans[deck_index])
+
+            except Exception as e:
+                logging.warning("Parallel deck planning failed (" + str(e) + "). Planning decks serially.")
+
+            finally:
+                self.__shutdown()
+
+        for deck_index, deck in enumerate(self.deck_xml):
+            if self.__plans[deck_index] is None:
+                self.__plans[deck_index] = plan_deck(deck, self.template_dimensions, deck_index)
+
+                if self.use_cache:
+                    store_cached_plan(deck, self.template_dimensions, self.__plans[deck_index])
+
+        return self.__plans
+
+
+def plan_decks(cpacs: XMLTree.Element, template_dimensions: dict, workers: int = None,
+               use_cache: bool = False) -> [DeckPlan]:
+    """
+    Plan all decks of the aircraft
+    :param cpacs:
+    :param template_dimensions:
+    :param workers:
+    :param use_cache:
+    :return:
+    """
+
+    return DeckPlanner([ETree.tostring(deck) for deck in cpacs.findall(CPACS.deck_path)], template_dimensions,
+                       workers, use_cache).result()
+
+
+# ------------------------------------------------------------------------------
+# Golden Plans
+
+# Golden plan files of the reference CPACS files, see launch.py golden. Positions and sizes may differ by the
+# tolerance in meters, parsing and planning may take the margin longer than recorded. Slowdowns below the slack in
+# seconds are timer noise of small files.
+GOLDEN_SUFFIX: str = '.golden.json'
+GOLDEN_TOLERANCE: float = 1e-6
+GOLDEN_TIME_MARGIN: float = 0.5
+GOLDEN_TIME_SLACK: float = 0.02
+
+
+def vector_record(vector: Vector) -> [float]:
+    return None if vector is None else [float(vector.x), float(vector.y), float(vector.z)]
+
+
+def plan_record(deck_plans: [DeckPlan], fuselage_shapes: [[Vector]]) -> dict:
+    """
+    Transforms and dimensions of all planned elements of an aircraft as plain JSON data
+    :param deck_plans:
+    :param fuselage_shapes: cross-sections of the fuselage loft, see plan_fuselage()
+    :return:
+    """
+
+    def optional_float(value) -> float:
+        return None if value is None else float(value)
+
+    return dict([
+        ('fuselage', [[vector_record(point) for point in shape] for shape in fuselage_shapes]),
+        ('decks', [dict([
+            ('name', deck_plan.name),
+            ('origin', vector_record(deck_plan.origin)),
+            ('size', vector_record(deck_plan.size)),
+            ('shapes', [dict([('name', shape.name), ('collection', shape.collection), ('material', shape.material),
+                              ('mirror_y', shape.mirror_y), ('mirror_half', shape.mirror_half),
+                              ('shapes', [[vector_record(point) for point in points] for points in shape.shapes])])
+                        for shape in deck_plan.shapes]),
+            ('placements', [dict([('template', placement.template), ('collection', placement.collection),
+                                  ('source', placement.source), ('position', vector_record(placement.position)),
+                                  ('size', [optional_float(placement.size_x), optional_float(placement.size_y),
+                                            optional_float(placement.size_z)]),
+                                  ('rotation_z', optional_float(placement.rotation_z)),
+                                  ('mirror_y', bool(placement.mirror_y)), ('rotate_first', placement.rotate_first),
+                                  ('mirror_half', placement.mirror_half), ('repeat_x', placement.repeat_x)])
+                            for placement in deck_plan.placements]),
+            ('lights', [dict([('name', light.name), ('light_type', light.light_type),
+                              ('position', vector_record(light.position)), ('size', vector_record(light.size)),
+                              ('strength', float(light.strength))])
+                        for light in deck_plan.lights]),
+            ('cameras', [dict([('name', camera.name), ('kind', camera.kind),
+                               ('position', vector_record(camera.position)), ('target', vector_record(camera.target)),
+                               ('lens', float(camera.lens)), ('ortho_scale', optional_float(camera.ortho_scale))])
+                         for camera in deck_plan.cameras])])
+            for deck_plan in deck_plans])])
+
+
+def compare_records(golden, current, tolerance: float = GOLDEN_TOLERANCE, path: str = 'plan') -> [str]:
+    """
+    Differences between a golden and a current plan record, numbers may differ by the tolerance
+    :param golden: see plan_record()
+    :param current:
+    :param tolerance:
+    :param path: location of the records in the whole record, prefix of the messages
+    :return: one message per difference
+    """
+
+    if isinstance(golden, dict) and isinstance(current, dict):
+        differences: [str] = [path + "." + key + ": missing" for key in golden if key not in current]
+        differences += [path + "." + key + ": unexpected" for key in current if key not in golden]
+        for key in golden:
+            if key in current:
+                differences += compare_records(golden[key], current[key], tolerance, path + "." + key)
+        return differences
+
+    if isinstance(golden, list) and isinstance(current, list):
+        differences: [str] = [] if len(golden) == len(current) else [
+            path + ": " + str(len(current)) + " elements instead of " + str(len(golden))]
+        for index, (golden_item, current_item) in enumerate(zip(golden, current)):
+            differences += compare_records(golden_item, current_item, tolerance, path + "[" + str(index) + "]")
+        return differences
+
+    if isinstance(golden, (int, float)) and isinstance(current, (int, float)) and \
+            not isinstance(golden, bool) and not isinstance(current, bool):
+        return [] if abs(golden - current) <= tolerance else [
+            path + ": " + str(current) + " instead of " + str(golden)]
+
+    return [] if golden == current else [path + ": " + str(current) + " instead of " + str(golden)]
+
+
+# ------------------------------------------------------------------------------
+# Layout Validation
+
+VALIDATION_MODES: [str] = ['off', 'warn', 'mark', 'abort']
+VALIDATION_GRID_CELL_SIZE: float = 1.0
+VALIDATION_TOLERANCE: float = 0.01
+
+# Clear aisle width if the aisle node does not define it
+AISLE_WIDTH_DEFAULT: float = 0.5
+
+
+class CabinLayoutError(Exception):
+    """
+    Raised if the cabin layout check finds issues and the import is aborted
+    """
+
+
+class Footprint:
+    """
+    Axis aligned floor area of a seat group or floor element in cabin coordinates
+    """
+
+    __slots__ = ('path', 'kind', 'min_x', 'max_x', 'min_y', 'max_y')
+
+    def __init__(self, path: str, kind: str, center_x: float, center_y: float, length: float, width: float,
+                 rotation: float = 0.0) -> None:
+        # Bounding box of the rotated element
+        half_x: float = (abs(math.cos(rotation)) * length + abs(math.sin(rotation)) * width) / 2.0
+        half_y: float = (abs(math.sin(rotation)) * length + abs(math.cos(rotation)) * width) / 2.0
+
+        self.path = path
+        self.kind = kind
+        self.min_x = center_x - half_x
+        self.max_x = center_x + half_x
+        self.min_y = center_y - half_y
+        self.max_y = center_y + half_y
+
+    def overlap(self, other) -> float:
+        """ Smaller of the overlaps in x and y, negative if the footprints are apart """
+
+        return min(min(self.max_x, other.max_x) - max(self.min_x, other.min_x),
+                   min(self.max_y, other.max_y) - max(self.min_y, other.min_y))
+
+    def distance_to_segment(self, start: Vector, end: Vector) -> float:
+        """ Shortest distance between the footprint and a line segment in the floor plane """
+
+        if self.__contains(start) or self.__contains(end) or any(
+                segments_intersect(start, end, corner_a, corner_b) for corner_a, corner_b in self.__edges()):
+            return 0.0
+
+        corners: [Vector] = [edge[0] for edge in self.__edges()]
+        return min([point_segment_distance(corner, start, end) for corner in corners] +
+                   [point_segment_distance(point, corner_a, corner_b) for point in (start, end)
+                    for corner_a, corner_b in self.__edges()])
+
+    def __contains(self, point: Vector) -> bool:
+        return self.min_x <= point.x <= self.max_x and self.min_y <= point.y <= self.max_y
+
+    def __edges(self) -> [tuple]:
+        corners: [Vector] = [Vector(self.min_x, self.min_y), Vector(self.max_x, self.min_y),
+                             Vector(self.max_x, self.max_y), Vector(self.min_x, self.max_y)]
+        return [(corners[i], corners[(i + 1) % 4]) for i in range(4)]
+
+
+class ValidationIssue:
+    """
+    Overlap of two elements, aisle intrusion or contour violation found by the layout check
+    """
+
+    __slots__ = ('kind', 'paths', 'message')
+
+    def __init__(self, kind: str, paths: [str], message: str) -> None:
+        self.kind = kind
+        self.paths = paths
+        self.message = message
+
+
+class SpatialGrid:
+    """
+    Uniform grid over the cabin floor. Every footprint is registered in all cells it touches, so overlap candidates
+    are only searched among footprints of the same cells instead of all pairs.
+    """
+
+    def __init__(self, cell_size: float = VALIDATION_GRID_CELL_SIZE) -> None:
+        self.cell_size = cell_size
+        self.__cells: dict = dict()
+
+    def __cell_range(self, min_x: float, max_x: float, min_y: float, max_y: float):
+        for cell_x in range(int(math.floor(min_x / self.cell_size)), int(math.floor(max_x / self.cell_size)) + 1):
+            for cell_y in range(int(math.floor(min_y / self.cell_size)), int(math.floor(max_y / self.cell_size)) + 1):
+                yield cell_x, cell_y
+
+    def insert(self, index: int, footprint: Footprint) -> None:
+        for cell in self.__cell_range(footprint.min_x, footprint.max_x, footprint.min_y, footprint.max_y):
+            self.__cells.setdefault(cell, []).append(index)
+
+    def query(self, min_x: float, max_x: float, min_y: float, max_y: float) -> set:
+        """ Indices of all footprints in the cells of an area """
+
+        return set(index for cell in self.__cell_range(min_x, max_x, min_y, max_y)
+                   for index in self.__cells.get(cell, []))
+
+    def pairs(self) -> set:
+        """ Index pairs of all footprints that share a cell """
+
+        return set((first, second) for indices in self.__cells.values() for i, first in enumerate(indices)
+                   for second in indices[i + 1:])
+
+
+def point_segment_distance(point: Vector, start: Vector, end: Vector) -> float:
+    """ Distance of a point to a line segment in the floor plane """
+
+    length_squared: float = (end.x - start.x) ** 2 + (end.y - start.y) ** 2
+    t: float = 0.0 if length_squared == 0.0 else max(0.0, min(1.0, (
+            (point.x - start.x) * (end.x - start.x) + (point.y - start.y) * (end.y - start.y)) / length_squared))
+
+    return math.hypot(point.x - start.x - t * (end.x - start.x), point.y - start.y - t * (end.y - start.y))
+
+
+def segments_intersect(a: Vector, b: Vector, c: Vector, d: Vector) -> bool:
+    """ Check if the line segments a-b and c-d intersect in the floor plane """
+
+    def orientation(p: Vector, q: Vector, r: Vector) -> float:
+        return (q.x - p.x) * (r.y - p.y) - (q.y - p.y) * (r.x - p.x)
+
+    return orientation(a, b, c) * orientation(a, b, d) < 0 and orientation(c, d, a) * orientation(c, d, b) < 0
+
+
+def decode_footprints(deck_data: DeckData) -> [Footprint]:
+    """ Footprints of all seat groups and floor elements of a deck """
+
+    return [Footprint(path, 'seat', x + length / 2.0, y, length, width, rotation)
+            for (_, _, x, y, length, width, _, rotation), path in
+            zip(deck_data.seat_groups.tolist(), deck_data.seat_group_paths)] + \
+           [Footprint(path, floor_type, x + length / 2.0, y, length, width, rotation)
+            for (floor_type, x, y, length, width, _, rotation), path in
+            zip(deck_data.floor_elements.tolist(), deck_data.floor_element_paths)]
+
+
+def validate_deck(deck: XMLTree.Element, deck_index: int = 0) -> [ValidationIssue]:
+    """
+    Check a deck for overlapping elements, seats in the aisles and elements outside of the cabin contour
+    :param deck:
+    :param deck_index: position of the deck in the document
+    :return:
+    """
+
+    deck_data: DeckData = DeckData(deck, deck_index)
+    footprints: [Footprint] = decode_footprints(deck_data)
+    issues: [ValidationIssue] = []
+
+    grid: SpatialGrid = SpatialGrid()
+    for index, footprint in enumerate(footprints):
+        grid.insert(index, footprint)
+
+    # Overlapping elements
+    for first, second in sorted(grid.pairs()):
+        overlap: float = footprints[first].overlap(footprints[second])
+        if overlap > VALIDATION_TOLERANCE:
+            issues.append(ValidationIssue('overlap', [footprints[first].path, footprints[second].path],
+                                          footprints[first].path + " overlaps " + footprints[second].path + " by " +
+                                          str(round(overlap, 3)) + " m."))
+
+    # Seats in the aisles
+    for aisle, aisle_points, aisle_path in zip(deck.findall(CPACS.aisle_sub_path), deck_data.aisles,
+                                               deck_data.aisle_paths):
+        aisle_x: [float] = aisle_points[:, 0].tolist()
+        aisle_y: [float] = aisle_points[:, 1].tolist()
+        half_width: float = float(CPACS.getCustomOrElse(aisle, CPACS.object_width, str(AISLE_WIDTH_DEFAULT))) / 2.0
+
+        intruders: set = set()
+        for i in range(len(aisle_x) - 1):
+            start: Vector = Vector(aisle_x[i], aisle_y[i])
+            end: Vector = Vector(aisle_x[i + 1], aisle_y[i + 1])
+
+            for index in grid.query(min(start.x, end.x) - half_width, max(start.x, end.x) + half_width,
+                                    min(start.y, end.y) - half_width, max(start.y, end.y) + half_width):
+                if footprints[index].kind == 'seat' and \
+                        footprints[index].distance_to_segment(start, end) < half_width - VALIDATION_TOLERANCE:
+                    intruders.add(index)
+
+        for index in sorted(intruders):
+            issues.append(ValidationIssue('aisle', [footprints[index].path, aisle_path],
+                                          footprints[index].path + " intrudes into " + aisle_path + "."))
+
+    # Elements outside of the cabin contour at floor level
+    contour: CabinContour = deck_data.contour
+
+    for footprint in footprints:
+        half_width: float = contour.half_width_range(footprint.min_x, footprint.max_x)[0]
+
+        if footprint.min_x < contour.x[0] - VALIDATION_TOLERANCE or \
+                footprint.max_x > contour.x[-1] + VALIDATION_TOLERANCE or \
+                max(abs(footprint.min_y), abs(footprint.max_y)) > half_width + VALIDATION_TOLERANCE:
+            issues.append(ValidationIssue('contour', [footprint.path],
+                                          footprint.path + " is outside of the cabin contour."))
+
+    return issues
+
+
+def validate_decks(cpacs: XMLTree.Element) -> [ValidationIssue]:
+    """ Check the layout of all decks of the aircraft, see validate_deck() """
+
+    return [issue for deck_index, deck in enumerate(cpacs.findall(CPACS.deck_path))
+            for issue in validate_deck(deck, deck_index)]
+
+
+def check_layout(cpacs: XMLTree.Element, cpacs_path: str, validation: str = 'warn') -> dict:
+    """
+    Check the cabin layout of an aircraft
+    :param cpacs:
+    :param cpacs_path: named in the error of an aborted import
+    :param validation: see VALIDATION_MODES
+    :return: issue messages by element path, empty if the validation is off
+    """
+
+    issues: dict = dict()
+    if validation == 'off':
+        return issues
+
+    for issue in validate_decks(cpacs):
+        logging.warning(issue.message)
+        for issue_path in issue.paths:
+            issues.setdefault(issue_path, issue.message)
+
+    if len(issues) > 0 and validation == 'abort':
+        raise CabinLayoutError("The cabin layout of '" + cpacs_path + "' has issues with " + str(len(issues)) +
+                               " elements, see the log for details.")
+    return issues
+
+
+# ------------------------------------------------------------------------------
+# Plan Handoff
+
+# Deck plans and fuselage loft of an aircraft in one memory-mapped file, so several Blender processes that build the
+# same cabin skip parsing and planning. A JSON header describes the arrays that follow it.
+HANDOFF_MAGIC: bytes = b'CPACSPLN'
+HANDOFF_SUFFIX: str = '.plans'
+HANDOFF_ALIGNMENT: int = 64
+
+# Strings are indices into the string table of the header, -1 is None. Missing numbers are NaN.
+PLACEMENT_DTYPE: np.dtype = np.dtype([('deck', 'i4'), ('template', 'i4'), ('collection', 'i4'), ('source', 'i4'),
+                                      ('position', 'f8', 3), ('size', 'f8', 3), ('rotation_z', 'f8'),
+                                      ('mirror_y', '?'), ('rotate_first', '?'), ('mirror_half', '?'),
+                                      ('repeat_x', 'i4')])
+SHAPE_DTYPE: np.dtype = np.dtype([('deck', 'i4'), ('name', 'i4'), ('collection', 'i4'), ('material', 'i4'),
+                                  ('mirror_y', '?'), ('mirror_half', '?'), ('start', 'i8'), ('sections', 'i4'),
+                                  ('points', 'i4')])
+LIGHT_DTYPE: np.dtype = np.dtype([('deck', 'i4'), ('name', 'i4'), ('light_type', 'i4'), ('position', 'f8', 3),
+                                  ('size', 'f8', 3), ('strength', 'f8'), ('row_run', 'i4'), ('row', 'i4')])
+CAMERA_DTYPE: np.dtype = np.dtype([('deck', 'i4'), ('name', 'i4'), ('kind', 'i4'), ('position', 'f8', 3),
+                                   ('target', 'f8', 3), ('lens', 'f8'), ('ortho_scale', 'f8'), ('cabin', 'f8', (2, 3))])
+
+
+class PlanHandoff:
+    """
+    Deck plans, fuselage loft and layout issues of one aircraft, planned once for several build processes
+    """
+
+    __slots__ = ('deck_plans', 'fuselage_shapes', 'fuselage_length', 'fuselage_height', 'layout_issues')
+
+    def __init__(self, deck_plans: [DeckPlan], fuselage_shapes: [[Vector]], fuselage_length: float,
+                 fuselage_height: float, layout_issues: dict = None) -> None:
+        self.deck_plans = deck_plans
+        self.fuselage_shapes = fuselage_shapes
+        self.fuselage_length = fuselage_length
+        self.fuselage_height = fuselage_height
+        self.layout_issues = layout_issues if layout_issues is not None else dict()
+
+
+def plan_handoff(cpacs_path: str, validation: str = 'warn', workers: int = None) -> PlanHandoff:
+    """
+    Check and plan an aircraft without Blender, the same way an import does
+    :param cpacs_path:
+    :param validation: see VALIDATION_MODES
+    :param workers: number of deck planning processes
+    :return:
+    """
+
+    cpacs: XMLTree.Element = ETree.parse(cpacs_path).getroot()
+    issues: dict = check_layout(cpacs, cpacs_path, validation)
+    deck_plans: [DeckPlan] = plan_decks(cpacs, planning_template_dimensions(), workers, use_cache=True)
+
+    return PlanHandoff(deck_plans, *plan_fuselage(cpacs), issues)
+
+
+def encode_plans(deck_plans: [DeckPlan]) -> (dict, [str], [dict]):
+    """
+    Deck plans as structured arrays, see PLACEMENT_DTYPE, SHAPE_DTYPE, LIGHT_DTYPE and CAMERA_DTYPE
+    :param deck_plans:
+    :return: arrays by name, string table and name, path, origin and size of every deck, see decode_plans()
+    """
+
+    strings: dict = dict()
+
+    def string_index(value: str) -> int:
+        return -1 if value is None else strings.setdefault(value, len(strings))
+
+    def vector_values(vector: Vector) -> [float]:
+        return [math.nan] * 3 if vector is None else [vector.x, vector.y, vector.z]
+
+    def optional_value(value: float) -> float:
+        return math.nan if value is None else value
+
+    placements: np.ndarray = np.array([
+        (deck_index, string_index(placement.template), string_index(placement.collection),
+         string_index(placement.source), vector_values(placement.position),
+         [optional_value(placement.size_x), optional_value(placement.size_y), optional_value(placement.size_z)],
+         optional_value(placement.rotation_z), placement.mirror_y, placement.rotate_first, placement.mirror_half,
+         placement.repeat_x)
+        for deck_index, deck_plan in enumerate(deck_plans) for placement in deck_plan.placements],
+        dtype=PLACEMENT_DTYPE)
+
+    shape_points: [[float]] = []
+    shapes: [tuple] = []
+    for deck_index, deck_plan in enumerate(deck_plans):
+        for shape in deck_plan.shapes:
+            shapes.append((deck_index, string_index(shape.name), string_index(shape.collection),
+                           string_index(shape.material), shape.mirror_y, shape.mirror_half, len(shape_points),
+                           len(shape.shapes), len(shape.shapes[0]) if len(shape.shapes) > 0 else 0))
+            shape_points += [vector_values(point) for points in shape.shapes for point in points]
+
+    lights: np.ndarray = np.array([
+        (deck_index, string_index(light.name), string_index(light.light_type), vector_values(light.position),
+         vector_values(light.size), light.strength, light.row[0] if light.row is not None else -1,
+         string_index(light.row[1] if light.row is not None else None))
+        for deck_index, deck_plan in enumerate(deck_plans) for light in deck_plan.lights], dtype=LIGHT_DTYPE)
+
+    cameras: np.ndarray = np.array([
+        (deck_index, string_index(camera.name), string_index(camera.kind), vector_values(camera.position),
+         vector_values(camera.target), camera.lens, optional_value(camera.ortho_scale),
+         [vector_values(corner) for corner in (camera.cabin if camera.cabin is not None else (None, None))])
+        for deck_index, deck_plan in enumerate(deck_plans) for camera in deck_plan.cameras], dtype=CAMERA_DTYPE)
+
+    arrays: dict = dict([
+        ('placements', placements),
+        ('shapes', np.array(shapes, dtype=SHAPE_DTYPE)),
+        ('shape_points', np.array(shape_points, dtype=float).reshape(-1, 3)),
+        ('lights', lights),
+        ('cameras', cameras)])
+    decks: [dict] = [dict([('name', deck_plan.name), ('path', deck_plan.path),
+                           ('origin', vector_values(deck_plan.origin)), ('size', vector_values(deck_plan.size))])
+                     for deck_plan in deck_plans]
+
+    return arrays, list(strings), decks
+
+
+def publish_plans(path: str, handoff: PlanHandoff) -> None:
+    """
+    Write the plans of an aircraft into a handoff file, see attach_plans()
+    :param path:
+    :param handoff:
+    :return:
+    """
+
+    arrays, strings, decks = encode_plans(handoff.deck_plans)
+    arrays['fuselage'] = np.array([[[point.x, point.y, point.z] for point in shape]
+                                   for shape in handoff.fuselage_shapes], dtype=float).reshape(
+        len(handoff.fuselage_shapes), -1, 3) if len(handoff.fuselage_shapes) > 0 else np.zeros((0, 0, 3))
+
+    header: dict = dict([
+        ('version', IMPORTER_VERSION),
+        ('strings', strings),
+        ('decks', decks),
+        ('fuselage_length', handoff.fuselage_length),
+        ('fuselage_height', handoff.fuselage_height),
+        ('layout_issues', handoff.layout_issues),
+        ('arrays', dict())])
+
+    # Array offsets depend on the header length, which depends on the offsets
+    header_length: int = 0
+    while True:
+        offset: int = -(-(len(HANDOFF_MAGIC) + 8 + header_length) // HANDOFF_ALIGNMENT) * HANDOFF_ALIGNMENT
+        for name, array in arrays.items():
+            header['arrays'][name] = dict([('dtype', np.lib.format.dtype_to_descr(array.dtype)),
+                                           ('shape', list(array.shape)), ('offset', offset)])
+            offset += -(-array.nbytes // HANDOFF_ALIGNMENT) * HANDOFF_ALIGNMENT
+        header_bytes: bytes = json.dumps(header).encode('utf-8')
+        if len(header_bytes) <= header_length:
+            break
+        header_length = len(header_bytes) + HANDOFF_ALIGNMENT
+
+    # Other processes only see the complete file
+    with open(path + '.tmp', 'wb') as handoff_file:
+        handoff_file.write(HANDOFF_MAGIC + np.uint64(header_length).tobytes() + header_bytes.ljust(header_length))
+        for name, array in arrays.items():
+            handoff_file.seek(header['arrays'][name]['offset'])
+            handoff_file.write(np.ascontiguousarray(array).tobytes())
+        handoff_file.truncate(offset)
+    os.replace(path + '.tmp', path)
+
+
+def decode_plans(arrays: dict, strings: [str], decks: [dict]) -> [DeckPlan]:
+    """
+    Deck plans from their arrays, see encode_plans()
+    :param arrays:
+    :param strings:
+    :param decks:
+    :return:
+    """
+
+    strings = strings + [None]
+
+    def vector(values: [float]) -> Vector:
+        return None if math.isnan(values[0]) else Vector(*values)
+
+    def optional_value(value: float) -> float:
+        return None if math.isnan(value) else value
+
+    def rows(array: np.ndarray) -> zip:
+        # Field by field, so the values of array fields are plain lists as well
+        return zip(*[array[field].tolist() for field in array.dtype.names])
+
+    deck_plans: [DeckPlan] = []
+    for deck in decks:
+        deck_plan: DeckPlan = DeckPlan(deck['name'], deck['path'])
+        deck_plan.origin = Vector(*deck['origin'])
+        deck_plan.size = Vector(*deck['size'])
+        deck_plans.append(deck_plan)
+
+    shape_points: [[float]] = arrays['shape_points'].tolist()
+    for deck, name, collection, material, mirror_y, mirror_half, start, sections, points in \
+            rows(arrays['shapes']):
+        shape: ShapePlacement = ShapePlacement(strings[name], strings[collection], [
+            [Vector(*point) for point in shape_points[start + section * points:start + (section + 1) * points]]
+            for section in range(sections)], strings[material], mirror_y)
+        shape.mirror_half = mirror_half
+        deck_plans[deck].shapes.append(shape)
+
+    for deck, template, collection, source, position, size, rotation_z, mirror_y, rotate_first, mirror_half, \
+            repeat_x in rows(arrays['placements']):
+        placement: Placement = Placement(strings[template], strings[collection], Vector(*position),
+                                         optional_value(size[0]), optional_value(size[1]), optional_value(size[2]),
+                                         optional_value(rotation_z), mirror_y, rotate_first, strings[source],
+                                         repeat_x)
+        placement.mirror_half = mirror_half
+        deck_plans[deck].placements.append(placement)
+
+    for deck, name, light_type, position, size, strength, row_run, row in rows(arrays['lights']):
+        deck_plans[deck].lights.append(LightPlacement(strings[name], strings[light_type], Vector(*position),
+                                                      strength, vector(size),
+                                                      (row_run, strings[row]) if row_run >= 0 else None))
+
+    for deck, name, kind, position, target, lens, ortho_scale, cabin in rows(arrays['cameras']):
+        deck_plans[deck].cameras.append(CameraPlacement(
+            strings[name], strings[kind], Vector(*position), Vector(*target), lens, optional_value(ortho_scale),
+            (vector(cabin[0]), vector(cabin[1])) if not math.isnan(cabin[0][0]) else None))
+
+    return deck_plans
+
+
+def attach_plans(path: str) -> PlanHandoff:
+    """
+    Read the plans of an aircraft from a handoff file, see publish_plans(). The arrays are read from the
+    memory-mapped file and the plan objects are rebuilt from them, this is a copy but no parsing or planning.
+    :param path:
+    :return:
+    """
+
+    mapped: np.memmap = np.memmap(path, dtype=np.uint8, mode='r')
+    if bytes(mapped[:len(HANDOFF_MAGIC)]) != HANDOFF_MAGIC:
+        raise ValueError(path + " is not a plan handoff file")
+
+    header_start: int = len(HANDOFF_MAGIC) + 8
+    header_length: int = int(np.frombuffer(mapped, dtype=np.uint64, count=1, offset=len(HANDOFF_MAGIC))[0])
+    header: dict = json.loads(bytes(mapped[header_start:header_start + header_length]).decode('utf-8'))
+
+    if header['version'] != IMPORTER_VERSION:
+        raise ValueError(path + " was written by importer version " + header['version'])
+
+    arrays: dict = dict([(name, np.ndarray(tuple(entry['shape']), dtype=np.lib.format.descr_to_dtype(entry['dtype']),
+                                           buffer=mapped, offset=entry['offset']))
+                         for name, entry in header['arrays'].items()])
+    deck_plans: [DeckPlan] = decode_plans(arrays, header['strings'], header['decks'])
+    fuselage_shapes: [[Vector]] = [[Vector(*point) for point in shape] for shape in arrays['fuselage'].tolist()]
+
+    return PlanHandoff(deck_plans, fuselage_shapes, header['fuselage_length'], header['fuselage_height'],
+                       header['layout_issues'])
+
+
+# ------------------------------------------------------------------------------
+# Visibility Culling
+
+# Custom properties of the Blender objects used by the culling: the cabin box of an interior camera relative to the
+# camera location, and the marker of objects that are seen from outside of the aircraft
+CULLING_CABIN_MIN: str = 'cpacs_cabin_min'
+CULLING_CABIN_MAX: str = 'cpacs_cabin_max'
+CULLING_EXTERIOR: str = 'cpacs_exterior'
+
+# Distance in meters by which objects may be outside of the view and still be rendered, they may cast shadows or
+# show in reflections
+CULLING_MARGIN_DEFAULT: float = 1.0
+
+
+def world_box_corners(local_corners: np.ndarray, matrices: np.ndarray) -> np.ndarray:
+    """
+    Corners of the bounding boxes of several objects in world coordinates
+    :param local_corners: (n, 8, 3) bounding box corners in object coordinates
+    :param matrices: (n, 4, 4) world matrices
+    :return: (n, 8, 3)
+    """
+
+    return np.einsum('nij,nkj->nki', matrices[:, :3, :3], local_corners) + matrices[:, np.newaxis, :3, 3]
+
+
+def outside_box(corners: np.ndarray, box_min: np.ndarray, box_max: np.ndarray, margin: float = 0.0) -> np.ndarray:
+    """ True for all bounding boxes that do not intersect the box grown by the margin """
+
+    return np.any((corners.min(axis=1) > box_max + margin) | (corners.max(axis=1) < box_min - margin), axis=1)
+
+
+def outside_frustum(corners: np.ndarray, view_matrix: np.ndarray, tan_x: float, tan_y: float,
+                    ortho_half_x: float = None, ortho_half_y: float = None, margin: float = 0.0) -> np.ndarray:
+    """
+    True for all bounding boxes that are completely outside of one plane of the view frustum grown by the margin.
+    This is conservative, a box close to a corner of the frustum may be kept although it is not visible.
+    :param corners: (n, 8, 3) corners in world coordinates
+    :param view_matrix: world to camera matrix, the camera looks along its -z axis
+    :param tan_x: tangent of the half horizontal field of view of a perspective camera
+    :param tan_y:
+    :param ortho_half_x: half view width of an orthographic camera
+    :param ortho_half_y:
+    :param margin:
+    :return:
+    """
+
+    points: np.ndarray = corners @ view_matrix[:3, :3].T + view_matrix[:3, 3]
+
+    # Plane normals pointing out of the frustum and their offsets, the near plane is the camera plane
+    if ortho_half_x is not None:
+        normals: np.ndarray = np.array([[1, 0, 0], [-1, 0, 0], [0, 1, 0], [0, -1, 0], [0, 0, 1]], dtype=float)
+        offsets: np.ndarray = np.array([ortho_half_x, ortho_half_x, ortho_half_y, ortho_half_y, 0.0])
+    else:
+        normals: np.ndarray = np.array([[1, 0, tan_x], [-1, 0, tan_x], [0, 1, tan_y], [0, -1, tan_y], [0, 0, 1]],
+                                       dtype=float)
+        normals /= np.linalg.norm(normals, axis=1)[:, np.newaxis]
+        offsets: np.ndarray = np.zeros(5)
+
+    distances: np.ndarray = points @ normals.T - offsets
+    return np.any(np.all(distances > margin, axis=1), axis=1)
+
+
+# ------------------------------------------------------------------------------
+# Main Functions
+
+def create_world():
+    """
+
+    :return:
+    """
+
+    bpy.data.scenes['Scene'].render.engine = 'CYCLES'
+    bpy.data.worlds['World'].node_tree.nodes.new(type='ShaderNodeTexSky')
+
+    material_input: bpy.types.NodeGroupInput = bpy.data.worlds['World'].node_tree.nodes['World Output'].inputs[
+        'Surface']
+    material_output: bpy.types.NodeGroupOutput = bpy.data.worlds['World'].node_tree.nodes['Background'].outputs[
+        'Background']
+    bpy.data.worlds['World'].node_tree.links.new(material_input, material_output)
+
+    material_input: bpy.types.NodeGroupInput = bpy.data.worlds['World'].node_tree.nodes['Background'].inputs[
+        'Color']
+    material_output: bpy.types.NodeGroupOutput = bpy.data.worlds['World'].node_tree.nodes['Sky Texture'].outputs[
+        'Color']
+    bpy.data.worlds['World'].node_tree.links.new(material_input, material_output)
+
+
+# Cycles settings of the render profiles. Cabins are enclosed and lit by area lights, so a few diffuse and glossy
+# bounces converge and adaptive sampling stops early in the evenly lit parts. Texture limits are in pixels.
+RENDER_PROFILES: dict = dict([
+    ('draft', dict([('samples', 32), ('adaptive_threshold', 0.1), ('max_bounces', 4), ('diffuse_bounces', 2),
+                    ('glossy_bounces', 1), ('transmission_bounces', 2), ('transparent_max_bounces', 4),
+                    ('sample_clamp_indirect', 5.0), ('denoise', True), ('resolution_percentage', 50),
+                    ('simplify_subdivision', 0), ('texture_limit', '512')])),
+    ('review', dict([('samples', 128), ('adaptive_threshold', 0.05), ('max_bounces', 6), ('diffuse_bounces', 3),
+                     ('glossy_bounces', 2), ('transmission_bounces', 4), ('transparent_max_bounces', 8),
+                     ('sample_clamp_indirect', 10.0), ('denoise', True), ('resolution_percentage', 100),
+                     ('simplify_subdivision', 2), ('texture_limit', '2048')])),
+    ('publication', dict([('samples', 1024), ('adaptive_threshold', 0.01), ('max_bounces', 8),
+                          ('diffuse_bounces', 4), ('glossy_bounces', 4), ('transmission_bounces', 8),
+                          ('transparent_max_bounces', 8), ('sample_clamp_indirect', 0.0), ('denoise', True),
+                          ('resolution_percentage', 100), ('simplify_subdivision', None), ('texture_limit', None)]))
+])
+
+# Render statistics of all images of a render_cameras() call, in the output directory
+RENDER_STATS_FILE: str = 'render_stats.json'
+
+# Tile size of the 2.8x tiled renderer and the size of the tiles of Cycles X, in pixels
+RENDER_TILE_SIZE: int = 256
+
+
+def render_stats_file(share: int = None) -> str:
+    """ Name of the render statistics file, each share of the cameras of a cabin writes its own """
+
+    return RENDER_STATS_FILE if share is None else os.path.splitext(RENDER_STATS_FILE)[0] + '.' + str(share) + '.json'
+
+
+def set_available(settings, name: str, value) -> None:
+    """ Set a render setting if this Blender version has it """
+
+    if hasattr(settings, name):
+        setattr(settings, name, value)
+
+
+def apply_render_profile(scene: 'bpy.types.Scene', render_profile: str) -> None:
+    """
+    Apply a render profile to the Cycles settings of the scene
+    :param scene:
+    :param render_profile: see RENDER_PROFILES
+    :return:
+    """
+
+    profile: dict = RENDER_PROFILES[render_profile]
+    cycles = scene.cycles
+
+    cycles.samples = profile['samples']
+    set_available(cycles, 'use_adaptive_sampling', True)
+    set_available(cycles, 'adaptive_threshold', profile['adaptive_threshold'])
+
+    for bounces in ('max_bounces', 'diffuse_bounces', 'glossy_bounces', 'transmission_bounces',
+                    'transparent_max_bounces'):
+        setattr(cycles, bounces, profile[bounces])
+    cycles.volume_bounces = 0
+    cycles.caustics_reflective = False
+    cycles.caustics_refractive = False
+    cycles.sample_clamp_indirect = profile['sample_clamp_indirect']
+
+    # Denoising moved from the view layers to the scene in Blender 3.0
+    set_available(cycles, 'use_denoising', profile['denoise'])
+    for view_layer in scene.view_layers:
+        set_available(view_layer.cycles, 'use_denoising', profile['denoise'])
+
+    scene.render.resolution_percentage = profile['resolution_percentage']
+    set_available(scene.render, 'tile_x', RENDER_TILE_SIZE)
+    set_available(scene.render, 'tile_y', RENDER_TILE_SIZE)
+    set_available(cycles, 'tile_size', RENDER_TILE_SIZE)
+
+    scene.render.use_simplify = profile['simplify_subdivision'] is not None or profile['texture_limit'] is not None
+    if profile['simplify_subdivision'] is not None:
+        scene.render.simplify_subdivision_render = profile['simplify_subdivision']
+    set_available(cycles, 'texture_limit_render', profile['texture_limit'] or 'OFF')
+
+    # Keep the synchronized scene between the images of a session, see render_cameras()
+    scene.render.use_persistent_data = True
+
+    scene['cpacs_render_profile'] = render_profile
+    logging.info("Applied render profile " + render_profile + ".")
+
+
+# Custom property of the cameras created by the importer, the views rendered by default. The camera collections of
+# further variants are renamed by Blender, so the cameras are found by this marker.
+CAMERA_PROPERTY: str = 'cpacs_camera'
+
+
+def create_camera(camera_placement: CameraPlacement, collection: 'bpy.types.Collection',
+                  batch: 'ObjectBatch' = None) -> 'bpy.types.Object':
+    """
+
+    :param camera_placement:
+    :param collection:
+    :param batch: link the camera with this batch instead of immediately
+    :return:
+    """
+    __camera_data: bpy.types.Camera = bpy.data.cameras.new(name=camera_placement.name)
+    __camera_data.lens = camera_placement.lens
+    __camera_data.clip_start = 0.05
+
+    if camera_placement.ortho_scale is not None:
+        __camera_data.type = 'ORTHO'
+        __camera_data.ortho_scale = camera_placement.ortho_scale
+
+    camera: bpy.types.Object = bpy.data.objects.new(name=camera_placement.name, object_data=__camera_data)
+
+    camera.location = (camera_placement.position.x, camera_placement.position.y, camera_placement.position.z)
+    rotation: Vector = camera_placement.rotation()
+    camera.rotation_euler = (rotation.x, rotation.y, rotation.z)
+    camera[CAMERA_PROPERTY] = True
+
+    if camera_placement.cabin is not None:
+        position: Vector = camera_placement.position
+        camera[CULLING_CABIN_MIN] = [camera_placement.cabin[0].x - position.x, camera_placement.cabin[0].y - position.y,
+                                     camera_placement.cabin[0].z - position.z]
+        camera[CULLING_CABIN_MAX] = [camera_placement.cabin[1].x - position.x, camera_placement.cabin[1].y - position.y,
+                                     camera_placement.cabin[1].z - position.z]
+
+    link_object(camera, collection, batch)
+    return camera
+
+
+def save_cabin(path: str, compress: bool = False) -> None:
+    """
+    Save the scene as .blend file. Paths of linked libraries are stored relative to the file, so the file and the
+    asset libraries can be moved together.
+    :param path:
+    :param compress:
+    :return:
+    """
+
+    logging.info("Saving project to " + path)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    bpy.ops.wm.save_as_mainfile(filepath=os.path.abspath(path), compress=compress, relative_remap=True)
+
+    logging.info("Saved " + str(round(os.path.getsize(path) / 1024.0 / 1024.0, 1)) + " MB, linked libraries: " +
+                 ", ".join(library.filepath for library in bpy.data.libraries))
+
+
+def cull_for_camera(camera: 'bpy.types.Object', objects: ['bpy.types.Object'], corners: np.ndarray,
+                    margin: float = CULLING_MARGIN_DEFAULT) -> int:
+    """
+    Exclude all objects from rendering that the camera can not see. An interior camera does not see the exterior
+    objects and nothing outside of its cabin, of which only the meshes in its view frustum are rendered. Lights in
+    the cabin are kept. An exterior camera only sees the exterior objects.
+    :param camera:
+    :param objects: mesh and light objects to cull
+    :param corners: (n, 8, 3) world bounding box corners of the objects, see world_box_corners()
+    :param margin: see CULLING_MARGIN_DEFAULT
+    :return: number of excluded objects
+    """
+
+    exterior: np.ndarray = np.array([bool(element.get(CULLING_EXTERIOR, False)) for element in objects], dtype=bool)
+
+    if CULLING_CABIN_MIN not in camera:
+        hidden: np.ndarray = ~exterior
+
+    else:
+        location: np.ndarray = np.array(camera.matrix_world.translation)
+        hidden: np.ndarray = exterior | outside_box(corners, location + np.array(camera[CULLING_CABIN_MIN]),
+                                                    location + np.array(camera[CULLING_CABIN_MAX]), margin)
+
+        # Blender fits the sensor to the larger image side
+        render: bpy.types.RenderSettings = bpy.context.scene.render
+        aspect: float = render.resolution_x * render.pixel_aspect_x / (render.resolution_y * render.pixel_aspect_y)
+        fit_x: bool = camera.data.sensor_fit == 'HORIZONTAL' or camera.data.sensor_fit == 'AUTO' and aspect >= 1.0
+        size_x, size_y = (1.0, 1.0 / aspect) if fit_x else (aspect, 1.0)
+
+        if camera.data.type == 'ORTHO':
+            frustum: dict = dict([('tan_x', 0.0), ('tan_y', 0.0),
+                                  ('ortho_half_x', camera.data.ortho_scale * size_x / 2.0),
+                                  ('ortho_half_y', camera.data.ortho_scale * size_y / 2.0)])
+        else:
+            sensor: float = camera.data.sensor_width if fit_x or camera.data.sensor_fit == 'AUTO' \
+                else camera.data.sensor_height
+            tan_half: float = sensor / 2.0 / camera.data.lens
+            frustum: dict = dict([('tan_x', tan_half * size_x), ('tan_y', tan_half * size_y)])
+
+        is_mesh: np.ndarray = np.array([element.type == 'MESH' for element in objects], dtype=bool)
+        hidden |= is_mesh & outside_frustum(corners, np.array(camera.matrix_world.inverted()), margin=margin,
+                                            **frustum)
+
+    for element, hide in zip(objects, hidden.tolist()):
+        element.hide_render = hide
+
+    return int(hidden.sum())
+
+
+def scene_cameras() -> ['bpy.types.Object']:
+    """ Cameras of all aircraft variants in the scene, the views rendered by default, see CAMERA_PROPERTY """
+
+    return [element for element in bpy.context.scene.objects
+            if element.type == 'CAMERA' and element.get(CAMERA_PROPERTY, False)]
+
 
+def render_cameras(output_directory: str, cameras: ['bpy.types.Object'] = None, file_format: str = 'PNG',
+                   cull_margin: float = None, stats_file: str = RENDER_STATS_FILE) -> [str]:
+    """
+    Render all views of the cabin in this session. Persistent render data keeps the BVH, the textures and the
+    synchronized scene between the images, so they are built only once per cabin. The render time and the last
+    render statistics of every image are logged and written to the stats file in the output directory.
+    :param output_directory:
+    :param cameras: cameras to render, the cameras of all aircraft variants by default, see scene_cameras()
+    :param file_format:
+    :param cull_margin: exclude the objects each camera can not see with this margin, see cull_for_camera(). None
+    renders all objects in every image.
+    :param stats_file: name of the render statistics file, see render_stats_file()
+    :return: paths of the rendered images
+    """
 
-def recalculate_normals(mesh) -> None:
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
+    scene: bpy.types.Scene = bpy.context.scene
 
-    bmesh.ops.recalc_face_normals(bm, faces=bm.faces)
+    if cameras is None:
+        cameras = scene_cameras()
 
-    bm.to_mesh(mesh)
-    bm.free()
+    scene.render.use_persistent_data = True
+    scene.render.image_settings.file_format = file_format
 
+    os.makedirs(output_directory, exist_ok=True)
+    image_paths: [str] = []
+    image_stats: [dict] = []
 
-def vector_x_distance_to(vec: Vector, x_pos: float):
-    return abs(vec.x - x_pos)
+    # Blender reports the samples, memory and time of a render only as text
+    render_stats: [str] = ['']
 
+    def store_render_stats(stats: str) -> None:
+        render_stats[0] = stats
 
-# ------------------------------------------------------------------------------
-# Main Functions
+    if hasattr(bpy.app.handlers, 'render_stats'):
+        bpy.app.handlers.render_stats.append(store_render_stats)
 
-def create_world():
-    """
+    # Objects of the scene and their bounding boxes, the culling only changes their visibility in renders. The
+    # evaluated boxes include the copies of array and mirror modifiers.
+    cull_objects: [bpy.types.Object] = [element for element in scene.objects if element.type in ('MESH', 'LIGHT')] \
+        if cull_margin is not None else []
+    hide_render: [bool] = [element.hide_render for element in cull_objects]
+    bpy.context.view_layer.update()
+    depsgraph: bpy.types.Depsgraph = bpy.context.evaluated_depsgraph_get()
+    corners: np.ndarray = world_box_corners(
+        np.array([[corner[:] for corner in element.evaluated_get(depsgraph).bound_box]
+                  for element in cull_objects]).reshape(-1, 8, 3),
+        np.array([element.matrix_world for element in cull_objects]).reshape(-1, 4, 4))
 
-    :return:
-    """
+    try:
+        for camera in cameras:
+            scene.camera = camera
 
-    bpy.data.scenes['Scene'].render.engine = 'CYCLES'
-    bpy.data.worlds['World'].node_tree.nodes.new(type='ShaderNodeTexSky')
+            if cull_margin is not None:
+                logging.info("Excluded " + str(cull_for_camera(camera, cull_objects, corners, cull_margin)) + " of " +
+                             str(len(cull_objects)) + " objects invisible to " + camera.name + ".")
+            scene.render.filepath = os.path.join(output_directory, bpy.path.clean_name(camera.name))
 
-    material_input: bpy.types.NodeGroupInput = bpy.data.worlds['World'].node_tree.nodes['World Output'].inputs[
-        'Surface']
-    material_output: bpy.types.NodeGroupOutput = bpy.data.worlds['World'].node_tree.nodes['Background'].outputs[
-        'Background']
-    bpy.data.worlds['World'].node_tree.links.new(material_input, material_output)
+            logging.info("Rendering view " + camera.name + ".")
+            start: float = time.perf_counter()
+            bpy.ops.render.render(write_still=True)
+            render_time: float = time.perf_counter() - start
 
-    material_input: bpy.types.NodeGroupInput = bpy.data.worlds['World'].node_tree.nodes['Background'].inputs[
-        'Color']
-    material_output: bpy.types.NodeGroupOutput = bpy.data.worlds['World'].node_tree.nodes['Sky Texture'].outputs[
-        'Color']
-    bpy.data.worlds['World'].node_tree.links.new(material_input, material_output)
+            image_paths.append(bpy.path.abspath(scene.render.frame_path()))
+            scale: float = scene.render.resolution_percentage / 100.0
+            image_stats.append(dict([('camera', camera.name), ('image', image_paths[-1]),
+                                     ('profile', scene.get('cpacs_render_profile')), ('samples', scene.cycles.samples),
+                                     ('adaptive_threshold', getattr(scene.cycles, 'adaptive_threshold', None)),
+                                     ('resolution', [int(scene.render.resolution_x * scale),
+                                                     int(scene.render.resolution_y * scale)]),
+                                     ('time', round(render_time, 3)), ('stats', render_stats[0])]))
+            logging.info("Rendered view " + camera.name + " in " + str(round(render_time, 1)) + " s with at most " +
+                         str(scene.cycles.samples) + " samples. " + render_stats[0])
 
+    finally:
+        for element, hide in zip(cull_objects, hide_render):
+            element.hide_render = hide
 
-def create_camera() -> bpy.types.Object:
-    """
+        if store_render_stats in getattr(bpy.app.handlers, 'render_stats', []):
+            bpy.app.handlers.render_stats.remove(store_render_stats)
 
-    :return:
-    """
-    camera: bpy.types.Object = bpy.ops.object.camera_add()
-    'camera. location = (-13.0, -11.0, 3.5)'
-    'camera.rotation_euler = (80.0 * math.pi / 180.0, 0.0, 300.0 * math.pi / 180.0)'
+        with open(os.path.join(output_directory, stats_file), 'w') as stats:
+            json.dump(image_stats, stats, indent=2)
 
-    return camera
+    return image_paths
 
 
 def create_light(name: str, pos: Vector, collection, color: Vector = None, strength: int = 1000,
-                 light_type: str = "POINT", rotation: Vector = None, lamp_size: Vector = None) -> bpy.types.Object:
+                 light_type: str = "POINT", rotation: Vector = None, lamp_size: Vector = None,
+                 batch: 'ObjectBatch' = None) -> 'bpy.types.Object':
     """
 
     :param name:
@@ -292,6 +3333,7 @@ def create_light(name: str, pos: Vector, collection, color: Vector = None, stren
     :param light_type:
     :param rotation:
     :param lamp_size:
+    :param batch: link the lamp with this batch instead of immediately
     :return:
     """
 
@@ -307,9 +3349,6 @@ def create_light(name: str, pos: Vector, collection, color: Vector = None, stren
         __lamp_data.size = lamp_size.x
         __lamp_data.size_y = lamp_size.y
 
-    # Link lamp object to the scene so it'll appear in this scene
-    collection.objects.link(__lamp_object)
-
     # Place lamp to a specified location
     __lamp_object.location = (pos.x, pos.y, pos.z)
 
@@ -320,10 +3359,12 @@ def create_light(name: str, pos: Vector, collection, color: Vector = None, stren
     if color is not None:
         __lamp_data.color = (color.x, color.y, color.z)
 
+    # Link lamp object to the scene so it'll appear in this scene
+    link_object(__lamp_object, collection, batch)
     return __lamp_object
 
 
-def create_material(material_name: str, color: Vector = None) -> bpy.types.Material:
+def create_material(material_name: str, color: Vector = None) -> 'bpy.types.Material':
     """
 
     :param material_name:
@@ -356,67 +3397,162 @@ def create_material(material_name: str, color: Vector = None) -> bpy.types.Mater
     return __material
 
 
-def load_obj_file(path: str, template_collection: bpy.types.Collection, material_dict: dict = None) -> bpy.types.Object:
-    """
+def template_object_name(template_name: str, style: str = None) -> str:
+    """ Name of a template object in the TEMPLATE_LIBRARY """
 
-    :param path:
+    return TEMPLATE_OBJECT_PREFIX + template_name + ('_' + style if style is not None else '')
+
+
+def link_template(template_name: str, style: str = None) -> 'bpy.types.Object':
+    """ Link a template object from the TEMPLATE_LIBRARY """
+
+    with bpy.data.libraries.load(TEMPLATE_LIBRARY, link=True) as (data_from, data_to):
+        data_to.objects = [template_object_name(template_name, style)]
+
+    return data_to.objects[0]
+
+
+def write_template_library(template_collection: 'bpy.types.Collection', material_dict: dict = None) -> None:
+    """
+    Import all templates of the asset registry from their .obj models into the TEMPLATE_LIBRARY. The library is
+    only written if it is missing, older than one of the models or lacks a registered template whose model exists.
+    Templates without a readable model are left out. Materials linked by the templates stay links to the material
+    library.
     :param template_collection:
     :param material_dict:
     :return:
     """
 
-    # main_path: str = 'S:\\Visualisation\\Concepts\\AVACON\\CAD_Models\\'
-    main_path: str = 'C:\\Users\\marc.engelmann\\Desktop\\Blender_files\\CAD_Models\\'
+    registry: AssetRegistry = asset_registry()
 
-    bpy.ops.import_scene.obj(filepath=main_path + path + ".obj")
+    # The models are not shipped, templates without a model are left out of the library
+    variants: [tuple] = [(template_name, style) for template_name, style in registry.variants()
+                         if os.path.isfile(model_file_path(registry.model(template_name, style)))]
+    missing: [str] = [template_object_name(template_name, style) for template_name, style in registry.variants()
+                      if (template_name, style) not in variants]
+    model_paths: [str] = [model_file_path(registry.model(template_name, style)) for template_name, style in variants]
 
-    for element in bpy.context.selected_objects:
+    if os.path.isfile(TEMPLATE_LIBRARY) and os.path.getmtime(TEMPLATE_LIBRARY) >= max(
+            [os.path.getmtime(path) for path in model_paths], default=0.0):
+        with bpy.data.libraries.load(TEMPLATE_LIBRARY) as (data_from, data_to):
+            library_objects: set = set(data_from.objects)
 
-        if material_dict == None:
-            material: bpy.types.Material = create_material(element.name)
+        if all(template_object_name(template_name, style) in library_objects for template_name, style in variants):
+            return
 
-        else:
-            try:
-                material: bpy.types.Material = material_dict[str(element.name).split('.')[0]]
-            # material.name = material.name + str(element.name).split('.')[0]
+    logging.info("Writing template library " + TEMPLATE_LIBRARY + ".")
+    if len(missing) > 0:
+        logging.warning("Templates without a model are left out of the library: " + ", ".join(missing) + ".")
 
-            except KeyError as e:
-                material: bpy.types.Material = create_material(element.name + ' ERROR', Vector(255, 0, 0))
+    models: [ObjModel] = read_obj_files(model_paths)
 
-        # Check if object already has a material, then apply it to object
-        if element.data.materials:
-            element.data.materials[0] = material
+    templates: dict = {}
+    for (template_name, style), model in zip(variants, models):
+        if model is None:
+            logging.warning("Template " + template_object_name(template_name, style) + " is left out of the library.")
+            continue
 
-        else:
-            element.data.materials.append(material)
+        templates[(template_name, style)] = load_obj_file(registry.model(template_name, style), template_collection,
+                                                          material_dict, model)
+        templates[(template_name, style)].name = template_object_name(template_name, style)
+
+    os.makedirs(os.path.dirname(os.path.abspath(TEMPLATE_LIBRARY)), exist_ok=True)
+    bpy.data.libraries.write(TEMPLATE_LIBRARY, set(templates.values()), fake_user=True, compress=True)
+
+    # The imported templates are replaced by links to the library
+    for template in templates.values():
+        bpy.data.objects.remove(template)
+
+
+def load_obj_file(path: str, template_collection: 'bpy.types.Collection', material_dict: dict = None,
+                  model: ObjModel = None) -> 'bpy.types.Object':
+    """
+    Create a template object from an .obj model. All parts of the model are joined into one mesh with a material
+    slot per part, without the .obj operator and without changing the selection.
+    :param path: model path relative to the MODEL_DIRECTORY
+    :param template_collection:
+    :param material_dict: materials by part name, parts without a material are marked red
+    :param model: the model if it was already read, see read_obj_files()
+    :return:
+    """
+
+    if model is None:
+        model = read_obj_file(model_file_path(path))
+
+    mesh: bpy.types.Mesh = bpy.data.meshes.new(model.name)
+    mesh.vertices.add(len(model.vertices))
+    mesh.vertices.foreach_set('co', model.vertices.ravel())
+    mesh.loops.add(len(model.loops))
+    mesh.loops.foreach_set('vertex_index', model.loops)
+    mesh.polygons.add(len(model.loop_totals))
+    mesh.polygons.foreach_set('loop_start', model.loop_starts().astype(np.int32))
+    mesh.polygons.foreach_set('loop_total', model.loop_totals)
+    mesh.polygons.foreach_set('material_index', model.face_parts)
+    mesh.polygons.foreach_set('use_smooth', np.ones(len(model.loop_totals), dtype=bool))
+
+    if model.uvs is not None:
+        mesh.uv_layers.new().data.foreach_set('uv', model.uvs.ravel())
+
+    mesh.validate()
+    mesh.update()
 
-    if len(bpy.context.selected_objects) > 1:
-        bpy.context.view_layer.objects.active = bpy.context.selected_objects[0]
-        bpy.ops.object.join()
+    for part in model.parts:
+        if material_dict is None:
+            material: bpy.types.Material = create_material(part)
 
-    obj_object = bpy.context.selected_objects[0]
-    obj_object.select_set(False)
+        else:
+            try:
+                material: bpy.types.Material = material_dict[part.split('.')[0]]
 
-    set_smooth(obj_object)
+            except KeyError:
+                material: bpy.types.Material = create_material(part + ' ERROR', Vector(255, 0, 0))
 
-    bpy.context.scene.collection.objects.unlink(obj_object)
+        mesh.materials.append(material)
+
+    obj_object: bpy.types.Object = bpy.data.objects.new(model.name, mesh)
+    obj_object.rotation_euler[0] = OBJ_ROTATION_X
     template_collection.objects.link(obj_object)
 
     return obj_object
 
 
-def load_material(material_name: str) -> bpy.types.Material:
+# Longest image edge in pixels of each texture quality, None keeps the images of the material library
+TEXTURE_QUALITIES: dict = dict([('draft', 512), ('preview', 1024), ('final', None)])
+
+# Suffix of the empty texture cache entry of an image that is small enough for a texture quality already
+TEXTURE_KEPT_SUFFIX: str = '.kept'
+
+# Materials appended from the material library at the start of every import
+LIBRARY_MATERIALS: [str] = ['Fabric_black', 'Fabric_blue', 'Fabric_blue_dark', 'Fabric_green', 'Fabric_orange',
+                            'Fabric_white', 'Fabric_white with logo', 'Leather_1', 'Leather_2_black', 'Leather_3',
+                            'Light', 'Metal_bright', 'Metal_dark', 'Plastic_dark', 'Plastic_grey', 'Plastic_rough',
+                            'Plastic_white', 'Wood']
+
+
+def load_material(material_name: str, texture_quality: str = 'final', link: bool = False) -> 'bpy.types.Material':
     """
 
     :param name:
     :param file_name:
     :param material_name:
+    :param texture_quality: resolution of the image textures, see TEXTURE_QUALITIES
+    :param link: link the material from the material library instead of appending a copy
     :return:
     """
 
+    if link:
+        with bpy.data.libraries.load(MATERIAL_LIBRARY, link=True) as (data_from, data_to):
+            data_to.materials = [material_name] if material_name in data_from.materials else []
+
+        if len(data_to.materials) == 0:
+            logging.info("Could not load material " + material_name + ".")
+            return create_material(material_name + " not found!")
+
+        # Linked materials can not be changed, they always use the textures of the library
+        return data_to.materials[0]
+
     try:
-        # material_directory = 'S:/Visualisation/Concepts/AVACON/Textures/Cabin Textures/Texture Samples.blend\\Material\\'
-        material_directory = 'C:/Users/marc.engelmann/Desktop/Blender_files/Textures/Cabin Textures/Texture Samples.blend\\Material\\'
+        material_directory = os.path.join(MATERIAL_LIBRARY, 'Material', '')
         bpy.ops.wm.append(directory=material_directory, filename=material_name)
         mat: bpy.types.Material = bpy.data.materials[material_name]
         mat.name = material_name
@@ -424,47 +3560,270 @@ def load_material(material_name: str) -> bpy.types.Material:
         logging.info("Could not load material " + material_name + ".")
         return create_material(material_name + " not found!")
 
+    if TEXTURE_QUALITIES[texture_quality] is not None:
+        downscale_textures(mat, texture_quality)
+
     return mat
 
 
-def mirror(mirror_object: bpy.types.Object, x: bool = False, y: bool = False, z: bool = False):
+def image_texture_nodes(node_tree: 'bpy.types.NodeTree') -> ['bpy.types.ShaderNodeTexImage']:
+    """ All image texture nodes of a node tree, including those in node groups """
+
+    nodes: list = []
+
+    for node in node_tree.nodes:
+        if node.type == 'TEX_IMAGE' and node.image is not None:
+            nodes.append(node)
+        elif node.type == 'GROUP' and node.node_tree is not None:
+            nodes += image_texture_nodes(node.node_tree)
+
+    return nodes
+
+
+def downscaled_image(image: 'bpy.types.Image', texture_quality: str) -> 'bpy.types.Image':
+    """
+    Copy of an image texture at the resolution of a texture quality. The copy is written to the texture cache once,
+    later imports load it from there without reading the source image. Images that are small enough already are
+    recorded in the cache as well, so later imports do not load them to read their size.
+    :param image:
+    :param texture_quality: see TEXTURE_QUALITIES
+    :return: the downscaled image, None if the image is not a file or small enough already
+    """
+
+    max_size: int = TEXTURE_QUALITIES[texture_quality]
+    source_path: str = bpy.path.abspath(image.filepath, library=image.library)
+
+    if image.packed_file is not None or not os.path.isfile(source_path):
+        return None
+
+    cache_path: str = os.path.join(CACHE_DIRECTORY, 'textures', file_hash(source_path) + '_' + str(max_size) +
+                                   os.path.splitext(source_path)[1])
+
+    kept_path: str = os.path.splitext(cache_path)[0] + TEXTURE_KEPT_SUFFIX
+    if os.path.isfile(kept_path):
+        return None
+
+    if not os.path.isfile(cache_path):
+        # Reading the size loads the source image, so this only happens once for every image and texture quality
+        width, height = image.size
+        if max(width, height) <= max_size:
+            os.makedirs(os.path.dirname(kept_path), exist_ok=True)
+            open(kept_path, 'w').close()
+            return None
+
+        scale: float = max_size / max(width, height)
+        image_copy: bpy.types.Image = image.copy()
+        image_copy.scale(max(int(width * scale), 1), max(int(height * scale), 1))
+
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        image_copy.filepath_raw = cache_path
+        image_copy.file_format = image.file_format
+        image_copy.save()
+        bpy.data.images.remove(image_copy)
+
+    cached_image: bpy.types.Image = bpy.data.images.load(cache_path, check_existing=True)
+    cached_image.name = image.name + ' (' + texture_quality + ')'
+    cached_image.colorspace_settings.name = image.colorspace_settings.name
+    cached_image.alpha_mode = image.alpha_mode
+
+    return cached_image
+
+
+def downscale_textures(material: 'bpy.types.Material', texture_quality: str) -> None:
+    """
+    Replace the image textures of a material by downscaled copies. The source images lose their users and are
+    removed with the other orphans of the import, the material library is not modified.
+    :param material:
+    :param texture_quality: see TEXTURE_QUALITIES
+    :return:
+    """
+
+    if material.node_tree is None:
+        return
+
+    for node in image_texture_nodes(material.node_tree):
+        try:
+            image: bpy.types.Image = downscaled_image(node.image, texture_quality)
+
+        except (OSError, RuntimeError) as e:
+            logging.warning("Could not downscale texture " + node.image.name + " (" + str(e) + ").")
+            continue
+
+        if image is not None:
+            node.image = image
+
+
+class ObjectBatch:
+    """
+    New objects that are linked to their collections together once they are complete. Objects outside of the scene
+    do not update the view layer or the dependency graph while they are created.
+    """
+
+    def __init__(self) -> None:
+        self.objects: dict = dict()
+
+    def add(self, collection: 'bpy.types.Collection', new_object: 'bpy.types.Object') -> None:
+        """ Link an object to a collection with the batch """
+
+        self.objects.setdefault(collection, []).append(new_object)
+
+    def link(self) -> int:
+        """
+        Link all objects of the batch to their collections
+        :return: number of linked objects
+        """
+
+        n_objects: int = 0
+        for collection, objects in self.objects.items():
+            collection_objects = collection.objects
+            for new_object in objects:
+                collection_objects.link(new_object)
+            n_objects += len(objects)
+
+        self.objects.clear()
+        return n_objects
+
+
+def link_object(new_object: 'bpy.types.Object', collection: 'bpy.types.Collection',
+                batch: ObjectBatch = None) -> None:
+    """ Link an object to a collection, or with the batch if there is one """
+
+    if batch is None:
+        collection.objects.link(new_object)
+    else:
+        batch.add(collection, new_object)
+
+
+def mirrored_matrix(matrix: np.ndarray, x: bool = False, y: bool = False, z: bool = False) -> np.ndarray:
+    """
+    Transformation of an object that is mirrored at the global planes through its origin
+    :param matrix: 4x4 transformation of the object
+    :param x:
+    :param y:
+    :param z:
+    :return:
+    """
+
+    mirrored: np.ndarray = np.array(matrix, dtype=float)
+    mirrored[:3, :3] = np.diag([-1.0 if x else 1.0, -1.0 if y else 1.0, -1.0 if z else 1.0]) @ mirrored[:3, :3]
+    return mirrored
+
+
+def rotated_matrix(matrix: np.ndarray, angle_z: float) -> np.ndarray:
     """
+    Transformation of an object that is rotated about the global z axis through its origin
+    :param matrix: 4x4 transformation of the object
+    :param angle_z: in radians
+    :return:
+    """
+
+    rotation: np.ndarray = np.array([[math.cos(angle_z), -math.sin(angle_z), 0.0],
+                                     [math.sin(angle_z), math.cos(angle_z), 0.0],
+                                     [0.0, 0.0, 1.0]])
+    rotated: np.ndarray = np.array(matrix, dtype=float)
+    rotated[:3, :3] = rotation @ rotated[:3, :3]
+    return rotated
+
+
+def placement_matrix(matrix: np.ndarray, placement: Placement) -> np.ndarray:
+    """
+    Transformation of a template copy after the rotation and mirroring of its placement. The copy must not be
+    rotated about z yet, so a rotation about the global z axis is the same as setting its z euler angle.
+    :param matrix: 4x4 transformation of the placed and sized copy
+    :param placement:
+    :return:
+    """
+
+    if placement.rotation_z is not None and placement.rotate_first:
+        matrix = rotated_matrix(matrix, placement.rotation_z)
+
+    if placement.mirror_y:
+        matrix = mirrored_matrix(matrix, y=True)
+
+    if placement.rotation_z is not None and not placement.rotate_first:
+        matrix = rotated_matrix(matrix, placement.rotation_z)
+
+    return matrix
+
+
+def orient_placement(new_object: 'bpy.types.Object', placement: Placement) -> None:
+    """
+    Rotate and mirror a template copy as planned, see placement_matrix(). Blender decomposes the whole matrix, so a
+    rotated and mirrored copy keeps the heading of its mirror image.
+    :param new_object:
+    :param placement:
+    :return:
+    """
+
+    if placement.rotation_z is None and not placement.mirror_y:
+        return
+
+    # The basis matrix is computed from the transform channels, also of objects that are not linked yet
+    new_object.matrix_basis = Matrix(placement_matrix(np.array(new_object.matrix_basis), placement).tolist())
+
 
+def mirror(mirror_object: 'bpy.types.Object', x: bool = False, y: bool = False, z: bool = False):
+    """
+    Mirror an object at the global planes through its origin like the mirror transform, without selecting it
     :param mirror_object:
     :param x:
     :param y:
     :param z:
     :return:
     """
-    mirror_object.select_set(True)
-    bpy.ops.transform.mirror(orient_type='GLOBAL', constraint_axis=(x, y, z))
-    mirror_object.select_set(False)
+
+    mirror_object.matrix_basis = Matrix(mirrored_matrix(np.array(mirror_object.matrix_basis), x, y, z).tolist())
+
+
+def add_array_modifier(repeated_object: 'bpy.types.Object', count: int) -> None:
+    """
+    Repeat an object along its local x axis without further objects
+    :param repeated_object:
+    :param count: number of copies including the object itself
+    :return:
+    """
+
+    modifier: bpy.types.ArrayModifier = repeated_object.modifiers.new('Array', 'ARRAY')
+    modifier.fit_type = 'FIXED_COUNT'
+    modifier.count = count
+    modifier.use_relative_offset = True
+    modifier.relative_offset_displace = (1.0, 0.0, 0.0)
+
+
+def add_mirror_modifier(mirrored_object: 'bpy.types.Object', mirror_plane: 'bpy.types.Object') -> None:
+    """
+    Add the mirror image of an object at the y plane of another object, without a second object
+    :param mirrored_object:
+    :param mirror_plane: object whose local xz plane is the mirror plane, shared by all mirrored objects
+    :return:
+    """
+
+    modifier: bpy.types.MirrorModifier = mirrored_object.modifiers.new('Mirror', 'MIRROR')
+    modifier.use_axis[0] = False
+    modifier.use_axis[1] = True
+    modifier.mirror_object = mirror_plane
 
 
-def correct_normals(normals_object: bpy.types.Object) -> None:
+def correct_normals(normals_object: 'bpy.types.Object') -> None:
     """
 
     :param normals_object:
     :return:
     """
-    bpy.context.view_layer.objects.active = normals_object
-    bpy.ops.object.editmode_toggle()
-    bpy.ops.mesh.select_all(action='SELECT')
-    bpy.ops.mesh.normals_make_consistent(inside=False)
-    bpy.ops.mesh.select_all(action='DESELECT')
-    bpy.ops.object.editmode_toggle()
 
+    # Same as making the normals consistent in edit mode, but works on objects that are not linked yet
+    recalculate_normals(normals_object.data)
 
-def connect_shapes(name: str, collection: bpy.types.Collection, shapes: [[Vector]],
-                   material: bpy.types.Material = None,
-                   check_normals: bool = True) -> bpy.types.Object:
+
+def connect_shapes(name: str, collection: 'bpy.types.Collection', shapes: [[Vector]],
+                   material: 'bpy.types.Material' = None, batch: 'ObjectBatch' = None) -> 'bpy.types.Object':
     """
     Define multiple vector shapes of equal vector amount and connect all shapes
     :param name:
     :param collection:
     :param shapes:
     :param material:
-    :param check_normals:
+    :param batch: link the object with this batch instead of immediately
     :return:
     """
 
@@ -509,12 +3868,8 @@ def connect_shapes(name: str, collection: bpy.types.Collection, shapes: [[Vector
     mesh: bpy.types.Mesh = bpy.data.meshes.new(name)
     mesh.from_pydata(__vertices, [], __faces)
     shape_object: bpy.types.Object = bpy.data.objects.new(name, mesh)
-
-    recalculate_normals(shape_object.data)
     set_smooth(shape_object)
 
-    collection.objects.link(shape_object)
-
     # Check if material is required
     if material is not None:
 
@@ -525,18 +3880,17 @@ def connect_shapes(name: str, collection: bpy.types.Collection, shapes: [[Vector
         else:
             shape_object.data.materials.append(material)
 
-    # If the normals orientation should be checked, perform test
-    if check_normals:
-        # correct the normals!
-        correct_normals(shape_object)
+    # The faces of the shapes are not oriented consistently, make all normals point outwards
+    correct_normals(shape_object)
 
     mesh.update()
+    link_object(shape_object, collection, batch)
     return shape_object
 
 
-def create_from_template(template: bpy.types.Object, collection: bpy.types.Collection, position: Vector,
+def create_from_template(template: 'bpy.types.Object', collection: 'bpy.types.Collection', position: Vector,
                          size_x: float = None, size_y: float = None,
-                         size_z: float = None) -> bpy.types.Object:
+                         size_z: float = None, batch: 'ObjectBatch' = None) -> 'bpy.types.Object':
     """
 
     :param template:
@@ -545,40 +3899,31 @@ def create_from_template(template: bpy.types.Object, collection: bpy.types.Colle
     :param size_x:
     :param size_y:
     :param size_z:
+    :param batch: link the object with this batch instead of immediately
     :return:
     """
 
-    # Create new object
+    # Create new object, objects of linked templates share the mesh of the library
     new_object: bpy.types.Object = template.copy()
-    new_object.data = new_object.data.copy()
-
-    # new_object: bpy.types.Object = bpy.data.objects.new(template.name, template.data)
-
-    # Assign new collection
-    collection.objects.link(new_object)
-
-    # Select object
-    new_object.select_set(True)
+    if template.library is None:
+        new_object.data = new_object.data.copy()
 
     # Rotate 90 degrees (required for .obj import copy)
-    new_object.rotation_euler[0] = 90 * math.pi / 180.0
+    new_object.rotation_euler[0] = OBJ_ROTATION_X
 
     # Set position of new object
     new_object.location[0] = position.x
     new_object.location[1] = position.y
     new_object.location[2] = position.z
 
-    # Deselect object
-    new_object.select_set(False)
-
     # Determine size of new object
     set_dimensions(new_object, size_x, size_y, size_z)
 
-    # Return object
+    link_object(new_object, collection, batch)
     return new_object
 
 
-def set_dimensions(object: bpy.types.Object, size_x: float = None, size_y: float = None, size_z: float = None):
+def set_dimensions(object: 'bpy.types.Object', size_x: float = None, size_y: float = None, size_z: float = None):
     """
 
     :param object:
@@ -588,556 +3933,518 @@ def set_dimensions(object: bpy.types.Object, size_x: float = None, size_y: float
     :return:
     """
 
-    object.select_set(True)
-
-    # Determine size of new object
-    new_dimension_x: float = size_x if size_x is not None else bpy.context.selected_objects[0].dimensions[0]
-    new_dimension_y: float = size_y if size_y is not None else bpy.context.selected_objects[0].dimensions[1]
-    new_dimension_z: float = size_z if size_z is not None else bpy.context.selected_objects[0].dimensions[2]
+    # Determine size of new object, the bounds of the mesh are known without linking the object
+    new_dimension_x: float = size_x if size_x is not None else object.dimensions[0]
+    new_dimension_y: float = size_y if size_y is not None else object.dimensions[1]
+    new_dimension_z: float = size_z if size_z is not None else object.dimensions[2]
 
     # Set size of new object
-    bpy.context.selected_objects[0].dimensions = new_dimension_x, new_dimension_y, new_dimension_z
+    object.dimensions = new_dimension_x, new_dimension_y, new_dimension_z
 
-    object.select_set(False)
 
+def build_deck(deck_plan: DeckPlan, collections: dict, asset_pool: 'AssetPool', camera_kinds: [str] = None,
+               issues: dict = None, mirror_plane: 'bpy.types.Object' = None) -> None:
+    """ Create the Blender objects of a planned deck, see build_deck_steps() """
 
-def create_from_cpacs(path: str, enum_bc_seat_type=None) -> None:
-    """
+    for _ in build_deck_steps(deck_plan, collections, asset_pool, camera_kinds, issues, mirror_plane):
+        pass
 
-    :param path:
-    :param generate_fuselage:
-    :param enum_bc_seat_type:
+
+def build_deck_steps(deck_plan: DeckPlan, collections: dict, asset_pool: 'AssetPool', camera_kinds: [str] = None,
+                     issues: dict = None, mirror_plane: 'bpy.types.Object' = None):
+    """
+    Create the Blender objects of a planned deck, yields after every created object. The objects are linked to their
+    collections after the last one is complete.
+    :param deck_plan:
+    :param collections: target collections by placement collection key
+    :param asset_pool: shape materials and templates, templates are loaded on their first use
+    :param camera_kinds: kinds of cameras to create, see CAMERA_KINDS
+    :param issues: layout issue messages by element path, objects of these elements are marked red
+    :param mirror_plane: center plane of the aircraft, required by a plan of symmetric_half()
     :return:
     """
-    material_fabric_black: bpy.types.Material = load_material('Fabric_black')
-    material_fabric_blue: bpy.types.Material = load_material('Fabric_blue')
-    material_fabric_blue_dark: bpy.types.Material = load_material('Fabric_blue_dark')
-    material_fabric_green: bpy.types.Material = load_material('Fabric_green')
-    material_fabric_orange: bpy.types.Material = load_material('Fabric_orange')
-    material_fabric_white: bpy.types.Material = load_material('Fabric_white')
-    material_fabric_wite_logo: bpy.types.Material = load_material('Fabric_white with logo')
-    material_leather: bpy.types.Material = load_material('Leather_1')
-    material_leather_black: bpy.types.Material = load_material('Leather_2_black')
-    material_leather_3: bpy.types.Material = load_material('Leather_3')
-    material_light: bpy.types.Material = load_material('Light')
-    material_metal_bright: bpy.types.Material = load_material('Metal_bright')
-    material_metal_dark: bpy.types.Material = load_material('Metal_dark')
-    material_plastic_dark: bpy.types.Material = load_material('Plastic_dark')
-    material_plastic_grey: bpy.types.Material = load_material('Plastic_grey')
-    material_plastic_rough: bpy.types.Material = load_material('Plastic_rough')
-    material_plastic_white: bpy.types.Material = load_material('Plastic_white')
-    material_wood: bpy.types.Material = load_material('Wood')
-    material_black: bpy.types.Material = create_material('Just_Black', Vector(0, 0, 0))
-
-    material_dict: dict = dict([
-        ('cushion', material_fabric_blue_dark),
-        ('pillow', material_fabric_black),
-        ('window', material_light),
-        ('light', material_light),
-        ('armrest', material_plastic_dark),
-        ('rail', material_metal_bright),
-        ('tray_table', material_plastic_grey),
-        ('housing', material_plastic_grey),
-        ('bin', material_plastic_grey),
-        ('arch', material_plastic_grey),
-        ('base', material_plastic_dark),
-        ('ventilation', material_plastic_dark),
-        ('locker', material_metal_dark),
-        ('table', material_wood),
-        ('lamp', material_metal_dark),
-        ('cover', material_plastic_grey),
-        ('cover_inside', material_wood),
-        ('lining', material_plastic_grey),
-        ('walls', material_plastic_grey),
-        ('divider_wall', material_plastic_grey),
-        ('foot', material_plastic_grey),
-        ('shelves', material_plastic_dark),
-        ('tv_frame', material_plastic_dark),
-        ('trolley', material_metal_dark),
-        ('tv_display', material_black),
-        ('railing', material_metal_dark),
-        ('stairs', material_fabric_black)
-
-    ])
-
-    logging.info("Creating aircraft model from '" + path + "'.")
-
-    cpacs = ETree.parse(path).getroot()
-
-    # Clear all exiting collections except the cameras
-    for c in bpy.data.collections:
-        if c.name != "World":
-            bpy.data.collections.remove(c)
 
-    # create new collections for all elements
-    seats_col: bpy.types.Collection = bpy.data.collections.new('Seats')
-    floor_col: bpy.types.Collection = bpy.data.collections.new('Floor Elements')
-    lining_col: bpy.types.Collection = bpy.data.collections.new('Lining')
-    ceiling_col: bpy.types.Collection = bpy.data.collections.new('Ceiling')
-    temp_col: bpy.types.Collection = bpy.data.collections.new('Templates')
-    fuselage_col: bpy.types.Collection = bpy.data.collections.new('Fuselage')
-
-    # link collections to scene
-    bpy.context.scene.collection.children.link(ceiling_col)
-    bpy.context.scene.collection.children.link(lining_col)
-    bpy.context.scene.collection.children.link(temp_col)
-    bpy.context.scene.collection.children.link(seats_col)
-    bpy.context.scene.collection.children.link(floor_col)
-    bpy.context.scene.collection.children.link(fuselage_col)
-
-    # Load all .obj files here.
-    lining_obj: bpy.types.Object = load_obj_file('Linings\\side_wall_1', temp_col, material_dict)
-    lining_obj_2: bpy.types.Object = load_obj_file('Linings\\side_wall_2', temp_col, material_dict)
-    lining_obj_3: bpy.types.Object = load_obj_file('Linings\\side_wall_3', temp_col, material_dict)
-    luggage_bin_object: bpy.types.Object = load_obj_file('Overhead_Bins\\bin', temp_col, material_dict)
-    ceiling_object: bpy.types.Object = load_obj_file('Overhead_Bins\\aisle_arch', temp_col, material_dict)
-    ceiling_middle_object: bpy.types.Object = load_obj_file('Overhead_Bins\\bin_extension_3', temp_col, material_dict)
-
-    galley_object = None
-    curtain_object = None
-    wall_object = None
-
-    bar_object = None
-    table_object = None
-    stairs_object = None
-
-    busi_seat_object: bpy.types.Object = load_obj_file('Seats\\bc_1', temp_col, material_dict)
-    preco_seat_object: bpy.types.Object = load_obj_file('Seats\\pec_1', temp_col, material_dict)
-
-    seat_object_1 = None
-    seat_object_2 = None
-    seat_object_3 = None
-    seat_object_4 = None
-    seat_object_5 = None
-
-    fuselage_profile: XMLTree.Element = cpacs.find(CPACS.fuselage_profile_path)
-    fuselage_positioning: [XMLTree.Element] = cpacs.findall(CPACS.fuselage_positioning_path)
-
-    # Only create fuselage shape if model supports it
-    if len(fuselage_positioning) > 0:
-
-        # Create the fuselage shape of the aircraft
-        circular_x: [float] = [float(x) for x in
-                               CPACS.getStringArray(fuselage_profile, CPACS.fuselage_profile_pointlist_x)]
-        circular_y: [float] = [float(y) for y in
-                               CPACS.getStringArray(fuselage_profile, CPACS.fuselage_profile_pointlist_y)]
-        circular_z: [float] = [float(z) for z in
-                               CPACS.getStringArray(fuselage_profile, CPACS.fuselage_profile_pointlist_z)]
-
-        fuselage_shapes: [[Vector]] = [[]]
-
-        indexer: int = 0
-        total_length: float = 0.0
-
-        for fuselage_section in cpacs.findall(CPACS.fuselage_section_path):
-            length: float = float(fuselage_positioning[indexer].find(CPACS.fuselage_positioning_length).text)
-            scale_y: float = float(fuselage_section.find(CPACS.fuselage_element_scaling_y).text)
-            scale_z: float = float(fuselage_section.find(CPACS.fuselage_element_scaling_z).text)
-            delta_z: float = float(fuselage_section.find(CPACS.fuselage_element_translation_z).text)
-            fuselage_shapes.append(
-                [Vector(total_length + circular_x[i], circular_y[i] * scale_y, circular_z[i] * scale_z + delta_z) for i
-                 in
-                 range(len(circular_x) - 1)])
-
-            indexer += 1
-            total_length += length
-
-        connect_shapes("Outer Fuselage", fuselage_col, fuselage_shapes, None)
+    # All objects of the deck are complete before they are linked to their collections
+    batch: ObjectBatch = ObjectBatch()
 
-    # --------------------
-    # Hard coded values
-    floor_thickness: float = 0.05
-    ceiling_thickness: float = 0.01
+    for shape in deck_plan.shapes:
+        shape_object: bpy.types.Object = connect_shapes(shape.name, collections[shape.collection], shape.shapes,
+                                                        asset_pool.shape_materials.get(shape.material), batch=batch)
+        if shape.mirror_y:
+            mirror(shape_object, y=True)
 
-    # Loop through all cabin decks of the aircraft
-    for deck in cpacs.findall(CPACS.deck_path):
+        if shape.mirror_half:
+            add_mirror_modifier(shape_object, mirror_plane)
+        yield
 
-        logging.info("Creating deck " + deck.find(CPACS.object_name).text + ".")
+    for placement in deck_plan.placements:
+        new_object: bpy.types.Object = create_from_template(
+            asset_pool.template(placement.template), collections[placement.collection], placement.position,
+            size_x=placement.size_x, size_y=placement.size_y, size_z=placement.size_z, batch=batch)
 
-        overhead_bin_height: float = float(
-            CPACS.getCustomOrElse(deck, CPACS.custom_overhead_bin_height, CPACS.custom_overhead_bin_height_default))
-        luggage_bins_aisle_indent: float = float(
-            CPACS.getCustomOrElse(deck, CPACS.custom_overhead_bin_indent, CPACS.custom_overhead_bin_indent_default))
+        orient_placement(new_object, placement)
 
-        # Deck floor
-        geo_x: [float] = [float(x) for x in CPACS.getStringArray(deck, CPACS.cabin_geometry_x)]
-        geo_z: [float] = [float(z) for z in CPACS.getStringArray(deck, CPACS.cabin_geometry_z)]
-        geo_y: [[float]] = [
-            [float(y) for y in CPACS.getStringArray(deck, CPACS.cabin_geometry_yZ + str(i))] for i in
-            range(1, len(geo_z) + 1)]
+        if placement.repeat_x > 1:
+            add_array_modifier(new_object, placement.repeat_x)
 
-        # z0 of cabin
-        z_0: float = float(deck.find(CPACS.cabin_z0).text)
-        x_0: float = float(deck.find(CPACS.cabin_x0).text)
+        if placement.mirror_half:
+            add_mirror_modifier(new_object, mirror_plane)
 
-        floor_shape: [Vector] = [Vector(x_0 + geo_x[i], geo_y[0][i], z_0) for i in range(len(geo_x))]
-        floor_shape_2: [Vector] = [Vector(x_0 + geo_x[i], geo_y[0][i], z_0 - floor_thickness) for i in
-                                   range(len(geo_x))]
-        ceiling_shape_2: [Vector] = [
-            Vector(x_0 + geo_x[i], geo_y[len(geo_y) - 1][i], z_0 + max(geo_z) + ceiling_thickness)
-            for i in range(len(geo_x))]
-        ceiling_shape: [Vector] = [Vector(x_0 + geo_x[i], geo_y[len(geo_y) - 1][i], z_0 + max(geo_z)) for i in
-                                   range(len(geo_x))]
+        if issues is not None and placement.source in issues:
+            new_object.color = (1.0, 0.0, 0.0, 1.0)
+            new_object['cpacs_layout_issue'] = issues[placement.source]
+        yield
 
-        deck_size: Vector = Vector(max(geo_x), max(geo_y[0]) * 2.0, max(geo_z))
-        deck_size_y_bins: float = max(geo_y[len(geo_y) - 2]) * 2.0
-        floor_shape.insert(0, Vector(x_0, 0, z_0))
-        floor_shape_2.insert(0, Vector(x_0, 0, z_0 - floor_thickness))
+    for light in deck_plan.lights:
+        create_light(light.name, light.position, collections['lights'], color=LIGHT_COLOR, strength=light.strength,
+                     light_type=light.light_type, lamp_size=light.size, batch=batch)
+        yield
 
-        ceiling_shape_2.insert(0, Vector(x_0, 0, z_0 + max(geo_z) + ceiling_thickness))
-        ceiling_shape.insert(0, Vector(x_0, 0, z_0 + max(geo_z)))
+    for camera in deck_plan.cameras:
+        if camera_kinds is None or camera.kind in camera_kinds:
+            create_camera(camera, collections['cameras'], batch=batch)
+        yield
 
-        floor_shape.append(Vector(x_0 + deck_size.x, 0, z_0))
-        floor_shape_2.append(Vector(x_0 + deck_size.x, 0, z_0 - floor_thickness))
-        ceiling_shape_2.append(Vector(x_0 + deck_size.x, 0, z_0 + max(geo_z) + ceiling_thickness))
-        ceiling_shape.append(Vector(x_0 + deck_size.x, 0, z_0 + max(geo_z)))
+    logging.info("Linked " + str(batch.link()) + " objects of deck " + deck_plan.name + ".")
 
-        # Create deck floor
-        connect_shapes('Deck Floor R', floor_col, [floor_shape, floor_shape_2], material_fabric_black)
-        mirror(connect_shapes('Deck Floor L', floor_col, [floor_shape, floor_shape_2], material_fabric_black), y=True)
-        connect_shapes('Deck Ceiling R', floor_col, [ceiling_shape_2, ceiling_shape], None)
-        mirror(connect_shapes('Deck Ceiling L', floor_col, [ceiling_shape_2, ceiling_shape], None), y=True)
 
-        logging.info("Creating linings.")
+# Interval of the import steps of the interface and the time they may take per interval, in seconds
+IMPORT_TIMER_INTERVAL: float = 0.02
+IMPORT_FRAME_BUDGET: float = 0.05
 
-        # Note: Algorithm is currently designed for linings of 1m width!
+# Phases of an import in their order, see ImportProgress. The aircraft phases are repeated for every aircraft.
+IMPORT_PHASES: [str] = ['Checking layout', 'Loading materials', 'Loading templates', 'Creating fuselage',
+                        'Planning decks', 'Creating decks', 'Finishing']
+AIRCRAFT_PHASES: [str] = ['Creating fuselage', 'Planning decks', 'Creating decks']
 
-        sorted_x_values_left = geo_x.copy()
-        sorted_x_values_right = geo_x.copy()
+# Lateral gap between the fuselages of aircraft imported side by side
+VARIANT_GAP: float = 2.0
 
-        for step in range(0, int(deck_size.x)):
-            sorted_x_values_left.sort(key=lambda x: abs(x - step - 1.0))
-            sorted_x_values_right.sort(key=lambda x: abs(x - step))
 
-            closest_left: float = sorted_x_values_left[0]
-            closest_right: float = sorted_x_values_right[0]
-
-            closest_y_left: float = geo_y[0][geo_x.index(closest_left)]
-            closest_y_right: float = geo_y[0][geo_x.index(closest_right)]
-
-            corresponding_y_left_top: float = geo_y[len(geo_y) - 2][geo_x.index(closest_left)]
-            corresponding_y_right_top: float = geo_y[len(geo_y) - 2][
-                geo_x.index(closest_right)]
-
-            y_middle: float = (closest_y_left + closest_y_right) / 2.0
-            deck_width_ceiling: float = (corresponding_y_left_top + corresponding_y_right_top) / 2.0
+class ImportProgress:
+    """
+    Current phase of an import and the number of its finished steps
+    """
 
-            if abs(deck_width_ceiling - y_middle) < 0.10:
-                selected_lining = lining_obj_3
-                lining_pos_port: Vector = Vector(x_0 + step + 0.5, -min(deck_width_ceiling, y_middle), z_0)
-                lining_pos_star: Vector = Vector(x_0 + step + 0.5, min(deck_width_ceiling, y_middle), z_0)
-                lining_width: float = (y_middle - deck_width_ceiling)
+    __slots__ = ('phase', 'done', 'total', 'aircraft', 'n_aircraft')
 
-            elif deck_width_ceiling > y_middle:
-                selected_lining = lining_obj_2
-                lining_pos_port: Vector = Vector(x_0 + step + 0.5, -y_middle, z_0)
-                lining_pos_star: Vector = Vector(x_0 + step + 0.5, y_middle, z_0)
-                lining_width: float = y_middle - deck_width_ceiling
+    def __init__(self, phase: str, done: int, total: int, aircraft: int = 0, n_aircraft: int = 1) -> None:
+        self.phase = phase
+        self.done = done
+        self.total = total
+        self.aircraft = aircraft
+        self.n_aircraft = n_aircraft
 
-            else:
-                selected_lining = lining_obj
-                lining_pos_port: Vector = Vector(x_0 + step + 0.5, -deck_width_ceiling, z_0)
-                lining_pos_star: Vector = Vector(x_0 + step + 0.5, deck_width_ceiling, z_0)
-                lining_width: float = y_middle - deck_width_ceiling
+    def fraction(self) -> float:
+        """ Finished part of the whole import between 0 and 1, every phase counts the same """
 
-            lining_obj_port = create_from_template(selected_lining, lining_col, lining_pos_port, size_x=1,
-                                                   size_y=deck_size.z - overhead_bin_height, size_z=lining_width)
+        phase_index: int = IMPORT_PHASES.index(self.phase)
+        position: float = phase_index + (self.done / self.total if self.total > 0 else 1.0)
 
-            lining_obj_star = create_from_template(selected_lining, lining_col, lining_pos_star, size_x=1,
-                                                   size_y=deck_size.z - overhead_bin_height, size_z=lining_width)
-            mirror(lining_obj_star, y=True)
+        # The aircraft phases of all aircraft share the same part of the import
+        if self.phase in AIRCRAFT_PHASES:
+            first_index: int = IMPORT_PHASES.index(AIRCRAFT_PHASES[0])
+            position = first_index + (self.aircraft * len(AIRCRAFT_PHASES) + position - first_index) / self.n_aircraft
 
-            if closest_y_left != closest_y_right:
-                angle: float = math.atan((closest_y_right - closest_y_left) / (closest_right - closest_left))
+        return position / len(IMPORT_PHASES)
 
-                # Determine size of rotated lining
-                new_x_dimension: float = abs(closest_y_right - closest_y_left) / math.sin(angle)
-                delta_x_position: float = (y_middle - deck_width_ceiling) / math.tan(math.radians(90) - angle)
+    def __str__(self) -> str:
+        aircraft: str = " of aircraft " + str(self.aircraft + 1) + "/" + str(self.n_aircraft) \
+            if self.n_aircraft > 1 and self.phase in AIRCRAFT_PHASES else ""
+        return self.phase + aircraft + " (" + str(self.done) + "/" + str(self.total) + ")"
 
-                # Set properties of port element
-                lining_obj_port.rotation_euler[2] = - angle
-                lining_obj_port.location[0] = delta_x_position + lining_obj_port.location[0]
-                set_dimensions(lining_obj_port, size_x=new_x_dimension)
 
-                # Set properties of starboard element
-                lining_obj_star.rotation_euler[2] = angle
-                lining_obj_star.location[0] = delta_x_position + lining_obj_star.location[0]
-                set_dimensions(lining_obj_star, size_x=new_x_dimension)
+class AssetPool:
+    """
+    Materials and templates of an import, shared by all aircraft that are created in the scene
+    """
 
+    def __init__(self, texture_quality: str = 'final', link_assets: bool = False, style: str = None) -> None:
         """
-        lining_end_gap: float = x_dim_deck - int(x_dim_deck)
-
-        cover_location: Vector = Vector(int(x_dim_deck) + 0.5 * lining_end_gap, -deck_width_ceiling / 2.0, z)
-        create_from_template(lining_obj, lining_collection, cover_location, size_x=lining_end_gap, size_y=deck_height,
-                             size_z=y_dim_deck / 2.0 - deck_width_ceiling / 2.0)
-
-        cover_location: Vector = Vector(int(x_dim_deck) + 0.5 * lining_end_gap, deck_width_ceiling / 2.0, z)
-        mirror(create_from_template(lining_obj, lining_collection, cover_location, size_x=lining_end_gap,
-                                    size_y=deck_height,
-                                    size_z=y_dim_deck / 2.0 - deck_width_ceiling / 2.0), y=True)
+        :param texture_quality: resolution of the image textures, see TEXTURE_QUALITIES
+        :param link_assets: link materials and templates from the asset libraries instead of embedding them
+        :param style: template style, templates without a variant of this style use their default model
         """
-        # Luggage bins
-
-        logging.info("Creating floor elements.")
-
-        # Create floor elements
-        for floor_element in deck.findall(CPACS.floor_element_sub_path):
-
-            x_dim = float(floor_element.find(CPACS.object_length).text)
-            z_dim = float(floor_element.find(CPACS.object_height).text)
-            y_dim = float(floor_element.find(CPACS.object_width).text)
-
-            if floor_element.find(CPACS.floor_element_type).text == CPACS.floor_element_type_kitchen:
-                if galley_object is None:
-                    galley_object = load_obj_file('Galley\\galley_1', temp_col, material_dict)
-
-                floor_obj: bpy.types.Object = galley_object
-
-            elif floor_element.find(CPACS.floor_element_type).text == CPACS.custom_floor_element_type_curtain:
-                if curtain_object is None:
-                    curtain_object = load_obj_file('Divider\\curtain_1', temp_col, material_dict)
-
-                floor_obj: bpy.types.Object = curtain_object
-
-            elif floor_element.find(CPACS.floor_element_type).text == CPACS.custom_floor_element_type_bar:
-                if bar_object is None:
-                    bar_object = load_obj_file('Bar\\bar_1', temp_col, material_dict)
-
-                floor_obj: bpy.types.Object = bar_object
-
-            elif floor_element.find(CPACS.floor_element_type).text == CPACS.custom_floor_element_type_staircase:
-                if stairs_object is None:
-                    stairs_object = load_obj_file('Stairs\\stairs_1', temp_col, material_dict)
 
-                floor_obj: bpy.types.Object = stairs_object
-
-            elif floor_element.find(CPACS.floor_element_type).text == CPACS.custom_floor_element_type_table:
-                if table_object is None:
-                    table_object = load_obj_file('Tables\\table_1', temp_col, material_dict)
+        self.texture_quality = texture_quality
+        self.link_assets = link_assets
+        self.style = style
+        self.materials: dict = dict()
+        self.material_dict: dict = dict()
+        self.shape_materials: dict = dict()
+        self.templates: dict = dict()
+        self.template_collection: bpy.types.Collection = None
+
+    def load_steps(self):
+        """ Load all materials and the PLANNING_TEMPLATES, yields an ImportProgress after every step """
+
+        for material_name in LIBRARY_MATERIALS:
+            self.materials[material_name] = load_material(material_name, self.texture_quality, self.link_assets)
+            yield ImportProgress('Loading materials', len(self.materials), len(LIBRARY_MATERIALS))
+
+        materials: dict = self.materials
+        material_black: bpy.types.Material = create_material('Just_Black', Vector(0, 0, 0))
+
+        self.material_dict = dict([
+            ('cushion', materials['Fabric_blue_dark']),
+            ('pillow', materials['Fabric_black']),
+            ('window', materials['Light']),
+            ('light', materials['Light']),
+            ('armrest', materials['Plastic_dark']),
+            ('rail', materials['Metal_bright']),
+            ('tray_table', materials['Plastic_grey']),
+            ('housing', materials['Plastic_grey']),
+            ('bin', materials['Plastic_grey']),
+            ('arch', materials['Plastic_grey']),
+            ('base', materials['Plastic_dark']),
+            ('ventilation', materials['Plastic_dark']),
+            ('locker', materials['Metal_dark']),
+            ('table', materials['Wood']),
+            ('lamp', materials['Metal_dark']),
+            ('cover', materials['Plastic_grey']),
+            ('cover_inside', materials['Wood']),
+            ('lining', materials['Plastic_grey']),
+            ('walls', materials['Plastic_grey']),
+            ('divider_wall', materials['Plastic_grey']),
+            ('foot', materials['Plastic_grey']),
+            ('shelves', materials['Plastic_dark']),
+            ('tv_frame', materials['Plastic_dark']),
+            ('trolley', materials['Metal_dark']),
+            ('tv_display', material_black),
+            ('railing', materials['Metal_dark']),
+            ('stairs', materials['Fabric_black'])
+
+        ])
+        self.shape_materials = dict([('Fabric_black', materials['Fabric_black'])])
+
+        self.template_collection = bpy.data.collections.new('Templates')
+        bpy.context.scene.collection.children.link(self.template_collection)
+
+        if self.link_assets:
+            write_template_library(self.template_collection, self.material_dict)
+
+        # Further templates are loaded on their first use, so an import only loads the templates its cabins use
+        for template_name in PLANNING_TEMPLATES:
+            self.template(template_name)
+            yield ImportProgress('Loading templates', len(self.templates), len(PLANNING_TEMPLATES))
+
+    def template(self, template_name: str) -> 'bpy.types.Object':
+        """
+        Template object of the asset registry, loaded or linked on its first use
+        :param template_name:
+        :return:
+        """
 
-                floor_obj: bpy.types.Object = table_object
+        if template_name not in self.templates:
+            registry: AssetRegistry = asset_registry()
+            style: str = registry.style(template_name, self.style)
 
+            if self.link_assets:
+                self.templates[template_name] = link_template(template_name, style)
             else:
-                if wall_object is None:
-                    wall_object = load_obj_file('Divider\\divider_3', temp_col, material_dict)
-
-                floor_obj: bpy.types.Object = wall_object
-
-            """
-            elif floor_element.find(CPACS.floor_element_type).text == CPACS.floor_element_type_toilet:
-                if lavatory is None:
-                    lavatory = load_obj_file('Tables\\table_1', temp_col)
-
-                floor_obj: bpy.types.Object = lavatory
-            """
-
-            floor_location: Vector = Vector(x_0 + float(floor_element.find(CPACS.object_x).text) + x_dim / 2.0,
-                                            float(floor_element.find(CPACS.object_y).text), z_0)
-            bpy_floor_obj: bpy.types.Object = create_from_template(floor_obj, floor_col, floor_location, size_x=x_dim,
-                                                                   size_y=z_dim,
-                                                                   size_z=y_dim)
-            bpy_floor_obj.rotation_euler[2] = math.radians(float(
-                CPACS.getCustomOrElse(floor_element, CPACS.custom_object_rotation,
-                                      CPACS.custom_object_rotation_default)))
-
-        # Create cabin front and end
-        floor_location: Vector = Vector(x_0 - 0.05, 0, z_0)
-        create_from_template(wall_object, floor_col, floor_location, size_x=0.1, size_z=geo_y[0][0] * 2.0,
-                             size_y=deck_size.z)
-
-        floor_location: Vector = Vector(x_0 + deck_size.x + 0.05, 0, z_0)
-        create_from_template(wall_object, floor_col, floor_location, size_x=0.1,
-                             size_z=geo_y[0][len(geo_y[0]) - 1] * 2.0, size_y=deck_size.z)
-
-        logging.info("Creating overhead bins.")
-
-        luggage_bin_object.select_set(True)
-        bin_width: float = bpy.context.selected_objects[0].dimensions[2]
-        luggage_bin_object.select_set(False)
+                self.templates[template_name] = load_obj_file(registry.model(template_name, style),
+                                                              self.template_collection, self.material_dict)
 
-        ceiling_object.select_set(True)
-        arch_height: float = bpy.context.selected_objects[0].dimensions[1]
-        ceiling_object.select_set(False)
+        return self.templates[template_name]
 
-        '''
-        ceiling_middle_object.select_set(True)
-        arch_width: float = bpy.context.selected_objects[0].dimensions[1]
-        ceiling_middle_object.select_set(False)
-        '''
-
-        aisles = deck.findall(CPACS.aisle_sub_path)
-
-        for aisle in aisles:
-            aisle_x: [float] = [float(x) for x in CPACS.getStringArray(aisle, CPACS.object_x)]
-            aisle_y: [float] = [float(y) for y in CPACS.getStringArray(aisle, CPACS.object_y)]
-
-            for i in range(len(aisle_x) - 1):
-                aisle_y_pos_start: float = aisle_y[i]
-                aisle_y_pos_end: float = aisle_y[i + 1]
-
-                # Lights within aisle step
-                aisle_x_pos_start: float = aisle_x[i]
-                aisle_x_pos_end: float = aisle_x[i + 1]
-
-                general_x_pos: float = aisle_x_pos_start + (aisle_x_pos_end - aisle_x_pos_start) / 2.0
-                general_y_pos: float = aisle_y_pos_start + (aisle_y_pos_end - aisle_y_pos_start) / 2.0
-
-                # Generate bins
-                luggage_bin_position: Vector = Vector(x_0 + general_x_pos,
-                                                      general_y_pos - luggage_bins_aisle_indent - bin_width / 2.0,
-                                                      z_0 + deck_size.z - overhead_bin_height / 2.0)
-
-                create_from_template(luggage_bin_object, ceiling_col, luggage_bin_position,
-                                     size_x=aisle_x_pos_end - aisle_x_pos_start, size_y=overhead_bin_height)
+    def load_templates(self, template_names: [str], workers: int = None) -> None:
+        """
+        Load several templates at once, their .obj models are read in worker processes
+        :param template_names:
+        :param workers: number of worker processes, see read_obj_files()
+        :return:
+        """
 
-                # Determine gap to closest lining
-                gap_y_starboard: float = deck_size_y_bins / 2.0 - general_y_pos - luggage_bins_aisle_indent - bin_width
-                gap_y_port: float = deck_size_y_bins / 2.0 + general_y_pos - luggage_bins_aisle_indent - bin_width
+        missing: [str] = [template_name for template_name in dict.fromkeys(template_names)
+                          if template_name not in self.templates]
 
-                if gap_y_starboard > 0 and gap_y_starboard < bin_width:
-                    luggage_filler_position: Vector = Vector(x_0 + general_x_pos,
-                                                             general_y_pos + luggage_bins_aisle_indent + bin_width + gap_y_starboard / 2.0,
-                                                             z_0 + deck_size.z - overhead_bin_height / 2.0)
+        if not self.link_assets and len(missing) > 1:
+            registry: AssetRegistry = asset_registry()
+            model_paths: [str] = [registry.model(template_name, registry.style(template_name, self.style))
+                                  for template_name in missing]
 
-                    create_from_template(ceiling_middle_object, ceiling_col, luggage_filler_position,
-                                         size_x=aisle_x_pos_end - aisle_x_pos_start,
-                                         size_y=overhead_bin_height,
-                                         size_z=gap_y_starboard)
+            for template_name, model_path, model in zip(missing, model_paths, read_obj_files(
+                    [model_file_path(model_path) for model_path in model_paths], workers)):
+                self.templates[template_name] = load_obj_file(model_path, self.template_collection,
+                                                              self.material_dict, model)
 
-                # Generate bins
-                luggage_bin_position_right: Vector = Vector(x_0 + general_x_pos,
-                                                            general_y_pos + luggage_bins_aisle_indent + bin_width / 2.0,
-                                                            z_0 + deck_size.z - overhead_bin_height / 2.0)
+        for template_name in missing:
+            self.template(template_name)
 
-                mirror(create_from_template(luggage_bin_object, ceiling_col, luggage_bin_position_right,
-                                            size_x=aisle_x_pos_end - aisle_x_pos_start, size_y=overhead_bin_height),
-                       y=True)
+    def template_dimensions(self) -> dict:
+        """ Dimensions of the PLANNING_TEMPLATES """
 
-                if 0 < gap_y_port < bin_width:
-                    luggage_filler_position: Vector = Vector(x_0 + general_x_pos,
-                                                             general_y_pos - luggage_bins_aisle_indent - bin_width - gap_y_port / 2.0,
-                                                             z_0 + deck_size.z - overhead_bin_height / 2.0)
+        return dict([(template_name, mesh_dimensions(self.templates[template_name].data))
+                     for template_name in PLANNING_TEMPLATES])
 
-                    mirror(create_from_template(ceiling_middle_object, ceiling_col, luggage_filler_position,
-                                                size_x=aisle_x_pos_end - aisle_x_pos_start, size_y=overhead_bin_height,
-                                                size_z=gap_y_port), y=True)
+    def remove_templates(self) -> None:
+        bpy.data.collections.remove(self.template_collection)
 
-                # Generate bin arch
-                ceiling_arch_pos: Vector = Vector(x_0 + general_x_pos, general_y_pos,
-                                                  z_0 + deck_size.z - arch_height * 0.1)
 
-                create_from_template(ceiling_object, ceiling_col, ceiling_arch_pos,
-                                     size_x=aisle_x_pos_end - aisle_x_pos_start,
-                                     size_z=2 * luggage_bins_aisle_indent + bin_width)
+def create_from_cpacs(path: str, enum_bc_seat_type=None, planning_workers: int = None,
+                      light_budget: int = LIGHT_BUDGET_DEFAULT, camera_kinds: [str] = None,
+                      validation: str = 'warn', texture_quality: str = 'final', link_assets: bool = False,
+                      render_profile: str = 'review', symmetric: bool = False) -> None:
+    """ Import a CPACS file in one go, see import_steps() """
 
-        logging.info("Creating seats.")
+    for _ in import_steps(path, enum_bc_seat_type, planning_workers, light_budget, camera_kinds, validation,
+                          texture_quality, link_assets, render_profile, symmetric):
+        pass
 
-        # loop through seat groups
-        for seat_group in deck.findall(CPACS.seat_element_sub_path):
-            number_of_seats: int = int(seat_group.find(CPACS.seats_per_group).text)
 
-            x_dim: float = float(seat_group.find(CPACS.object_length).text)
-            y_dim_total: float = float(seat_group.find(CPACS.object_width).text)
-            z_dim: float = float(seat_group.find(CPACS.object_height).text)
+def create_variants_from_cpacs(paths: [str], planning_workers: int = None, light_budget: int = LIGHT_BUDGET_DEFAULT,
+                               camera_kinds: [str] = None, validation: str = 'warn', texture_quality: str = 'final',
+                               link_assets: bool = False, render_profile: str = 'review',
+                               symmetric: bool = False, plans: [str] = None) -> None:
+    """ Import several CPACS files side by side in one go, see import_steps() """
 
-            x: float = float(seat_group.find(CPACS.object_x).text)
-            y_total: float = float(seat_group.find(CPACS.object_y).text) - y_dim_total / 2.0
+    for _ in import_steps(paths, None, planning_workers, light_budget, camera_kinds, validation, texture_quality,
+                          link_assets, render_profile, symmetric, plans):
+        pass
 
-            # economy seats are created in groups
-            if seat_group.find(CPACS.seat_element_type).text == CPACS.seat_element_type_economy:
-                if number_of_seats == 5:
-                    if seat_object_5 is None:
-                        seat_object_5 = load_obj_file('Seats\\ec_5', temp_col, material_dict)
 
-                    eco_seat: bpy.types.Object = seat_object_5
+def import_steps(path, enum_bc_seat_type=None, planning_workers: int = None,
+                 light_budget: int = LIGHT_BUDGET_DEFAULT, camera_kinds: [str] = None,
+                 validation: str = 'warn', texture_quality: str = 'final', link_assets: bool = False,
+                 render_profile: str = 'review', symmetric: bool = False, plans: [str] = None):
+    """
+    Import a CPACS file step by step. Yields an ImportProgress after every step, so the import can be spread over
+    several frames. Closing the generator cancels the import and removes everything it created so far.
+    :param path: CPACS file, or a list of CPACS files to import side by side. Each of them gets its own collection,
+    all of them share the materials and templates.
+    :param enum_bc_seat_type: template style, see DEFAULT_ASSETS
+    :param planning_workers: number of deck planning processes, None for one per deck and core, 1 to plan serially
+    :param light_budget: maximum number of cabin lights per aircraft, None for no limit
+    :param camera_kinds: kinds of cameras to create, see CAMERA_KINDS, None for all
+    :param validation: handling of cabin layout issues, see VALIDATION_MODES
+    :param texture_quality: resolution of the image textures, see TEXTURE_QUALITIES
+    :param link_assets: link materials and templates from the asset libraries instead of embedding them
+    :param render_profile: Cycles settings of the scene, see RENDER_PROFILES
+    :param symmetric: create one half of the mirrored cabin shell and mirror it at the center plane
+    :param plans: plan handoff file of every CPACS file, see publish_plans(). The CPACS files are then neither
+    parsed nor planned, their layout issues are those found by the publisher.
+    :return:
+    """
+    paths: [str] = [path] if isinstance(path, str) else list(path)
+    yield ImportProgress('Checking layout', 0, len(paths))
 
-                elif number_of_seats == 4:
-                    if seat_object_4 is None:
-                        seat_object_4 = load_obj_file('Seats\\ec_4', temp_col, material_dict)
+    aircraft: [XMLTree.Element] = []
+    handoffs: [PlanHandoff] = []
+    layout_issues: dict = dict()
 
-                    eco_seat: bpy.types.Object = seat_object_4
+    for index, cpacs_path in enumerate(paths):
+        if plans is not None:
+            logging.info("Creating aircraft model of '" + cpacs_path + "' from the plans in '" + plans[index] + "'.")
+            handoff: PlanHandoff = attach_plans(plans[index])
+            aircraft.append(None)
+            handoffs.append(handoff)
+            layout_issues[cpacs_path] = handoff.layout_issues
 
-                elif number_of_seats == 3:
-                    if seat_object_3 is None:
-                        seat_object_3 = load_obj_file('Seats\\ec_3', temp_col, material_dict)
+        else:
+            logging.info("Creating aircraft model from '" + cpacs_path + "'.")
+            cpacs = ETree.parse(cpacs_path).getroot()
+            aircraft.append(cpacs)
+            handoffs.append(None)
 
-                    eco_seat: bpy.types.Object = seat_object_3
+            # Check the cabin layout before the scene is touched
+            layout_issues[cpacs_path] = check_layout(cpacs, cpacs_path, validation)
 
-                elif number_of_seats == 2:
-                    if seat_object_2 is None:
-                        seat_object_2 = load_obj_file('Seats\\ec_2', temp_col, material_dict)
+        yield ImportProgress('Checking layout', len(aircraft), len(paths))
 
-                    eco_seat: bpy.types.Object = seat_object_2
+    # Clear all exiting collections except the cameras
+    for c in bpy.data.collections:
+        if c.name != "World":
+            bpy.data.collections.remove(c)
 
-                else:
-                    if seat_object_1 is None:
-                        seat_object_1 = load_obj_file('Seats\\ec_1', temp_col, material_dict)
+    # Remove everything the previous import left behind
+    logging.info("Removed " + str(purge_orphans()) + " unused data blocks of previous imports.")
+    data_block_snapshot: dict = snapshot_data_blocks()
 
-                    eco_seat: bpy.types.Object = seat_object_1
+    try:
+        asset_pool: AssetPool = AssetPool(texture_quality, link_assets, enum_bc_seat_type)
+        yield from asset_pool.load_steps()
+
+        # Aircraft side by side along the y axis, the first one stays at the origin
+        offset_y: float = 0.0
+        previous_half_width: float = None
+        cameras: [bpy.types.Object] = []
+
+        for index, (cpacs_path, cpacs, handoff) in enumerate(zip(paths, aircraft, handoffs)):
+            if len(paths) > 1:
+                parent_collection: bpy.types.Collection = bpy.data.collections.new(
+                    os.path.splitext(os.path.basename(cpacs_path))[0])
+                bpy.context.scene.collection.children.link(parent_collection)
+            else:
+                parent_collection: bpy.types.Collection = bpy.context.scene.collection
 
-                seat_position: Vector = Vector(x_0 + x + x_dim / 2.0, y_total + y_dim_total / 2.0, z_0)
-                new_seat: bpy.types.Object = create_from_template(eco_seat, seats_col, seat_position,
-                                                                  size_x=x_dim, size_y=z_dim,
-                                                                  size_z=y_dim_total)
+            aircraft_build: AircraftBuild = AircraftBuild(cpacs, asset_pool, parent_collection, handoff)
+            yield from aircraft_build.steps(planning_workers, light_budget, camera_kinds,
+                                            layout_issues.get(cpacs_path) if validation == 'mark' else None,
+                                            index, len(paths), symmetric)
 
-                if y_total < 0 and number_of_seats == 2:
-                    mirror(new_seat, y=True)
+            if previous_half_width is not None:
+                offset_y += previous_half_width + VARIANT_GAP + aircraft_build.half_width
+                aircraft_build.move(Vector(0.0, offset_y, 0.0))
+            previous_half_width = aircraft_build.half_width
+            cameras += list(aircraft_build.collections['cameras'].objects)
 
-                new_seat.rotation_euler[2] = math.radians(float(
-                    CPACS.getCustomOrElse(seat_group, CPACS.custom_object_rotation,
-                                          CPACS.custom_object_rotation_default)))
+        if len(cameras) > 0:
+            bpy.context.scene.camera = cameras[0]
 
-            else:
-                # loop through all other seats
-                for seatID in range(number_of_seats):
-                    y_dim_per_seat: float = y_dim_total / number_of_seats
-                    y_pos_per_seat: float = y_total + seatID * y_dim_per_seat
+        logging.info("Creating world objects.")
+        create_world()
+        apply_render_profile(bpy.context.scene, render_profile)
 
-                    seat_position_busi: Vector = Vector(x_0 + x + x_dim / 2.0, y_pos_per_seat + y_dim_per_seat / 2.0,
-                                                        z_0)
-                    if seat_group.find(CPACS.seat_element_type).text == CPACS.seat_element_type_business:
-                        single_seat_obj: bpy.types.Object = busi_seat_object
-                    else:
-                        single_seat_obj: bpy.types.Object = preco_seat_object
+        asset_pool.remove_templates()
+        yield ImportProgress('Finishing', 0, 1)
 
-                    new_single_seat: bpy.types.Object = create_from_template(single_seat_obj, seats_col,
-                                                                             seat_position_busi, size_x=x_dim,
-                                                                             size_y=z_dim, size_z=y_dim_per_seat)
-                    new_single_seat.rotation_euler[2] = math.radians(
-                        float(CPACS.getCustomOrElse(seat_group, CPACS.custom_object_rotation,
-                                                    CPACS.custom_object_rotation_default)))
+    except BaseException:
+        logging.info("Import cancelled. Removed " + str(remove_new_data_blocks(data_block_snapshot)) +
+                     " data blocks of the import.")
+        raise
 
-                    if seatID % 2 == 1:
-                        mirror(new_single_seat, y=True)
+    tag_new_data_blocks(data_block_snapshot)
+    logging.info("Removed " + str(purge_orphans()) + " unused data blocks of this import.")
 
-    logging.info("Creating world objects.")
-    create_world()
+    logging.info("Import completed. Data blocks:")
+    report_data_blocks()
+    yield ImportProgress('Finishing', 1, 1)
 
-    bpy.data.collections.remove(temp_col)
 
-    logging.info("Import completed.")
+class AircraftBuild:
+    """
+    Fuselage, decks, lights and cameras of one aircraft in its own collections
+    """
 
+    def __init__(self, cpacs: XMLTree.Element, asset_pool: AssetPool, parent_collection: 'bpy.types.Collection',
+                 handoff: PlanHandoff = None):
+        """
+        :param cpacs:
+        :param asset_pool: materials and templates of the import
+        :param parent_collection: collection of the element collections, the scene collection for a single aircraft
+        :param handoff: published plans of the aircraft, which replace the CPACS file, see attach_plans()
+        """
 
-def run_main_parser(file_path: str, business_seat_option) -> [str]:
-    """
+        self.cpacs = cpacs
+        self.handoff = handoff
+        self.asset_pool = asset_pool
+        self.half_width: float = 0.0
+
+        # create new collections for all elements
+        self.collections: dict = dict([('ceiling', bpy.data.collections.new('Ceiling')),
+                                       ('lining', bpy.data.collections.new('Lining')),
+                                       ('seats', bpy.data.collections.new('Seats')),
+                                       ('floor', bpy.data.collections.new('Floor Elements')),
+                                       ('fuselage', bpy.data.collections.new('Fuselage')),
+                                       ('lights', bpy.data.collections.new('Lights')),
+                                       ('cameras', bpy.data.collections.new('Cameras'))])
+
+        # link collections to scene
+        for collection in self.collections.values():
+            parent_collection.children.link(collection)
+
+    def steps(self, planning_workers: int = None, light_budget: int = LIGHT_BUDGET_DEFAULT,
+              camera_kinds: [str] = None, layout_issues: dict = None, aircraft: int = 0, n_aircraft: int = 1,
+              symmetric: bool = False):
+        """
+        Create the fuselage and all decks of the aircraft, yields an ImportProgress after every step
+        :param planning_workers:
+        :param light_budget:
+        :param camera_kinds:
+        :param layout_issues: layout issue messages by element path, objects of these elements are marked red
+        :param aircraft: index of this aircraft among all aircraft of the import
+        :param n_aircraft:
+        :param symmetric: create one half of the mirrored cabin shell, see symmetric_half()
+        :return:
+        """
 
-    :param file_path:
-    :param business_seat_option:
-    :return:
-    """
-    # init logger
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s: %(message)s')
-    logging.info("Running CPACS import script to Blender.")
-    logging.info("Created by Marc Engelmann @ Bauhaus Luftfahrt e.V.")
+        cpacs: XMLTree.Element = self.cpacs
+        asset_pool: AssetPool = self.asset_pool
+        collections: dict = self.collections
+        deck_planner: DeckPlanner = None
 
-    create_from_cpacs(file_path, business_seat_option)
+        if self.handoff is not None:
+            logging.info("Using published deck plans.")
+            fuselage_shapes, fuselage_length, fuselage_height = \
+                self.handoff.fuselage_shapes, self.handoff.fuselage_length, self.handoff.fuselage_height
 
-    return {'FINISHED'}
+        else:
+            logging.info("Planning decks.")
+
+            # Deck planning does not touch Blender, so it runs in worker processes while the fuselage is created
+            deck_planner = DeckPlanner([ETree.tostring(deck) for deck in cpacs.findall(CPACS.deck_path)],
+                                       asset_pool.template_dimensions(), planning_workers, use_cache=True)
+            fuselage_shapes, fuselage_length, fuselage_height = plan_fuselage(cpacs)
+
+        # Only create fuselage shape if model supports it
+        if len(fuselage_shapes) > 0:
+            fuselage_object: bpy.types.Object = connect_shapes("Outer Fuselage", collections['fuselage'],
+                                                               fuselage_shapes, None)
+            fuselage_object[CULLING_EXTERIOR] = True
+            self.half_width = max(abs(point.y) for shape in fuselage_shapes for point in shape)
+
+        try:
+            yield ImportProgress('Creating fuselage', 1, 1, aircraft, n_aircraft)
+
+            # Let the worker processes finish while the interface stays responsive
+            while deck_planner is not None and not deck_planner.done():
+                yield ImportProgress('Planning decks', 0, len(deck_planner.deck_xml), aircraft, n_aircraft)
+
+        except BaseException:
+            if deck_planner is not None:
+                deck_planner.cancel()
+            raise
+
+        deck_plans: [DeckPlan] = deck_planner.result() if deck_planner is not None else self.handoff.deck_plans
+        apply_light_budget(deck_plans, light_budget)
+
+        # The other half of the shell is the mirror image at the center plane, which moves with the aircraft
+        mirror_plane: bpy.types.Object = None
+        if symmetric:
+            deck_plans = [symmetric_half(deck_plan) for deck_plan in deck_plans]
+            mirror_plane = bpy.data.objects.new('Center Plane', None)
+            collections['ceiling'].objects.link(mirror_plane)
+
+        # Read the models of all templates the decks use at once
+        asset_pool.load_templates([placement.template for deck_plan in deck_plans
+                                   for placement in deck_plan.placements], planning_workers)
+        self.half_width = max([self.half_width] + [deck_plan.size.y / 2.0 for deck_plan in deck_plans])
+
+        # Create all Blender objects in document order of the decks
+        n_objects: int = sum(len(deck_plan.shapes) + len(deck_plan.placements) + len(deck_plan.lights) +
+                             len(deck_plan.cameras) for deck_plan in deck_plans)
+        n_created: int = 0
+        for deck_plan in deck_plans:
+            logging.info("Creating deck " + deck_plan.name + ".")
+            for _ in build_deck_steps(deck_plan, collections, asset_pool, camera_kinds, layout_issues, mirror_plane):
+                n_created += 1
+                yield ImportProgress('Creating decks', n_created, n_objects, aircraft, n_aircraft)
+
+        if camera_kinds is None or 'exterior' in camera_kinds:
+
+            # Fall back to the cabin extent if the model has no fuselage
+            if fuselage_length == 0.0 and len(deck_plans) > 0:
+                fuselage_length = max(deck_plan.origin.x + deck_plan.size.x for deck_plan in deck_plans)
+                fuselage_height = max(deck_plan.origin.z + deck_plan.size.z for deck_plan in deck_plans)
+
+            create_camera(plan_exterior_camera(fuselage_length, fuselage_height), collections['cameras'])
+
+    def move(self, offset: Vector) -> None:
+        """ Move all objects of the aircraft """
+
+        for collection in self.collections.values():
+            for element in collection.objects:
+                element.location[0] += offset.x
+                element.location[1] += offset.y
+                element.location[2] += offset.z
 
 
 def run_as_script() -> None:
     """
-
+    Launch arguments after '--': [CPACS file ...] [--cameras KIND ...] [--render DIRECTORY] [--validation MODE]
+    [--cull [MARGIN]] [--texture-quality QUALITY] [--render-profile PROFILE] [--output FILE] [--compress]
+    [--link-assets] [--symmetric] [--force] [--plans FILE ...] [--share INDEX COUNT]
+    The build is skipped if the output was already built from the same files with the same options.
     :return:
     """
     # init logger
@@ -1148,6 +4455,36 @@ def run_as_script() -> None:
     else:
         argv = sys.argv[sys.argv.index("--") + 1:]  # get all args after "--"
 
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(prog='blender --background --python addon.py --')
+    parser.add_argument('cpacs', nargs='*', default=None, help="CPACS files to import, several are placed side by side")
+    parser.add_argument('--cameras', nargs='+', choices=CAMERA_KINDS, default=None, help="kinds of cameras to place")
+    parser.add_argument('--render', metavar='DIRECTORY', default=None,
+                        help="render all cameras into this directory in one session")
+    parser.add_argument('--cull', metavar='MARGIN', type=float, nargs='?', const=CULLING_MARGIN_DEFAULT, default=None,
+                        help="exclude objects each camera can not see from its render, with a margin in meters")
+    parser.add_argument('--validation', choices=VALIDATION_MODES, default='warn',
+                        help="handling of cabin layout issues")
+    parser.add_argument('--texture-quality', choices=list(TEXTURE_QUALITIES), default='final',
+                        help="resolution of the image textures")
+    parser.add_argument('--render-profile', choices=list(RENDER_PROFILES), default='review',
+                        help="Cycles sampling, bounce, denoising and simplification settings")
+    parser.add_argument('--output', metavar='FILE', default=OUTPUT_PATH_DEFAULT, help="path of the saved .blend file")
+    parser.add_argument('--compress', action='store_true', help="compress the saved .blend file")
+    parser.add_argument('--link-assets', action='store_true',
+                        help="link materials and templates from the asset libraries instead of embedding them")
+    parser.add_argument('--symmetric', action='store_true',
+                        help="create one half of the symmetric cabin shell and mirror it at the center plane")
+    parser.add_argument('--force', action='store_true', help="build even if the output is up to date")
+    parser.add_argument('--plans', metavar='FILE', nargs='+', default=None,
+                        help="plan handoff file of every CPACS file, the CPACS files are neither parsed nor planned")
+    parser.add_argument('--share', metavar=('INDEX', 'COUNT'), type=int, nargs=2, default=None,
+                        help="render every COUNT-th camera starting with INDEX, only share 0 saves the output and the "
+                             "build key is left to the process that started the shares")
+    arguments: argparse.Namespace = parser.parse_args(argv)
+
+    if arguments.plans is not None and len(arguments.plans) != len(arguments.cpacs):
+        parser.error("--plans needs one plan handoff file per CPACS file")
+
     logging.info("####################### Blender output start. #######################")
     logging.info("Running CPACS import script to Blender.")
     logging.info("Created by Marc Engelmann @ Bauhaus Luftfahrt e.V.")
@@ -1156,18 +4493,38 @@ def run_as_script() -> None:
     for arg in argv:
         logging.info("\t " + arg)
 
-    # Run main function
-    if len(argv) == 0:
-        create_from_cpacs(
-            path=os.path.join(os.path.join(os.environ['USERPROFILE']), 'Desktop') + '/workflow/output/output_file.xml')
-    else:
-        create_from_cpacs(path=argv[0])
+    cpacs_paths: [str] = arguments.cpacs if len(arguments.cpacs) > 0 else [
+        os.path.join(os.path.join(os.environ['USERPROFILE']), 'Desktop') + '/workflow/output/output_file.xml']
+    key: str = build_key(cpacs_paths, build_options(arguments.cameras, arguments.validation, arguments.texture_quality,
+                                                    arguments.link_assets, arguments.compress, arguments.render,
+                                                    arguments.render_profile, arguments.cull, arguments.symmetric))
 
-    # create_from_cpacs(file_path, generate_fuselage)
+    if not arguments.force and is_build_current(arguments.output, key):
+        logging.info("Output " + arguments.output + " is up to date. Skipping the build.")
 
-    save_path: str = os.path.join(os.path.join(os.environ['USERPROFILE']), 'Desktop') + '/cabin.blend'
-    logging.info("Saving project to " + save_path)
-    bpy.ops.wm.save_as_mainfile(filepath=save_path)
+    else:
+        # Run main function
+        create_variants_from_cpacs(paths=cpacs_paths, camera_kinds=arguments.cameras,
+                                   validation=arguments.validation, texture_quality=arguments.texture_quality,
+                                   link_assets=arguments.link_assets, render_profile=arguments.render_profile,
+                                   symmetric=arguments.symmetric, plans=arguments.plans)
+
+        # create_from_cpacs(file_path, generate_fuselage)
+
+        share_index, share_count = arguments.share if arguments.share is not None else (0, 1)
+        bpy.context.scene[BUILD_KEY_PROPERTY] = key
+        if share_index == 0:
+            save_cabin(arguments.output, arguments.compress)
+
+        if arguments.render is not None:
+            stats_file: str = render_stats_file(share_index if arguments.share is not None else None)
+            for image_path in render_cameras(arguments.render, scene_cameras()[share_index::share_count],
+                                             cull_margin=arguments.cull, stats_file=stats_file):
+                logging.info("Rendered " + image_path)
+
+        # Only a complete build is recorded, an interrupted one is repeated by the next run
+        if arguments.share is None:
+            write_build_key(arguments.output, key)
 
     # Kill app if it runs in background mode
     if bpy.app.background:
@@ -9,25 +9,388 @@
 
 """
 
-import subprocess
+import argparse
+import json
+import logging
 import os
+import subprocess
+import sys
+import tempfile
+import time
 
-if __name__ == "__main__":
+import addon
+
+BLENDER_DEFAULT: str = 'blender'
+
+
+def command_parse(arguments: argparse.Namespace) -> int:
+    """
+    Parse a CPACS file and list its decks
+    :param arguments:
+    :return: exit code
+    """
+
+    start: float = time.perf_counter()
+    decks: [addon.DeckData] = addon.query_cabin(arguments.cpacs)
+
+    for deck_data in decks:
+        print(deck_data.name + ": " + str(len(deck_data.seat_groups)) + " seat groups, " +
+              str(len(deck_data.floor_elements)) + " floor elements, " + str(len(deck_data.aisles)) + " aisles")
+
+    print("Parsed " + str(len(decks)) + " decks in " + format_time(start))
+    return 0
+
+
+def command_plan(arguments: argparse.Namespace) -> int:
+    """
+    Plan all decks of a CPACS file without creating any geometry
+    :param arguments:
+    :return: exit code
+    """
+
+    start: float = time.perf_counter()
+    cpacs = addon.ETree.parse(arguments.cpacs).getroot()
+    deck_plans: [addon.DeckPlan] = addon.plan_decks(cpacs, addon.planning_template_dimensions(), arguments.workers,
+                                                    use_cache=not arguments.no_cache)
+
+    for deck_plan in deck_plans:
+        print(deck_plan.name + ": " + str(len(deck_plan.placements)) + " objects, " + str(len(deck_plan.shapes)) +
+              " shapes, " + str(len(deck_plan.lights)) + " lights, " + str(len(deck_plan.cameras)) + " cameras")
+
+    print("Planned " + str(len(deck_plans)) + " decks in " + format_time(start))
+    return 0
+
+
+def command_validate(arguments: argparse.Namespace) -> int:
+    """
+    Check the cabin layout, fails if any issue is found
+    :param arguments:
+    :return: exit code
+    """
+
+    start: float = time.perf_counter()
+    issues: [addon.ValidationIssue] = addon.validate_decks(addon.ETree.parse(arguments.cpacs).getroot())
+
+    for issue in issues:
+        print(issue.kind + ": " + issue.message)
+
+    print(str(len(issues)) + " layout issues found in " + format_time(start))
+    return 1 if issues else 0
+
+
+def command_stats(arguments: argparse.Namespace) -> int:
+    """
+    Print layout statistics of all decks
+    :param arguments:
+    :return: exit code
+    """
+
+    stats: [dict] = []
+
+    for deck_data in addon.query_cabin(arguments.cpacs):
+        seats = deck_data.seats()
+        stats.append(dict([
+            ('deck', deck_data.name),
+            ('seats', len(seats)),
+            ('seats_by_type', addon.count_by_type(seats)),
+            ('seat_groups_by_type', addon.count_by_type(deck_data.seat_groups)),
+            ('floor_elements_by_type', addon.count_by_type(deck_data.floor_elements)),
+            ('floor_area_by_type', addon.floor_area_by_type(deck_data.floor_elements)),
+            ('mean_pitch_by_type', dict([(seat_type, float(pitches.mean()) if len(pitches) else None)
+                                         for seat_type, pitches in addon.seat_pitches(seats).items()])),
+            ('min_aisle_width', [float(widths[:, 1].min()) if len(widths) else None
+                                 for widths in addon.aisle_widths(deck_data)])]))
+
+    if arguments.json:
+        print(json.dumps(stats, indent=2))
+        return 0
+
+    for deck_stats in stats:
+        print(deck_stats['deck'])
+        for key, value in deck_stats.items():
+            if key != 'deck':
+                print("\t" + key + ": " + str(value))
+
+    return 0
+
+
+def command_cache_warm(arguments: argparse.Namespace) -> int:
+    """
+    Plan all decks of the CPACS files into the plan cache, so the next Blender import skips planning
+    :param arguments:
+    :return: exit code
+    """
+
+    start: float = time.perf_counter()
+    template_dimensions: dict = addon.planning_template_dimensions()
+
+    for cpacs_path in arguments.cpacs:
+        addon.plan_decks(addon.ETree.parse(cpacs_path).getroot(), template_dimensions, arguments.workers,
+                         use_cache=True)
+        print("Cached plans of " + cpacs_path)
+
+    print("Cache " + os.path.join(addon.CACHE_DIRECTORY, 'plans') + " warmed in " + format_time(start))
+    return 0
+
+
+def command_golden(arguments: argparse.Namespace) -> int:
+    """
+    Compare the plans of reference CPACS files with their golden files. Fails if any element moved or changed size,
+    or if parsing or planning takes longer than recorded by more than the margin. Golden files are only written with
+    --update.
+    :param arguments:
+    :return: exit code
+    """
+
+    template_dimensions: dict = addon.planning_template_dimensions()
+    n_failed: int = 0
+
+    for cpacs_path in arguments.cpacs:
+        golden_path: str = os.path.join(arguments.golden,
+                                        os.path.splitext(os.path.basename(cpacs_path))[0] + addon.GOLDEN_SUFFIX)
+
+        # The fastest of several runs is least affected by other load on the machine
+        parse_time: float = best_time(lambda: addon.query_cabin(cpacs_path), arguments.repeat)
+        cpacs = addon.ETree.parse(cpacs_path).getroot()
+        plan_time: float = best_time(lambda: addon.plan_decks(cpacs, template_dimensions, 1), arguments.repeat)
+        record: dict = addon.plan_record(addon.plan_decks(cpacs, template_dimensions, 1),
+                                         addon.plan_fuselage(cpacs)[0])
+
+        if arguments.update:
+            os.makedirs(arguments.golden, exist_ok=True)
+            with open(golden_path, 'w') as golden_file:
+                json.dump(dict([('parse_time', parse_time), ('plan_time', plan_time), ('plan', record)]), golden_file,
+                          indent=1)
+            print("Updated " + golden_path)
+            continue
+
+        if not os.path.isfile(golden_path):
+            print(cpacs_path + ": no golden file " + golden_path + ", record it with --update")
+            n_failed += 1
+            continue
+
+        with open(golden_path) as golden_file:
+            golden: dict = json.load(golden_file)
+
+        failures: [str] = addon.compare_records(golden['plan'], record, arguments.tolerance)
+        for stage, time_taken in (('parse_time', parse_time), ('plan_time', plan_time)):
+            if time_taken > max(golden[stage] * (1.0 + arguments.time_margin), golden[stage] + addon.GOLDEN_TIME_SLACK):
+                failures.append(stage + ": {:.3f} s instead of {:.3f} s".format(time_taken, golden[stage]))
+
+        for failure in failures[:arguments.max_differences]:
+            print(cpacs_path + ": " + failure)
+        if len(failures) > arguments.max_differences:
+            print(cpacs_path + ": " + str(len(failures) - arguments.max_differences) + " more differences")
+
+        print(cpacs_path + (": failed" if failures else ": passed") +
+              ", parsed in {:.3f} s, planned in {:.3f} s".format(parse_time, plan_time))
+        n_failed += bool(failures)
+
+    return 1 if n_failed else 0
+
+
+def command_blender(arguments: argparse.Namespace) -> int:
+    """
+    Build the Blender file in a background Blender, and render it if requested. Blender is not started if the output
+    is up to date.
+    :param arguments:
+    :return: exit code of Blender
+    """
+
+    render_directory: str = arguments.directory if arguments.command == 'render' else None
+    cull_margin: float = arguments.cull if arguments.command == 'render' else None
+    key: str = addon.build_key(arguments.cpacs, addon.build_options(
+        arguments.cameras, arguments.validation, arguments.texture_quality, arguments.link_assets,
+        arguments.compress, render_directory, arguments.render_profile, cull_margin, arguments.symmetric))
+
+    if not arguments.force and addon.is_build_current(arguments.output, key):
+        print(arguments.output + " is up to date.")
+        return 0
+
+    args: [str] = [arguments.blender, '--background', '--python', os.path.abspath(addon.__file__), '--',
+                   *[os.path.abspath(path) for path in arguments.cpacs], '--validation', arguments.validation,
+                   '--texture-quality', arguments.texture_quality, '--render-profile', arguments.render_profile,
+                   '--output', os.path.abspath(arguments.output), '--force']
+
+    if arguments.compress:
+        args += ['--compress']
+    if arguments.link_assets:
+        args += ['--link-assets']
+    if arguments.symmetric:
+        args += ['--symmetric']
+    if arguments.cameras is not None:
+        args += ['--cameras'] + arguments.cameras
+    if arguments.command == 'render':
+        args += ['--render', os.path.abspath(arguments.directory)]
+    if cull_margin is not None:
+        args += ['--cull', str(cull_margin)]
+
+    if arguments.command == 'render' and arguments.jobs > 1:
+        return render_shares(arguments, args, key)
+
+    logging.info("Launching " + " ".join(args))
+    return subprocess.call(args, shell=False)
+
+
+def render_shares(arguments: argparse.Namespace, args: [str], key: str) -> int:
+    """
+    Check and plan the CPACS files once, then build the cabin in several Blender processes that each render a share
+    of the cameras. The processes read the published plans instead of parsing and planning the CPACS files again.
+    :param arguments:
+    :param args: Blender command line of a single render process
+    :param key: build key, recorded once all shares are rendered
+    :return: exit code of the first failed Blender process, 0 if all succeeded
+    """
+
+    handoff_directory: str = os.path.join(addon.CACHE_DIRECTORY, 'handoff')
+    os.makedirs(handoff_directory, exist_ok=True)
+    plan_paths: [str] = []
+
+    try:
+        for cpacs_path in arguments.cpacs:
+            handle, plan_path = tempfile.mkstemp(suffix=addon.HANDOFF_SUFFIX, dir=handoff_directory)
+            os.close(handle)
+            plan_paths.append(plan_path)
+            addon.publish_plans(plan_path, addon.plan_handoff(cpacs_path, arguments.validation))
+
+        processes: [subprocess.Popen] = []
+        for share in range(arguments.jobs):
+            share_args: [str] = args + ['--plans', *plan_paths, '--share', str(share), str(arguments.jobs)]
+            logging.info("Launching " + " ".join(share_args))
+            processes.append(subprocess.Popen(share_args, shell=False))
+
+        exit_codes: [int] = [process.wait() for process in processes]
+
+    except addon.CabinLayoutError as e:
+        print(str(e))
+        return 1
+
+    finally:
+        for plan_path in plan_paths:
+            os.remove(plan_path)
+
+    # One statistics file for all images, as rendered by a single process
+    image_stats: [dict] = []
+    for share in range(arguments.jobs):
+        share_stats_path: str = os.path.join(arguments.directory, addon.render_stats_file(share))
+        if os.path.isfile(share_stats_path):
+            with open(share_stats_path) as share_stats_file:
+                image_stats += json.load(share_stats_file)
+            os.remove(share_stats_path)
+
+    os.makedirs(arguments.directory, exist_ok=True)
+    with open(os.path.join(arguments.directory, addon.RENDER_STATS_FILE), 'w') as stats_file:
+        json.dump(image_stats, stats_file, indent=2)
+
+    failed: [int] = [exit_code for exit_code in exit_codes if exit_code != 0]
+    if len(failed) > 0:
+        return failed[0]
+
+    addon.write_build_key(arguments.output, key)
+    return 0
+
+
+def format_time(start: float) -> str:
+    return "{:.3f} s".format(time.perf_counter() - start)
+
+
+def best_time(function, repeat: int) -> float:
+    """ Shortest time of several calls of a function, in seconds """
+
+    times: [float] = []
+    for _ in range(max(repeat, 1)):
+        start: float = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def main(argv: [str] = None) -> int:
     """
-    This method launches Blender in the background and feeds the Python script as a launch argument. 
-    This skips the manual import and automatically processes the Blender file.
-    Tested with Blender 2.92
+    Command line interface of the importer. Only build and render start Blender, all other commands run in plain
+    Python.
+    :param argv:
+    :return: exit code
     """
 
-    home_path: str = os.path.expanduser('~')
-    blender_installation_path: str = os.path.join(home_path, 'Blender\\blender.exe')
-    python_script_path: str = os.path.join(home_path, 'git\\blender-cpacs-interface\\blender_cpacs_importer.py')
-    cpacs_file_path: str = os.path.join(home_path, 'Desktop\\aircraft.xml')
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s: %(message)s')
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(prog='launch.py')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    parse_parser: argparse.ArgumentParser = commands.add_parser('parse', help="parse a CPACS file and list its decks")
+    parse_parser.add_argument('cpacs')
+    parse_parser.set_defaults(function=command_parse)
+
+    plan_parser: argparse.ArgumentParser = commands.add_parser('plan', help="plan all decks without Blender")
+    plan_parser.add_argument('cpacs')
+    plan_parser.add_argument('--workers', type=int, default=None, help="number of planning processes")
+    plan_parser.add_argument('--no-cache', action='store_true', help="neither read nor write the plan cache")
+    plan_parser.set_defaults(function=command_plan)
 
-    # Generate the launch arguments
-    args: [str] = [blender_installation_path, "--background", '--python', python_script_path, '--', cpacs_file_path]
+    validate_parser: argparse.ArgumentParser = commands.add_parser('validate', help="check the cabin layout")
+    validate_parser.add_argument('cpacs')
+    validate_parser.set_defaults(function=command_validate)
 
-    print(args)
+    stats_parser: argparse.ArgumentParser = commands.add_parser('stats', help="print cabin layout statistics")
+    stats_parser.add_argument('cpacs')
+    stats_parser.add_argument('--json', action='store_true', help="print the statistics as JSON")
+    stats_parser.set_defaults(function=command_stats)
 
-    # Run the process
-    subprocess.call(args, shell=False)
+    cache_parser: argparse.ArgumentParser = commands.add_parser('cache-warm', help="plan decks into the plan cache")
+    cache_parser.add_argument('cpacs', nargs='+')
+    cache_parser.add_argument('--workers', type=int, default=None, help="number of planning processes")
+    cache_parser.set_defaults(function=command_cache_warm)
+
+    golden_parser: argparse.ArgumentParser = commands.add_parser(
+        'golden', help="compare plans and parse and plan times of reference CPACS files with their golden files")
+    golden_parser.add_argument('cpacs', nargs='+')
+    golden_parser.add_argument('--golden', default='golden', help="directory of the golden files")
+    golden_parser.add_argument('--update', action='store_true', help="record new golden files instead of comparing")
+    golden_parser.add_argument('--tolerance', type=float, default=addon.GOLDEN_TOLERANCE,
+                               help="largest accepted difference of positions and sizes")
+    golden_parser.add_argument('--time-margin', type=float, default=addon.GOLDEN_TIME_MARGIN,
+                               help="accepted slowdown of parsing and planning, 0.5 accepts 50%% more time")
+    golden_parser.add_argument('--repeat', type=int, default=3, help="number of timed runs, the fastest counts")
+    golden_parser.add_argument('--max-differences', type=int, default=20, help="number of differences to print")
+    golden_parser.set_defaults(function=command_golden)
+
+    for command, help_text in (('build', "build the Blender file"), ('render', "build and render all cameras")):
+        blender_parser: argparse.ArgumentParser = commands.add_parser(command, help=help_text)
+        blender_parser.add_argument('cpacs', nargs='+', help="CPACS files, several are built side by side")
+        if command == 'render':
+            blender_parser.add_argument('directory', help="output directory of the images")
+            blender_parser.add_argument('--cull', metavar='MARGIN', type=float, nargs='?',
+                                        const=addon.CULLING_MARGIN_DEFAULT, default=None,
+                                        help="exclude objects each camera can not see from its render, with a margin "
+                                             "in meters")
+            blender_parser.add_argument('--jobs', type=int, default=1,
+                                        help="number of Blender processes that render the cameras in parallel, the "
+                                             "CPACS files are planned only once for all of them")
+        blender_parser.add_argument('--blender', default=os.environ.get('BLENDER', BLENDER_DEFAULT),
+                                    help="Blender executable, defaults to $BLENDER or '" + BLENDER_DEFAULT + "'")
+        blender_parser.add_argument('--cameras', nargs='+', choices=addon.CAMERA_KINDS, default=None)
+        blender_parser.add_argument('--validation', choices=addon.VALIDATION_MODES, default='warn')
+        blender_parser.add_argument('--texture-quality', choices=list(addon.TEXTURE_QUALITIES), default='final',
+                                    help="resolution of the image textures, lower qualities are downscaled copies")
+        blender_parser.add_argument('--render-profile', choices=list(addon.RENDER_PROFILES), default='review',
+                                    help="Cycles sampling, bounce, denoising and simplification settings")
+        blender_parser.add_argument('--output', default=addon.OUTPUT_PATH_DEFAULT, help="path of the saved .blend file")
+        blender_parser.add_argument('--compress', action='store_true', help="compress the saved .blend file")
+        blender_parser.add_argument('--link-assets', action='store_true',
+                                    help="link materials and templates from the asset libraries instead of "
+                                         "embedding them")
+        blender_parser.add_argument('--symmetric', action='store_true',
+                                    help="create one half of the symmetric cabin shell and mirror it at the center "
+                                         "plane")
+        blender_parser.add_argument('--force', action='store_true', help="build even if the output is up to date")
+        blender_parser.set_defaults(function=command_blender)
+
+    arguments: argparse.Namespace = parser.parse_args(argv)
+    return arguments.function(arguments)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
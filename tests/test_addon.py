@@ -0,0 +1,566 @@
+"""
+    Checks of the Blender independent parts of the importer, run with 'python -m pytest tests'
+"""
+
+import math
+import os
+import sys
+import xml.etree.ElementTree as XMLTree
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import addon  # noqa: E402
+
+OBJ_MODEL: str = """o box
+v 0.0 0.0 0.0
+v 1.0 0.0 0.0
+v 1.0 2.0 0.0
+v 0.0 2.0 3.0
+f 1 2 3
+f 1 3 4
+"""
+
+
+def rotation_x(angle: float) -> np.ndarray:
+    return np.array([[1.0, 0.0, 0.0], [0.0, math.cos(angle), -math.sin(angle)],
+                     [0.0, math.sin(angle), math.cos(angle)]])
+
+
+def write_obj(directory) -> str:
+    path: str = os.path.join(str(directory), 'box.obj')
+    with open(path, 'w') as obj_file:
+        obj_file.write(OBJ_MODEL)
+    return path
+
+
+def test_template_orientation(tmp_path):
+    """ A template copy is oriented like an object of the .obj importer, which turns (x, y, z) into (x, -z, y) """
+
+    vertices: np.ndarray = addon.read_obj_file(write_obj(tmp_path)).vertices
+    world: np.ndarray = vertices @ rotation_x(addon.OBJ_ROTATION_X).T
+    baseline: np.ndarray = np.column_stack([vertices[:, 0], -vertices[:, 2], vertices[:, 1]])
+
+    assert np.allclose(world, baseline, atol=1e-6)
+    assert np.allclose(np.ptp(world, axis=0), [1.0, 3.0, 2.0], atol=1e-6)
+
+
+class MeshVertices:
+    """ Vertex coordinates of a mesh as load_obj_file() stores them """
+
+    def __init__(self, coordinates: np.ndarray) -> None:
+        self.coordinates = np.asarray(coordinates, dtype=np.float32).ravel()
+
+    def __len__(self) -> int:
+        return len(self.coordinates) // 3
+
+    def foreach_get(self, attribute: str, values: np.ndarray) -> None:
+        values[:] = self.coordinates
+
+
+class Mesh:
+    def __init__(self, coordinates: np.ndarray) -> None:
+        self.vertices = MeshVertices(coordinates)
+
+
+def test_template_dimensions(tmp_path):
+    """ Planning without Blender uses the dimensions the templates of an import report """
+
+    path: str = write_obj(tmp_path)
+    dimensions: tuple = addon.read_obj_dimensions(path)
+
+    assert dimensions == addon.mesh_dimensions(Mesh(addon.read_obj_file(path).vertices))
+    assert np.allclose(dimensions, [1.0, 2.0, 3.0])
+
+
+def rotation_z(angle: float) -> np.ndarray:
+    return np.array([[math.cos(angle), -math.sin(angle), 0.0], [math.sin(angle), math.cos(angle), 0.0],
+                     [0.0, 0.0, 1.0]])
+
+
+def test_rotated_mirrored_placement():
+    """ A seat that is rotated first and then mirrored faces the mirrored heading """
+
+    angle: float = math.radians(15.0)
+    scale: np.ndarray = np.diag([0.5, 1.2, 0.6])
+    matrix: np.ndarray = np.identity(4)
+    matrix[:3, :3] = rotation_x(addon.OBJ_ROTATION_X) @ scale
+    matrix[:3, 3] = [3.0, 1.0, 0.5]
+
+    placement: addon.Placement = addon.Placement('seat', 'seats', addon.Vector(3.0, 1.0, 0.5), rotation_z=angle,
+                                                 mirror_y=True, rotate_first=True)
+    placed: np.ndarray = addon.placement_matrix(matrix, placement)
+
+    expected: np.ndarray = np.diag([1.0, -1.0, 1.0]) @ rotation_z(angle) @ rotation_x(addon.OBJ_ROTATION_X) @ scale
+    assert np.allclose(placed[:3, :3], expected)
+    assert np.allclose(placed[:3, 3], [3.0, 1.0, 0.5])
+
+    # The local x axis of the seat turns to -15 degrees
+    heading: np.ndarray = placed[:3, 0] / np.linalg.norm(placed[:3, 0])
+    assert math.isclose(math.atan2(heading[1], heading[0]), -angle)
+
+
+def test_mirrored_rotated_placement():
+    """ A placement that is mirrored first and then rotated keeps the rotation of the plan """
+
+    angle: float = math.radians(30.0)
+    matrix: np.ndarray = np.identity(4)
+    matrix[:3, :3] = rotation_x(addon.OBJ_ROTATION_X)
+
+    placement: addon.Placement = addon.Placement('lining_1', 'lining', addon.Vector(), rotation_z=angle,
+                                                 mirror_y=True)
+    expected: np.ndarray = rotation_z(angle) @ np.diag([1.0, -1.0, 1.0]) @ rotation_x(addon.OBJ_ROTATION_X)
+
+    assert np.allclose(addon.placement_matrix(matrix, placement)[:3, :3], expected)
+
+
+def test_rebuilt_shapes_pair():
+    """ Both halves of a shape pair by their outline, also when each half holds its own vectors """
+
+    def outline(depth: float) -> [[addon.Vector]]:
+        return [[addon.Vector(x, 0.5, depth) for x in (0.0, 1.0)], [addon.Vector(x, 1.5, depth) for x in (0.0, 1.0)]]
+
+    port: addon.ShapePlacement = addon.ShapePlacement('Deck Floor R', 'floor', outline(0.0))
+    starboard: addon.ShapePlacement = addon.ShapePlacement('Deck Floor L', 'floor', outline(0.0), mirror_y=True)
+    other: addon.ShapePlacement = addon.ShapePlacement('Deck Ceiling L', 'floor', outline(2.0), mirror_y=True)
+
+    half: list = addon.symmetric_elements([port, starboard, other], addon.shape_mirror_key)
+
+    assert [shape.name for shape in half] == ['Deck Floor R', 'Deck Ceiling L']
+    assert half[0].mirror_half and not half[1].mirror_half
+
+
+def test_attached_plans_pair(tmp_path):
+    """ The symmetric half of a deck plan is the same before and after the plan handoff """
+
+    deck_plan: addon.DeckPlan = addon.DeckPlan('Deck', 'deck')
+    outline: [[addon.Vector]] = [[addon.Vector(x, y / 3.0, 0.1 * y) for y in (1.0, 2.0, 4.0)] for x in (0.0, 0.7)]
+    deck_plan.shapes.append(addon.ShapePlacement('Deck Floor R', 'floor', outline, 'Fabric_black'))
+    deck_plan.shapes.append(addon.ShapePlacement('Deck Floor L', 'floor', outline, 'Fabric_black', mirror_y=True))
+    deck_plan.placements.append(addon.Placement('lining_1', 'lining', addon.Vector(0.5, -1.0 / 3.0, 0.2), size_x=0.3,
+                                                rotation_z=-0.1, repeat_x=4))
+    deck_plan.placements.append(addon.Placement('lining_1', 'lining', addon.Vector(0.5, 1.0 / 3.0, 0.2), size_x=0.3,
+                                                rotation_z=0.1, mirror_y=True, repeat_x=4))
+
+    path: str = str(tmp_path / ('aircraft' + addon.HANDOFF_SUFFIX))
+    addon.publish_plans(path, addon.PlanHandoff([deck_plan], [], 10.0, 2.0))
+    attached: addon.DeckPlan = addon.attach_plans(path).deck_plans[0]
+
+    def halves(plan: addon.DeckPlan) -> list:
+        half: addon.DeckPlan = addon.symmetric_half(plan)
+        return [(element.mirror_y, element.mirror_half) for element in half.shapes + half.placements]
+
+    assert halves(attached) == halves(deck_plan) == [(False, True), (False, True)]
+
+
+def fuselage_xml(profiles: dict, section_profiles: [str]) -> XMLTree.Element:
+    """ CPACS fuselage of sections without scaling, each one positioned 1 m behind the previous one """
+
+    def point_list(points: [[float]]) -> str:
+        closed: [[float]] = points + points[:1]
+        return ''.join('<' + axis + '>' + ';'.join(str(point[index]) for point in closed) + '</' + axis + '>'
+                       for index, axis in enumerate('xyz'))
+
+    section: str = ('<section><elements><element><profileUID>{}</profileUID><transformation><scaling><y>1</y><z>1</z>'
+                    '</scaling><translation><z>0</z></translation></transformation></element></elements></section>')
+    return XMLTree.fromstring(
+        '<cpacs><vehicles><aircraft><model><fuselages><fuselage><sections>' +
+        ''.join(section.format(uid) for uid in section_profiles) + '</sections><positionings>' +
+        '<positioning><length>1</length></positioning>' * len(section_profiles) +
+        '</positionings></fuselage></fuselages></model></aircraft><profiles><fuselageProfiles>' +
+        ''.join('<fuselageProfile uID="' + uid + '"><pointList>' + point_list(points) + '</pointList></fuselageProfile>'
+                for uid, points in profiles.items()) + '</fuselageProfiles></profiles></vehicles></cpacs>')
+
+
+def test_fuselage_profiles_spaced_alike():
+    """ Profiles of different point counts are all resampled, including the most detailed one """
+
+    rectangle: [[float]] = [[0.0, 1.0, 0.5], [0.0, 1.0, -0.5], [0.0, -1.0, -0.5], [0.0, -1.0, 0.5]]
+    triangle: [[float]] = [[0.0, 0.0, 1.0], [0.0, 1.0, -1.0], [0.0, -1.0, -1.0]]
+
+    shapes, length, _ = addon.plan_fuselage(fuselage_xml(dict([('rectangle', rectangle), ('triangle', triangle)]),
+                                                         ['rectangle', 'triangle']))
+
+    assert length == 2.0
+    for shape, profile in zip(shapes, [rectangle, triangle]):
+        assert np.allclose([[vec.y, vec.z] for vec in shape],
+                           addon.resample_fuselage_profile(np.array(profile), 4)[:, 1:])
+
+    shapes, _, _ = addon.plan_fuselage(fuselage_xml(dict([('rectangle', rectangle)]), ['rectangle', 'rectangle']))
+
+    assert np.allclose([[vec.y, vec.z] for vec in shapes[1]], np.array(rectangle)[:, 1:])
+
+
+def cabin_contour(x: [float], floor_y: [float], top_y: [float]) -> addon.CabinContour:
+    """ Contour of a deck with half widths at floor level and at a height of 1.6 m """
+
+    def values(numbers: [float]) -> str:
+        return ';'.join(str(number) for number in numbers)
+
+    return addon.CabinContour(XMLTree.fromstring(
+        '<deck><cabGeometry><x>' + values(x) + '</x><yZ1>' + values(floor_y) + '</yZ1><yZ2>' + values(top_y) +
+        '</yZ2><z>0;1.6</z></cabGeometry></deck>'))
+
+
+@pytest.mark.parametrize('taper', [0.3, 0.1, 0.05, 0.01])
+def test_constant_lining_next_to_taper(taper: float):
+    """ A section of constant width is one segment, also when its neighbours taper gently """
+
+    floor_y: [float] = [1.8 - 2.0 * taper, 1.8, 1.8, 1.8 - 3.5 * taper]
+    contour: addon.CabinContour = cabin_contour([0.0, 2.0, 10.0, 13.5], floor_y, [y + 0.05 for y in floor_y])
+
+    assert addon.plan_lining_segments(contour, 1.6, 13.5) == [(0.0, 2.0, 2, False), (2.0, 10.0, 8, True),
+                                                              (10.0, 13.5, 4, False)]
+
+
+def test_lining_kind_change():
+    """ Segments end where the lining template changes, a change next to a station leaves no sliver """
+
+    segments: [tuple] = addon.plan_lining_segments(cabin_contour([0.0, 4.0, 8.0], [1.8, 1.8, 1.8], [1.8, 2.0, 2.0]),
+                                                   1.6, 8.0)
+
+    assert np.allclose([[start, end] for start, end, _, _ in segments], [[0.0, 2.0], [2.0, 4.0], [4.0, 8.0]])
+    assert [constant for _, _, _, constant in segments] == [False, False, True]
+
+    segments = addon.plan_lining_segments(cabin_contour([0.0, 4.0, 8.0], [1.8, 1.8, 1.8], [1.8, 1.902, 1.902]),
+                                          1.6, 8.0)
+
+    assert [(start, end) for start, end, _, _ in segments] == [(0.0, 4.0), (4.0, 8.0)]
+
+
+def seat_row_camera(seat_x: float, floor_elements: [tuple]) -> float:
+    """ x position of the seat row camera of a single business seat group at seat_x """
+
+    deck_plan: addon.DeckPlan = addon.DeckPlan('Deck')
+    seat_groups: np.ndarray = np.array([('business', 2, seat_x, -1.0, 0.8, 1.2, 1.1, 0.0)],
+                                       dtype=addon.SEAT_GROUP_DTYPE)
+    addon.plan_cameras(deck_plan, [(0, 0.0, 10.0, 0.0)], seat_groups, 0.0, 0.0, addon.Vector(10.0, 4.0, 2.1),
+                       np.array(floor_elements, dtype=addon.FLOOR_ELEMENT_DTYPE))
+
+    return [camera for camera in deck_plan.cameras if camera.kind == 'seat_row'][0].position.x
+
+
+def test_seat_row_camera_in_cabin():
+    """ The seat row camera stays behind the deck front and behind monuments in front of the row """
+
+    assert seat_row_camera(3.0, []) == pytest.approx(3.0 - addon.CAMERA_SEAT_ROW_DISTANCE)
+    assert seat_row_camera(1.0, []) == pytest.approx(addon.CAMERA_CLEARANCE)
+    assert seat_row_camera(3.0, [('galley', 0.5, 0.0, 2.0, 1.0, 2.0, 0.0)]) == \
+        pytest.approx(2.5 + addon.CAMERA_CLEARANCE)
+    assert seat_row_camera(3.0, [('galley', 0.5, 1.5, 2.0, 1.0, 2.0, 0.0)]) == \
+        pytest.approx(3.0 - addon.CAMERA_SEAT_ROW_DISTANCE)
+
+
+def test_fuselage_profiles_decoded_once(monkeypatch):
+    """ Sections that share a profile decode it once """
+
+    decoded: list = []
+    decode = addon.decode_fuselage_profile
+    monkeypatch.setattr(addon, 'decode_fuselage_profile', lambda profile: decoded.append(profile) or decode(profile))
+
+    square: [[float]] = [[0.0, 1.0, 1.0], [0.0, 1.0, -1.0], [0.0, -1.0, -1.0], [0.0, -1.0, 1.0]]
+    shapes, _, _ = addon.plan_fuselage(fuselage_xml(dict([('square', square)]), ['square'] * 3))
+
+    assert len(shapes) == 3 and len(decoded) == 1
+
+
+def test_encoded_plans_round_trip():
+    """ Deck plans rebuilt from the arrays of encode_plans() record like the planned ones """
+
+    deck_plan: addon.DeckPlan = addon.DeckPlan('Deck', 'deck')
+    deck_plan.origin = addon.Vector(2.0, 0.0, -0.5)
+    deck_plan.size = addon.Vector(12.0, 3.6, 2.1)
+    deck_plan.shapes.append(addon.ShapePlacement('Deck Floor R', 'floor', [[addon.Vector(0.0, 0.5, 0.0)] * 3] * 2))
+    deck_plan.placements.append(addon.Placement('seat_economy_3', 'seats', addon.Vector(3.0, -1.2, 0.0), size_x=0.7,
+                                                rotation_z=0.2, rotate_first=True, source='seatElement[1]'))
+    deck_plan.lights.append(addon.LightPlacement('Strip', 'AREA', addon.Vector(4.0, 0.0, 2.0), 60.0,
+                                                 addon.Vector(8.0, 0.1, 0.0), (0, 'ceiling')))
+    deck_plan.lights.append(addon.LightPlacement('Lamp', 'POINT', addon.Vector(1.0, 0.0, 2.0), 150.0))
+    deck_plan.cameras.append(addon.CameraPlacement('Aisle', 'aisle', addon.Vector(2.0, 0.0, 1.6),
+                                                   addon.Vector(14.0, 0.0, 1.0), 18.0,
+                                                   cabin=(addon.Vector(2.0, -1.8, -0.5), addon.Vector(14.0, 1.8, 1.6))))
+    deck_plan.cameras.append(addon.CameraPlacement('Section', 'cross_section', addon.Vector(8.0, 0.0, 0.5),
+                                                   addon.Vector(9.0, 0.0, 0.5), ortho_scale=4.0))
+
+    decoded: [addon.DeckPlan] = addon.decode_plans(*addon.encode_plans([deck_plan]))
+
+    assert addon.compare_records(addon.plan_record([deck_plan], []), addon.plan_record(decoded, []), 0.0) == []
+    assert [light.row for light in decoded[0].lights] == [(0, 'ceiling'), None]
+    assert decoded[0].cameras[1].cabin is None and decoded[0].placements[0].source == 'seatElement[1]'
+
+
+def xml_elements(tag: str, elements: [dict]) -> str:
+    """ CPACS elements of a tag with the uID and child values of each element """
+
+    return ''.join('<' + tag + ' uID="' + uid + '">' + ''.join('<' + key + '>' + str(value) + '</' + key + '>'
+                                                                for key, value in values.items()) + '</' + tag + '>'
+                   for uid, values in elements)
+
+
+def cabin_xml(seat_groups: list = (), floor_elements: list = (), aisles: list = ()) -> XMLTree.Element:
+    """ CPACS document of one 10 m deck with a half width of 1.8 m, elements are (uID, values) pairs """
+
+    return XMLTree.fromstring(
+        '<cpacs><vehicles><aircraft><model><fuselages><fuselage><decks><deck uID="main"><name>Main</name>'
+        '<x0>2.0</x0><z0>0.0</z0><cabGeometry><x>0;10</x><yZ1>1.8;1.8</yZ1><yZ2>1.8;1.8</yZ2><z>0;1.6</z>'
+        '</cabGeometry><aisles>' + xml_elements('aisle', aisles) + '</aisles><floorElements>' +
+        xml_elements('floorElement', floor_elements) + '</floorElements><seatElements>' +
+        xml_elements('seatElement', seat_groups) + '</seatElements></deck></decks></fuselage></fuselages></model>'
+        '</aircraft></vehicles></cpacs>')
+
+
+def seat_group(x: float, y: float, seat_type: str = 'economy', n_seats: int = 3, length: float = 0.8) -> dict:
+    return dict([('type', seat_type), ('nSeats', n_seats), ('x', x), ('y', y), ('length', length), ('width', 1.5),
+                 ('height', 1.1)])
+
+
+def test_spatial_grid_pairs():
+    """ Only footprints that share a grid cell are overlap candidates """
+
+    grid: addon.SpatialGrid = addon.SpatialGrid(cell_size=1.0)
+    for index, (x, y) in enumerate([(0.5, 0.5), (1.2, 0.5), (5.5, 5.5)]):
+        grid.insert(index, addon.Footprint('element', 'seat', x, y, 0.8, 0.8))
+
+    assert grid.pairs() == {(0, 1)}
+    assert grid.query(5.0, 6.0, 5.0, 6.0) == {2}
+    assert grid.query(20.0, 21.0, 0.0, 1.0) == set()
+
+
+def test_validate_deck_issues():
+    """ Overlapping seat groups, seats in the aisle and elements outside of the contour are found """
+
+    aisle: tuple = ('aisle', dict([('x', '0;10'), ('y', '0;0')]))
+    clean: XMLTree.Element = cabin_xml([('s1', seat_group(1.0, -1.0)), ('s2', seat_group(1.0, 1.0)),
+                                        ('s3', seat_group(2.0, -1.0))], aisles=[aisle])
+
+    assert addon.validate_decks(clean) == []
+
+    issues: [addon.ValidationIssue] = addon.validate_decks(cabin_xml(
+        [('s1', seat_group(1.0, -1.0)), ('s2', seat_group(1.5, -1.0)), ('s3', seat_group(4.0, -0.9)),
+         ('s4', seat_group(6.0, 1.2))], [('g1', dict([('type', 'galley'), ('x', 9.5), ('y', 0.0), ('length', 1.0),
+                                                      ('width', 1.0), ('height', 2.0)]))], [aisle]))
+
+    def issue_uids(kind: str) -> [[str]]:
+        return [[path.split("'")[-2] for path in issue.paths] for issue in issues if issue.kind == kind]
+
+    assert issue_uids('overlap') == [['s1', 's2']]
+    assert issue_uids('aisle') == [['s3', 'aisle']]
+    assert issue_uids('contour') == [['s4'], ['g1']]
+
+
+def test_check_layout_modes():
+    """ The validation mode decides whether issues are ignored, returned by element path or abort the import """
+
+    cpacs: XMLTree.Element = cabin_xml([('s1', seat_group(1.0, -1.0)), ('s2', seat_group(1.5, -1.0))])
+
+    assert addon.check_layout(cpacs, 'aircraft.xml', 'off') == dict()
+    assert sorted(path.split("'")[-2] for path in addon.check_layout(cpacs, 'aircraft.xml', 'warn')) == ['s1', 's2']
+    with pytest.raises(addon.CabinLayoutError):
+        addon.check_layout(cpacs, 'aircraft.xml', 'abort')
+
+
+def cabin_deck(*args) -> addon.DeckData:
+    """ Decoded deck of cabin_xml() """
+
+    return addon.DeckData(cabin_xml(*args).find(addon.CPACS.deck_path))
+
+
+def test_deck_data_seats():
+    """ Seat groups are split into single seats in aircraft coordinates """
+
+    deck_data: addon.DeckData = cabin_deck([('s1', seat_group(1.0, -1.0)), ('s2', seat_group(1.0, 1.0, n_seats=2))])
+    seats: np.ndarray = deck_data.seats()
+
+    assert seats['group'].tolist() == [0, 0, 0, 1, 1] and seats['seat'].tolist() == [0, 1, 2, 0, 1]
+    assert np.allclose(seats['x'], 2.0 + 1.0 + 0.4)
+    assert np.allclose(seats['y'], [-1.5, -1.0, -0.5, 0.625, 1.375])
+    assert np.allclose(seats['width'], [0.5, 0.5, 0.5, 0.75, 0.75])
+
+
+def test_deck_statistics():
+    """ Seat counts, rows, pitches, floor areas and aisle widths of a deck """
+
+    deck_data: addon.DeckData = cabin_deck(
+        [('s1', seat_group(1.0, -1.0, 'business', 2)), ('s2', seat_group(1.0, 1.0, 'business', 2)),
+         ('s3', seat_group(3.0, -1.0)), ('s4', seat_group(3.8, -1.0)), ('s5', seat_group(3.0, 1.0))],
+        [('g1', dict([('type', 'galley'), ('x', 8.0), ('y', 0.0), ('length', 1.0), ('width', 2.0), ('height', 2.0)])),
+         ('t1', dict([('type', 'toilet'), ('x', 9.0), ('y', 1.0), ('length', 0.8), ('width', 1.0), ('height', 2.0)]))],
+        [('aisle', dict([('x', '0;10'), ('y', '0;0')]))])
+    seats: np.ndarray = deck_data.seats()
+
+    assert addon.count_by_type(seats) == dict([('business', 4), ('economy', 9)])
+    assert addon.count_by_type(deck_data.seat_groups) == dict([('business', 2), ('economy', 3)])
+    assert addon.seats_per_row(seats) == dict([(3.4, 4), (5.4, 6), (6.2, 3)])
+
+    pitches: dict = addon.seat_pitches(seats)
+    assert pitches['business'].tolist() == [] and np.allclose(pitches['economy'], [0.8])
+    assert addon.floor_area_by_type(deck_data.floor_elements) == pytest.approx(dict([('galley', 2.0), ('toilet', 0.8)]))
+
+    widths: np.ndarray = addon.aisle_widths(deck_data)[0]
+    assert np.allclose(widths, [[3.4, 0.5], [5.4, 0.5]])
+
+
+def test_cabin_contour_interpolation():
+    """ Half widths and slopes are interpolated along the stations and between the heights """
+
+    contour: addon.CabinContour = cabin_contour([0.0, 2.0, 10.0], [1.0, 2.0, 2.0], [1.4, 2.4, 1.6])
+
+    assert contour.length == 10.0 and contour.height == 1.6
+    assert contour.half_width(1.0) == pytest.approx(1.5)
+    assert contour.half_width(1.0, 0.8) == pytest.approx(1.7)
+    assert np.allclose(contour.half_width(np.array([-1.0, 6.0, 12.0]), 1.6), [1.4, 2.0, 1.6])
+    assert np.allclose(contour.half_width(np.array([6.0, 6.0]), np.array([0.0, 3.0])), [2.0, 2.0])
+
+    assert contour.slope(1.0) == pytest.approx(0.5)
+    assert np.allclose(contour.slope(np.array([-1.0, 6.0, 12.0]), 1.6), [0.0, -0.1, 0.0])
+    assert contour.half_width_range(1.0, 6.0) == pytest.approx((1.5, 2.0))
+    assert contour.half_width_range(1.0, 6.0, 1.6) == pytest.approx((1.9, 2.4))
+
+
+def light_strip(x: float, length: float, row: tuple, strength: float = 10.0) -> addon.LightPlacement:
+    return addon.LightPlacement('strip', 'AREA', addon.Vector(x, 0.0, 2.0), strength, addon.Vector(length, 0.2, 0.0),
+                                row)
+
+
+def light_powers(deck_plans: [addon.DeckPlan]) -> float:
+    return sum(light.strength for deck_plan in deck_plans for light in deck_plan.lights)
+
+
+def test_light_budget_merges_strips():
+    """ The shortest neighbouring strips of a row are merged first, keeping the emitted power """
+
+    deck_plan: addon.DeckPlan = addon.DeckPlan('main')
+    deck_plan.lights = [light_strip(0.5, 1.0, (0, 'ceiling')), light_strip(1.5, 1.0, (0, 'ceiling')),
+                        light_strip(4.0, 2.0, (0, 'ceiling')), light_strip(0.5, 1.0, (1, 'ceiling'))]
+
+    addon.apply_light_budget([deck_plan], None)
+    assert len(deck_plan.lights) == 4
+    addon.apply_light_budget([deck_plan], 4)
+    assert len(deck_plan.lights) == 4
+
+    addon.apply_light_budget([deck_plan], 3)
+    assert len(deck_plan.lights) == 3
+    assert light_powers([deck_plan]) == pytest.approx(40.0)
+    merged: addon.LightPlacement = deck_plan.lights[0]
+    assert (merged.start_x(), merged.end_x(), merged.strength) == pytest.approx((0.0, 2.0, 20.0))
+
+    addon.apply_light_budget([deck_plan], 2)
+    assert sorted(light.row for light in deck_plan.lights) == [(0, 'ceiling'), (1, 'ceiling')]
+    assert (deck_plan.lights[0].start_x(), deck_plan.lights[0].end_x()) == pytest.approx((0.0, 5.0))
+    assert light_powers([deck_plan]) == pytest.approx(40.0)
+
+
+def test_light_budget_folds_bins_and_drops_lamps():
+    """ Bin strips are folded into their ceiling strip, then point lamps are dropped and the strongest lights kept """
+
+    lamp: addon.LightPlacement = addon.LightPlacement('lamp', 'POINT', addon.Vector(1.0, 0.0, 1.0), 50.0)
+    deck_plans: [addon.DeckPlan] = [addon.DeckPlan('main'), addon.DeckPlan('upper')]
+    deck_plans[0].lights = [light_strip(1.0, 2.0, (0, 'ceiling')), light_strip(1.0, 2.0, (0, 'bin_left'), 5.0),
+                            light_strip(1.0, 2.0, (0, 'bin_right'), 5.0), lamp]
+    deck_plans[1].lights = [light_strip(1.0, 2.0, (0, 'ceiling'), 30.0)]
+
+    addon.apply_light_budget(deck_plans, 3)
+    assert [light.row for light in deck_plans[0].lights] == [(0, 'ceiling'), None]
+    assert deck_plans[0].lights[0].strength == pytest.approx(20.0)
+
+    addon.apply_light_budget(deck_plans, 2)
+    assert [light.light_type for light in deck_plans[0].lights] == ['AREA']
+
+    addon.apply_light_budget(deck_plans, 1)
+    assert deck_plans[0].lights == [] and deck_plans[1].lights[0].strength == 30.0
+
+    addon.apply_light_budget(deck_plans, 0)
+    assert deck_plans[1].lights == []
+
+
+def write_obj_model(directory, model: str, name: str = 'model.obj') -> str:
+    path: str = os.path.join(str(directory), name)
+    with open(path, 'w') as obj_file:
+        obj_file.write(model)
+    return path
+
+
+def test_obj_parts_and_uvs(tmp_path):
+    """ Objects, groups and materials start parts, texture coordinates are read per face corner """
+
+    path: str = write_obj_model(tmp_path, """mtllib model.mtl
+v 0.0 0.0 0.0
+v 1.0 0.0 0.0
+v 1.0 1.0 0.0
+v 0.0 1.0 0.0
+vt 0.0 0.0
+vt 1.0 0.0
+vt 1.0 1.0
+vt 0.0 1.0
+usemtl fabric
+f 1/1 2/2 3/3
+o seat
+f 1/1/1 3/3/1 4/4/1
+usemtl metal
+g frame
+f -4/-4 -3/-3 -2/-2 -1/-1
+o seat
+f 1/1 2/2 4/4
+""")
+    model: addon.ObjModel = addon.read_obj_file(path)
+
+    assert model.name == 'fabric' and model.parts == ['fabric', 'seat', 'frame']
+    assert model.face_parts.tolist() == [0, 1, 2, 1]
+    assert model.loop_totals.tolist() == [3, 3, 4, 3]
+    assert model.loops.tolist() == [0, 1, 2, 0, 2, 3, 0, 1, 2, 3, 0, 1, 3]
+    assert model.loop_starts().tolist() == [0, 3, 6, 10]
+    assert model.vertices.dtype == np.float32 and model.uvs.dtype == np.float32
+    assert np.allclose(model.uvs[6:10], [[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]])
+    assert [len(model.loops) for model in addon.read_obj_files([path, write_obj(tmp_path)], workers=1)] == [13, 6]
+
+
+def test_obj_slow_parse(tmp_path):
+    """ Lines with extra values and faces with mixed corner forms are read line by line """
+
+    path: str = write_obj_model(tmp_path, """v 0.0 0.0 0.0 1.0 0.0 0.0
+v 1.0 0.0 0.0
+v 1.0 2.0 0.0 0.5 0.5 0.5
+vt 0.5 0.5 0.0
+vt 1.0 0.5
+f 1/1 2//1 3
+f 1/1/1 2/2/1 3/1/1
+""")
+    model: addon.ObjModel = addon.read_obj_file(path)
+
+    assert model.name == 'model' and model.parts == ['model']
+    assert np.allclose(model.vertices, [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [1.0, 2.0, 0.0]])
+    assert model.loops.tolist() == [0, 1, 2, 0, 1, 2]
+    assert model.uvs is None
+
+    assert np.array_equal(addon.obj_corners(['1/2', '3//1', '4']), [[1, 2], [3, 0], [4, 0]])
+    assert np.array_equal(addon.obj_corners(['1/2/3', '4/5/6']), [[1, 2], [4, 5]])
+    assert np.array_equal(addon.obj_table(['vt 0.5 0.5 0.0\n', 'vt 1.0 0.5\n'], 2), [[0.5, 0.5], [1.0, 0.5]])
+    assert np.array_equal(addon.obj_table(['vt 0.5 0.5 0.0\n', 'vt 1.0\n'], 2), [[0.5, 0.5], [1.0, 0.0]])
+
+    with pytest.raises(ValueError):
+        addon.read_obj_file(write_obj_model(tmp_path, "v 0.0 0.0 0.0\nf 1 2 -2\n", 'broken.obj'))
+
+
+def test_compare_records():
+    """ Numbers may differ by the tolerance, any other difference is reported with its location """
+
+    deck_plan: addon.DeckPlan = addon.DeckPlan('main')
+    deck_plan.lights = [light_strip(1.0, 2.0, (0, 'ceiling'))]
+    golden: dict = addon.plan_record([deck_plan], [[addon.Vector(0.0, 1.0, 2.0)]])
+
+    deck_plan.lights[0].position.x += addon.GOLDEN_TOLERANCE / 2.0
+    assert addon.compare_records(golden, addon.plan_record([deck_plan], [[addon.Vector(0.0, 1.0, 2.0)]])) == []
+
+    deck_plan.lights[0].position.x = 1.5
+    deck_plan.lights[0].light_type = 'POINT'
+    assert addon.compare_records(golden, addon.plan_record([deck_plan], [])) == [
+        "plan.fuselage: 0 elements instead of 1",
+        "plan.decks[0].lights[0].light_type: POINT instead of AREA",
+        "plan.decks[0].lights[0].position[0]: 1.5 instead of 1.0"]
+
+    assert addon.compare_records({'a': 1, 'b': [1.0, 2.0]}, {'b': [1.05, 2.0], 'c': None}, 0.1, 'record') == [
+        "record.a: missing", "record.c: unexpected"]
+    assert addon.compare_records({'mirror_y': False, 'size': None}, {'mirror_y': True, 'size': 0.0}, 1.0) == [
+        "plan.mirror_y: True instead of False", "plan.size: 0.0 instead of None"]